@@ -0,0 +1,155 @@
+"""
+Benchmarks of NutanixAPI workloads against local MockPrismCentral.
+
+    python benchmarks/bench_api.py
+    python benchmarks/bench_api.py --vms 5000 --latency 0.02 --workloads list,lookup --json before.json
+    python benchmarks/bench_api.py --bandwidth 2e6 --no-gzip --workloads list,resize
+
+Every workload reports number of operations, total time, operations per second,
+median and 95th percentile latency, number of HTTP requests seen by server and
+kilobytes transferred (request and response bodies on wire).
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT_DIR=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0,ROOT_DIR)
+sys.path.insert(0,os.path.join(ROOT_DIR,'tests'))     #MockPrismCentral is test code, not part of package
+
+from nutanixapi.nutanixapi import NutanixAPI
+from mockserver import MockPrismCentral
+
+TEMPLATES={
+    "cloud-init.yaml.j2":"#cloud-config\nhostname: bench\n",
+    "cloud-init-net.yaml.j2":"#cloud-config\nhostname: bench\n",
+    "static.yaml.j2":"version: 2\n",
+    }
+
+def measure(name,operation,iterations,mock):
+    """
+    Runs operation iterations times, returns result dictionary
+    """
+    mock.requests.clear()
+    mock.transfer.clear()
+    latencies=[]
+    started=time.perf_counter()
+    for idx in range(iterations):
+        op_started=time.perf_counter()
+        operation(idx)
+        latencies.append(time.perf_counter()-op_started)
+    total=time.perf_counter()-started
+    latencies.sort()
+    return {
+        "workload":name,
+        "ops":iterations,
+        "total_s":total,
+        "ops_per_s":iterations/total if total else 0,
+        "p50_ms":statistics.median(latencies)*1000,
+        "p95_ms":latencies[math.ceil(0.95*len(latencies))-1]*1000,
+        "requests":sum(mock.requests.values()),
+        "wire_kb":(mock.transfer['request_wire_bytes']+mock.transfer['response_wire_bytes'])/1024,
+        }
+
+def vm_spec(api,idx,template_dir):
+    return dict(vm_name=f"bench-{idx}",vm_description="benchmark",
+                cluster_uuid=api.get_cluster_uuid("cluster-0"),project_uuid=api.get_project_uuid("project-0"),
+                owner_uuid=api.get_current_user_uuid(),source_image_uuid=api.get_image_uuid("image-0"),
+                subnet_uuid=api.get_subnet_uuid("subnet-0"),template_dir=template_dir)
+
+def run(args):
+    results=[]
+    workloads=set(args.workloads.split(','))
+    template_dir=tempfile.mkdtemp(prefix="nutanixapi-bench-")
+    for name,content in TEMPLATES.items():
+        with open(os.path.join(template_dir,name),'w') as file:
+            file.write(content)
+    with MockPrismCentral(vms=args.vms,images=args.images,latency=args.latency,
+                          max_page_size=args.page_size,task_duration=args.task_duration,
+                          bandwidth=args.bandwidth) as mock, \
+         NutanixAPI(mock.url,'admin','secret',None,logging.WARNING,page_size=args.page_size,
+                    accept_gzip=not args.no_gzip,gzip_request_min_size=args.gzip_request_min_size) as api:
+        vm_uuids=list(mock.entities['vm'])
+        n=args.iterations
+        if 'list' in workloads:
+            results.append(measure("list_vms",lambda idx: api.list_vms(),max(1,n//10),mock))
+            results.append(measure("iter_vms",lambda idx: sum(1 for vm in api.iter_vms()),max(1,n//10),mock))
+            results.append(measure("iter_vms prefetch",lambda idx: sum(1 for vm in api.iter_vms(prefetch=True)),max(1,n//10),mock))
+            results.append(measure("iter_vms stream",lambda idx: sum(1 for vm in api.iter_vms(stream=True)),max(1,n//10),mock))
+        if 'lookup' in workloads:
+            names=[f"image-{idx % args.images}" for idx in range(n)]
+            results.append(measure("get_image_uuid",lambda idx: api.get_image_uuid(names[idx]),n,mock))
+            with NutanixAPI(mock.url,'admin','secret',None,logging.WARNING,name_cache_ttl=300) as cached_api:
+                results.append(measure("get_image_uuid cached",lambda idx: cached_api.get_image_uuid(names[idx]),n,mock))
+            results.append(measure("get_vm",lambda idx: api.get_vm(vm_uuids[idx % len(vm_uuids)]),n,mock))
+        if 'create' in workloads:
+            spec=vm_spec(api,0,template_dir)
+            results.append(measure("create_vm_simple",
+                                   lambda idx: api.create_vm_simple(**dict(spec,vm_name=f"bench-{idx}")),n,mock))
+            specs=[dict(spec,vm_name=f"bulk-{idx}") for idx in range(n)]
+            results.append(measure("create_vms_bulk",lambda idx: api.create_vms_bulk(specs,wait=False),1,mock))
+        if 'resize' in workloads:
+            def resize(idx):
+                vm_uuid=vm_uuids[idx % len(vm_uuids)]
+                api.resize_vm_disk(vm_uuid,api.get_disk0(vm_uuid),f"{30+idx}G")
+            results.append(measure("resize_vm_disk",resize,n,mock))
+        if 'power' in workloads:
+            def toggle(idx):
+                vm_uuid=vm_uuids[idx % len(vm_uuids)]
+                if idx % 2:
+                    api.vm_poweroff(vm_uuid)
+                else:
+                    api.vm_poweron(vm_uuid)
+            results.append(measure("power toggle",toggle,n,mock))
+        if 'fleet' in workloads:
+            results.append(measure("power_off_vms",lambda idx: api.power_off_vms(vm_uuids[:n]),1,mock))
+            results.append(measure("resize_disks",lambda idx: api.resize_disks(vm_uuids[:n],"60G"),1,mock))
+        if 'tasks' in workloads:
+            def task_uuids():
+                uuids=[]
+                for idx in range(n):
+                    response=api.vm_poweron(vm_uuids[idx % len(vm_uuids)])
+                    uuids.append(api.get_task_uuid(response.json()))
+                return uuids
+            uuids=task_uuids()
+            results.append(measure("wait_for_task",lambda idx: api.wait_for_task(uuids[idx]),n,mock))
+            uuids=task_uuids()
+            results.append(measure("wait_for_tasks",lambda idx: list(api.wait_for_tasks(uuids)),1,mock))
+    return results
+
+def print_results(results):
+    print(f"{'workload':<24}{'ops':>7}{'total s':>10}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'requests':>10}"
+          f"{'wire KB':>10}")
+    for result in results:
+        print(f"{result['workload']:<24}{result['ops']:>7}{result['total_s']:>10.3f}{result['ops_per_s']:>10.1f}"
+              f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['requests']:>10}{result['wire_kb']:>10.1f}")
+
+def main():
+    parser=argparse.ArgumentParser(description="NutanixAPI benchmarks against local mock Prism Central")
+    parser.add_argument('--vms',type=int,default=2000,help="VMs in mock inventory")
+    parser.add_argument('--images',type=int,default=20,help="images in mock inventory")
+    parser.add_argument('--latency',type=float,default=0,help="server response delay in seconds")
+    parser.add_argument('--page-size',type=int,default=500,help="max entities per list page")
+    parser.add_argument('--task-duration',type=float,default=0,help="seconds until task finishes")
+    parser.add_argument('--iterations',type=int,default=50,help="operations per workload")
+    parser.add_argument('--bandwidth',type=float,help="simulated link speed in bytes per second")
+    parser.add_argument('--no-gzip',action='store_true',help="do not ask for gzip compressed responses")
+    parser.add_argument('--gzip-request-min-size',type=int,help="gzip request bodies of at least this size")
+    parser.add_argument('--workloads',default="list,lookup,create,resize,power,fleet,tasks",
+                        help="comma separated: list,lookup,create,resize,power,fleet,tasks")
+    parser.add_argument('--json',help="also write results to this JSON file")
+    args=parser.parse_args()
+    results=run(args)
+    print_results(results)
+    if args.json:
+        with open(args.json,'w') as file:
+            json.dump(results,file,indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark of JSON encoding and decoding of request and response bodies.
+
+Compares old path (json.dumps(...).encode() and json.loads(bytes.decode())) with
+codecs of nutanixapi.codec on payloads taken from MockPrismCentral: one VM entity,
+vms/list page and copying of VM (deepcopy vs codec round trip, used by VMCache).
+
+    python benchmarks/bench_json.py
+    python benchmarks/bench_json.py --page-size 500 --iterations 200 --json json.json
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+
+ROOT_DIR=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0,ROOT_DIR)
+sys.path.insert(0,os.path.join(ROOT_DIR,'tests'))     #MockPrismCentral is test code, not part of package
+
+from nutanixapi.codec import CODECS, get_codec
+from mockserver import MockPrismCentral
+
+def timed(operation,iterations):
+    """
+    Returns seconds per call of operation
+    """
+    started=time.perf_counter()
+    for _ in range(iterations):
+        operation()
+    return (time.perf_counter()-started)/iterations
+
+def payloads(page_size):
+    mock=MockPrismCentral(vms=page_size)
+    status,page=mock.dispatch('POST','vms/list',{"kind":"vm","length":page_size})
+    status,vm=mock.dispatch('GET',f"vms/{page['entities'][0]['metadata']['uuid']}",None)
+    return {"vm":vm,f"vms/list {page_size}":page}
+
+def run(args):
+    codecs={}
+    for name in CODECS:
+        try:
+            codecs[name]=get_codec(name)
+        except ImportError:
+            print(f"{name}: not installed, skipped")
+    results=[]
+    for payload_name,payload in payloads(args.page_size).items():
+        body=json.dumps(payload).encode('utf-8')
+        mb=len(body)/1e6
+        variants={"old":(lambda: json.dumps(payload).encode('utf-8'),lambda: json.loads(body.decode('utf-8')),
+                         lambda: copy.deepcopy(payload))}
+        for name,codec in codecs.items():
+            variants[name]=(lambda codec=codec: codec.dumps(payload),lambda codec=codec: codec.loads(body),
+                            lambda codec=codec: codec.loads(codec.dumps(payload)))
+        for variant,(dumps,loads,copier) in variants.items():
+            dumps_s=timed(dumps,args.iterations)
+            loads_s=timed(loads,args.iterations)
+            copy_s=timed(copier,args.iterations)
+            results.append({"payload":payload_name,"codec":variant,"bytes":len(body),
+                            "dumps_ms":dumps_s*1000,"loads_ms":loads_s*1000,"copy_ms":copy_s*1000,
+                            "dumps_mb_s":mb/dumps_s,"loads_mb_s":mb/loads_s})
+    return results
+
+def main():
+    parser=argparse.ArgumentParser(description="nutanixapi JSON codec benchmark")
+    parser.add_argument('--page-size',type=int,default=500,help="VMs in list page payload")
+    parser.add_argument('--iterations',type=int,default=100)
+    parser.add_argument('--json',help="also write results to this JSON file")
+    args=parser.parse_args()
+    results=run(args)
+    print(f"{'payload':<16}{'codec':<8}{'bytes':>10}{'dumps ms':>10}{'loads ms':>10}{'copy ms':>10}"
+          f"{'dumps MB/s':>12}{'loads MB/s':>12}")
+    for result in results:
+        print(f"{result['payload']:<16}{result['codec']:<8}{result['bytes']:>10}{result['dumps_ms']:>10.3f}"
+              f"{result['loads_ms']:>10.3f}{result['copy_ms']:>10.3f}{result['dumps_mb_s']:>12.1f}"
+              f"{result['loads_mb_s']:>12.1f}")
+    if args.json:
+        with open(args.json,'w') as file:
+            json.dump(results,file,indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Startup benchmark: import time of nutanixapi.nutanixapi, NutanixAPI constructor time
+and first call time (users/me against local MockPrismCentral), each measured in
+fresh interpreter. Also checks that heavy dependencies are not imported before use.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 20 --max-import-ms 50
+
+Exits with status 1 if heavy module is imported eagerly or import is slower than --max-import-ms.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0,ROOT_DIR)
+sys.path.insert(0,os.path.join(ROOT_DIR,'tests'))     #MockPrismCentral is test code, not part of package
+
+from mockserver import MockPrismCentral
+
+HEAVY_MODULES=('requests','urllib3','jinja2','humanfriendly','aiohttp','sqlite3')
+
+PROBE='''
+import json,sys,time,logging
+started=time.perf_counter()
+import nutanixapi.nutanixapi
+imported=time.perf_counter()
+after_import=[m for m in HEAVY if m in sys.modules]
+api=nutanixapi.nutanixapi.NutanixAPI(URL,'admin','secret',None,logging.WARNING)
+constructed=time.perf_counter()
+after_constructor=[m for m in HEAVY if m in sys.modules]
+api.get_current_user_uuid()
+called=time.perf_counter()
+print(json.dumps({"import_ms":(imported-started)*1000,"constructor_ms":(constructed-imported)*1000,
+                  "first_call_ms":(called-constructed)*1000,"after_import":after_import,
+                  "after_constructor":after_constructor,
+                  "root_handlers":len(logging.root.handlers)}))
+'''
+
+def probe(url,package_dir):
+    code=f"HEAVY={HEAVY_MODULES!r}\nURL={url!r}\n"+PROBE
+    env=dict(os.environ,PYTHONPATH=package_dir+os.pathsep+os.environ.get('PYTHONPATH',''))
+    output=subprocess.run([sys.executable,"-c",code],capture_output=True,text=True,env=env,check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser=argparse.ArgumentParser(description="nutanixapi startup benchmark")
+    parser.add_argument('--runs',type=int,default=10,help="fresh interpreters to measure")
+    parser.add_argument('--max-import-ms',type=float,help="fail if median import time is higher")
+    args=parser.parse_args()
+    package_dir=ROOT_DIR
+    with MockPrismCentral(vms=0) as mock:
+        runs=[probe(mock.url,package_dir) for _ in range(args.runs)]
+    failed=False
+    for key in ('import_ms','constructor_ms','first_call_ms'):
+        values=[run[key] for run in runs]
+        print(f"{key:<16} median {statistics.median(values):8.2f}  min {min(values):8.2f}  max {max(values):8.2f}")
+    last=runs[-1]
+    print(f"heavy modules after import:      {last['after_import'] or 'none'}")
+    print(f"heavy modules after constructor: {last['after_constructor'] or 'none'}")
+    print(f"root logger handlers:            {last['root_handlers']}")
+    if last['after_import'] or last['after_constructor']:
+        print("FAIL: heavy modules imported before first use")
+        failed=True
+    if last['root_handlers']:
+        print("FAIL: root logger was configured")
+        failed=True
+    if args.max_import_ms is not None and statistics.median(run['import_ms'] for run in runs) > args.max_import_ms:
+        print(f"FAIL: median import time above {args.max_import_ms} ms")
+        failed=True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+import asyncio
+import logging
+import aiohttp      #https://docs.aiohttp.org/ , pip install nutanixapi[async]
+
+from nutanixapi.nutanixapi import NutanixAPIBase, debug_enabled
+from nutanixapi import vmspec
+
+logger=logging.getLogger(__name__)
+
+class AsyncResponse:
+    """
+    Response returned by AsyncNutanixAPI.rest_call.
+    Body is already read, so object can be used same way as requests.Response
+    in this library (status_code, content, json(), raise_for_status()),
+    JSON body is decoded on first json() call only
+    """
+    _NOT_DECODED=object()
+
+    def __init__(self,raw,content,codec):
+        self.raw=raw
+        self.status_code=raw.status
+        self.headers=raw.headers
+        self.content=content
+        self.codec=codec
+        self._json=self._NOT_DECODED
+
+    def json(self):
+        if self._json is self._NOT_DECODED:
+            self._json=self.codec.loads(self.content)
+        return self._json
+
+    def raise_for_status(self):
+        self.raw.raise_for_status()
+
+    def __repr__(self):
+        return f"<AsyncResponse [{self.status_code}]>"
+
+class AsyncNutanixAPI(NutanixAPIBase):
+    def __init__(self,url,username,password,log_file,log_level,ssl_verify=True,max_results=99999,
+                 page_size=500,pool_size=100,max_concurrency=50,connect_timeout=10,read_timeout=120,
+                 template_cache_dir=None,json_codec=None,accept_gzip=True,gzip_request_min_size=None):
+        """
+        Creates asyncio Nutanix API object
+        Args:
+            pool_size (int, optional): max number of open connections to Prism. Defaults to 100.
+            max_concurrency (int, optional): max number of requests in flight at the same time,
+                                             other calls wait on semaphore. Defaults to 50.
+            other arguments are described in NutanixAPIBase
+
+        HTTP session and semaphore are created on first call inside running event loop,
+        call await close() or use object as async context manager, closed object can not be reused:
+            async with AsyncNutanixAPI(...) as api:
+                await api.list_vms()
+        """
+        super().__init__(url,username,password,log_file,log_level,ssl_verify,max_results,
+                         page_size,connect_timeout,read_timeout,template_cache_dir,json_codec,
+                         accept_gzip,gzip_request_min_size)
+        self.pool_size=pool_size
+        self.max_concurrency=max_concurrency
+        self.semaphore=None
+        self.session=None
+        self._tasks=set()
+        self._closed=False
+
+    def _get_session(self):
+        if self._closed:
+            raise RuntimeError("AsyncNutanixAPI is closed")
+        if self.semaphore is None:
+            self.semaphore=asyncio.Semaphore(self.max_concurrency)
+        if self.session is None:
+            connector=aiohttp.TCPConnector(limit=self.pool_size,ssl=None if self.ssl_verify else False)
+            timeout=aiohttp.ClientTimeout(sock_connect=self.timeout[0],sock_read=self.timeout[1])
+            self.session=aiohttp.ClientSession(connector=connector,timeout=timeout,headers=self.headers)
+        return self.session
+
+    async def close(self):
+        """
+        Cancels outstanding background requests, closes HTTP session and all pooled connections
+        """
+        self._closed=True
+        tasks=list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks,return_exceptions=True)
+        if self.session is not None:
+            await self.session.close()
+            self.session=None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self,exc_type,exc_value,traceback):
+        await self.close()
+        return False
+
+    async def rest_call(self,method,sub_url,data=None):
+        req_url = f'{self.url}/api/nutanix/v3/{sub_url}'
+        method=method.upper()
+        if method in {"POST","PUT"}: #need data
+            body,encoded_data,extra_headers=self._encode_body(data)
+        elif method in {"GET"}: #does not need data
+            body,encoded_data,extra_headers=None,None,None
+        else:
+            raise ValueError("Unsupported method")
+        if debug_enabled():
+            logger.debug(f"rest_call {method} url: {req_url}")
+            if body is not None:
+                logger.debug(f"rest_call data: {body}")
+        session=self._get_session()
+        async with self.semaphore:
+            async with session.request(method,req_url,data=encoded_data,headers=extra_headers) as raw:
+                content=await raw.read()
+        response=AsyncResponse(raw,content,self.codec)
+        logger.debug(f"rest_call response status code {response.status_code}")
+        return response
+
+    async def _list(self,kind,filter=None,sort_attribute=None,sort_order=None):
+        data=self._list_data(kind,filter=filter,sort_attribute=sort_attribute,sort_order=sort_order)
+        response=await self.rest_call('POST',f'{kind}s/list',data)
+        if response.status_code == 200:
+            return response
+
+    async def list_clusters(self,filter=None,sort_attribute=None,sort_order=None):
+        return await self._list('cluster',filter,sort_attribute,sort_order)
+
+    async def list_images(self,filter=None,sort_attribute=None,sort_order=None):
+        return await self._list('image',filter,sort_attribute,sort_order)
+
+    async def list_subnets(self,filter=None,sort_attribute=None,sort_order=None):
+        return await self._list('subnet',filter,sort_attribute,sort_order)
+
+    async def list_projects(self,filter=None,sort_attribute=None,sort_order=None):
+        return await self._list('project',filter,sort_attribute,sort_order)
+
+    async def list_vms(self,filter=None,sort_attribute=None,sort_order=None):
+        response=await self._list('vm',filter,sort_attribute,sort_order)
+        if response is not None:
+            return response.json()
+
+    async def _lookup_uuid(self,kind,name):
+        """
+        Returns uuid of entity of kind by name, False if not found or name is not unique.
+        Only entities matching name filter are requested, exact name match is checked locally.
+        """
+        response=await self._list(kind,filter=self.name_filter(kind,name))
+        return self._get_uuid_by_name(response,name) if response is not None else False
+
+    async def get_image_uuid(self,image_name):
+        return await self._lookup_uuid('image',image_name)
+
+    async def get_subnet_uuid(self,subnet_name):
+        return await self._lookup_uuid('subnet',subnet_name)
+
+    async def get_cluster_uuid(self,cluster_name):
+        return await self._lookup_uuid('cluster',cluster_name)
+
+    async def get_project_uuid(self,project_name):
+        return await self._lookup_uuid('project',project_name)
+
+    async def _list_page(self,kind,offset,length,filter=None,sort_attribute=None,sort_order=None):
+        data=self._list_data(kind,offset,length,filter,sort_attribute,sort_order)
+        response=await self.rest_call('POST',f'{kind}s/list',data)
+        response.raise_for_status()
+        return response.json()
+
+    def _start_task(self,coro):
+        """
+        Runs coro in background task which is cancelled by close() if still running
+        """
+        task=asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _iter_entities(self,kind,page_size=None,prefetch=False,filter=None,sort_attribute=None,sort_order=None):
+        """
+        Async generator which pages through <kind>s/list endpoint, see NutanixAPI._iter_entities
+        """
+        page_size=page_size or self.page_size
+        list_args=(filter,sort_attribute,sort_order)
+        offset=0
+        next_page=None
+        try:
+            page=await self._list_page(kind,offset,page_size,*list_args)
+            while True:
+                entities=page.get('entities',[])
+                total=page.get('metadata',{}).get('total_matches',0)
+                offset+=len(entities)
+                has_next=len(entities) > 0 and offset < total
+                if has_next and prefetch:
+                    next_page=self._start_task(self._list_page(kind,offset,page_size,*list_args))
+                for entity in entities:
+                    yield entity
+                if not has_next:
+                    return
+                if next_page is not None:
+                    page=await next_page
+                    next_page=None
+                else:
+                    page=await self._list_page(kind,offset,page_size,*list_args)
+        finally:
+            #generator left early (break, exception), do not leave prefetch running
+            if next_page is not None:
+                next_page.cancel()
+                await asyncio.gather(next_page,return_exceptions=True)
+
+    def iter_vms(self,page_size=None,prefetch=False,filter=None,sort_attribute=None,sort_order=None):
+        return self._iter_entities('vm',page_size,prefetch,filter,sort_attribute,sort_order)
+
+    def iter_images(self,page_size=None,prefetch=False,filter=None,sort_attribute=None,sort_order=None):
+        return self._iter_entities('image',page_size,prefetch,filter,sort_attribute,sort_order)
+
+    def iter_subnets(self,page_size=None,prefetch=False,filter=None,sort_attribute=None,sort_order=None):
+        return self._iter_entities('subnet',page_size,prefetch,filter,sort_attribute,sort_order)
+
+    def iter_clusters(self,page_size=None,prefetch=False,filter=None,sort_attribute=None,sort_order=None):
+        return self._iter_entities('cluster',page_size,prefetch,filter,sort_attribute,sort_order)
+
+    def iter_projects(self,page_size=None,prefetch=False,filter=None,sort_attribute=None,sort_order=None):
+        return self._iter_entities('project',page_size,prefetch,filter,sort_attribute,sort_order)
+
+    async def get_current_user_uuid(self):
+        """
+        return uuid of current user in nutanix API
+        """
+        response=await self.rest_call('GET','users/me')
+        if response.status_code == 200 or response.status_code == 202:
+            result_json = response.json()
+            return result_json['metadata']['uuid']
+        return False
+
+    async def create_vm_simple(self,
+                  vm_name,
+                  vm_description,
+                  cluster_uuid,
+                  project_uuid,
+                  owner_uuid,
+                  source_image_uuid,
+                  subnet_uuid,
+                  num_threads_per_core=1,
+                  num_vcpus_per_socket=1,
+                  num_sockets=1,
+                  memory_size_mib=1024,
+                  template_dir=".",
+                  network_cfg=None
+                  ):
+        """
+        Creates basic VM in nutanix, see NutanixAPI.create_vm_simple for arguments
+        Returns:
+            AsyncResponse or False
+        """
+        data=self._vm_simple_data(vm_name,vm_description,cluster_uuid,project_uuid,owner_uuid,
+                                  source_image_uuid,subnet_uuid,num_threads_per_core,num_vcpus_per_socket,
+                                  num_sockets,memory_size_mib,template_dir,network_cfg)
+        if data is None:   #error
+            return False
+        response=await self.rest_call('POST','vms',data)
+        if response.status_code == 200 or response.status_code == 202:
+            logger.debug("create_vm_simple call success")
+            return response
+        logger.debug("create_vm_simple call failed")
+        logger.debug(repr(response))
+        return False
+
+    async def get_vm(self,vm_uuid):
+        response=await self.rest_call('GET',f'vms/{vm_uuid}')
+        result_json=None
+        if response.status_code == 200:
+            result_json = response.json()
+        return result_json
+
+    async def get_disk0(self,vm_uuid):
+        result=await self.get_vm(vm_uuid)
+        if not result:
+            return None
+        return self._find_disk0(result)
+
+    async def get_disk_address(self,vm_uuid,disk_uuid):
+        result=await self.get_vm(vm_uuid)
+        if not result:
+            return None
+        return self._find_disk_address(result,disk_uuid)
+
+    async def update_vm(self,vm_uuid,*mutations,max_conflict_retries=3):
+        """
+        Applies mutations to VM spec with one GET and one PUT, repeated on 409 conflict,
+        see NutanixAPI.update_vm
+        """
+        logger.debug(f"update_vm vm_uuid:{vm_uuid} mutations:{len(mutations)}")
+        attempt=0
+        while True:
+            vm_data_json=await self.get_vm(vm_uuid)
+            if vm_data_json is None:
+                return False
+            data=self._update_vm_data(vm_data_json,mutations)
+            response=await self.rest_call('PUT',f"vms/{vm_uuid}",data)
+            if response.status_code != 409 or attempt >= max_conflict_retries:
+                return response
+            attempt+=1
+            logger.warning(f"update_vm {vm_uuid} spec_version conflict, retry {attempt}")
+
+    async def resize_vm_disk(self,vm_uuid,disk_uuid,new_size):
+        logger.debug(f"resize_vm_disk vm_uuid:{vm_uuid} disk_uuid:{disk_uuid} new_size:{new_size}")
+        return await self.update_vm(vm_uuid,vmspec.resize_disk(disk_uuid,new_size))
+
+    async def get_task_status(self,task_uuid):
+        return await self.rest_call('GET',f"tasks/{task_uuid}")
+
+    async def _vm_set_power_state(self,vm_uuid,power_state):
+        logger.debug(f"_vm_set_power_state vm_uuid:{vm_uuid} power_state:{power_state}")
+        return await self.update_vm(vm_uuid,vmspec.set_power_state(power_state))
+
+    async def vm_poweron(self,vm_uuid):
+        return await self._vm_set_power_state(vm_uuid,'ON')
+
+    async def vm_poweroff(self,vm_uuid):
+        return await self._vm_set_power_state(vm_uuid,'OFF')
+
+    async def wait_for_task(self,task_uuid,poll_interval=1):
+        """
+        waits for Nutanix task to finish without blocking event loop
+        Args:
+        task_uuid ([string]): Nutanix tasks UUID
+        poll_interval (float, optional): seconds between status checks. Defaults to 1.
+        Returns:
+            task status  (SUCCEEDED or FAILED or smth else)
+        """
+        while True:
+            response_task=await self.get_task_status(task_uuid)
+            if response_task.status_code==200 or response_task.status_code==202:
+                task_status=response_task.json()['status']
+                logger.debug(f"Task {task_uuid} status {task_status}")
+            else:
+                return('ERROR')
+            if not ( task_status == 'PENDING' or task_status =='RUNNING'):
+                return task_status
+            await asyncio.sleep(poll_interval)
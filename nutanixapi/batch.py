@@ -0,0 +1,158 @@
+import logging
+import threading
+from concurrent.futures import Future
+
+from .codec import get_codec
+
+logger=logging.getLogger(__name__)
+
+class BatchResponse:
+    """
+    Response of one sub-request of v3 batch call.
+    Has status_code, content and json() like requests.Response,
+    so it can be used with NutanixAPI.process_response and get_task_uuid
+    """
+    def __init__(self,status_code,api_response,codec=None):
+        self.status_code=status_code
+        self.api_response=api_response
+        self.codec=codec or get_codec("json")
+
+    @property
+    def content(self):
+        return self.codec.dumps(self.api_response)
+
+    def json(self):
+        return self.api_response
+
+    def __repr__(self):
+        return f"<BatchResponse [{self.status_code}]>"
+
+class NutanixBatch:
+    """
+    Collects VM operations and sends them to Prism Central /api/nutanix/v3/batch endpoint,
+    max_batch_size operations per HTTP request.
+    Every queued operation returns concurrent.futures.Future which gets BatchResponse
+    (or exception) when batch containing it is flushed.
+
+        with api.batch() as batch:
+            futures=[batch.vm_poweron(vm_uuid) for vm_uuid in vm_uuids]
+        for future in futures:
+            print(NutanixAPI.get_task_uuid(future.result().json()))
+
+    Operations are executed NON_SEQUENTIAL, so do not queue two updates of same VM
+    into one batch - second one fails with spec_version conflict.
+    """
+    def __init__(self,api,max_batch_size=60,action_on_failure="CONTINUE"):
+        """
+        Args:
+            api (NutanixAPI): API object used for reads and sending batches
+            max_batch_size (int, optional): max operations in one batch request. Defaults to 60.
+            action_on_failure (string, optional): CONTINUE or ABORT. Defaults to CONTINUE.
+        """
+        self.api=api
+        self.max_batch_size=max_batch_size
+        self.action_on_failure=action_on_failure
+        self._queue=[]      #(api_request, future)
+        self._lock=threading.Lock()
+
+    def add(self,method,sub_url,data=None):
+        """
+        Queues raw v3 request, sends batch if queue reaches max_batch_size
+        Args:
+            method (string): POST,PUT,GET or DELETE
+            sub_url (string): url relative to /api/nutanix/v3/, like vms/<uuid>
+            data (dict, optional): request body
+        Returns:
+            Future: gets BatchResponse
+        """
+        api_request={
+                "operation":method.upper(),
+                "path_and_params":f"/api/nutanix/v3/{sub_url}"
+                }
+        if data is not None:
+            api_request["body"]=data
+        future=Future()
+        with self._lock:
+            self._queue.append((api_request,future))
+            full=len(self._queue) >= self.max_batch_size
+        if full:
+            self.flush()
+        return future
+
+    def flush(self):
+        """
+        Sends all queued operations, max_batch_size per batch request,
+        and sets result of their futures
+        """
+        with self._lock:
+            queue,self._queue=self._queue,[]
+        for idx in range(0,len(queue),self.max_batch_size):
+            self._send(queue[idx:idx+self.max_batch_size])
+
+    @staticmethod
+    def _sub_url(api_request):
+        return api_request["path_and_params"][len("/api/nutanix/v3/"):]
+
+    def _send(self,chunk):
+        for api_request,future in chunk:
+            self.api._on_vm_request(api_request["operation"],self._sub_url(api_request))
+        data={
+             "action_on_failure":self.action_on_failure,
+             "execution_order":"NON_SEQUENTIAL",
+             "api_request_list":[api_request for api_request,future in chunk],
+             "api_version":"3.0"
+             }
+        try:
+            response=self.api.rest_call('POST','batch',data)
+            if not (response.status_code == 200 or response.status_code == 202):
+                raise RuntimeError(f"batch request failed HTTP {response.status_code}: {response.content[:500]}")
+            api_response_list=response.json()['api_response_list']
+            if len(api_response_list) != len(chunk):
+                raise RuntimeError(f"batch returned {len(api_response_list)} responses for {len(chunk)} requests")
+        except Exception as ex:
+            logger.debug(f"batch failed: {repr(ex)}")
+            for api_request,future in chunk:
+                future.set_exception(ex)
+            return
+        for (api_request,future),api_response in zip(chunk,api_response_list):
+            try:
+                result=BatchResponse(int(api_response.get('status',0)),api_response.get('api_response'),self.api.codec)
+            except (AttributeError,TypeError,ValueError) as ex:   #malformed entry fails only its own future
+                future.set_exception(RuntimeError(f"invalid batch response {api_response!r:.500}: {repr(ex)}"))
+            else:
+                #same VM cache handling as for PUT sent directly
+                self.api._on_vm_response(api_request["operation"],self._sub_url(api_request),api_request.get("body"),result)
+                future.set_result(result)
+
+    def create_vm_simple(self,*args,**kwargs):
+        """
+        Queues VM creation, arguments as in NutanixAPI.create_vm_simple
+        """
+        data=self.api._vm_simple_data(*args,**kwargs)
+        if data is None:
+            raise ValueError("Unsupported network_cfg")
+        return self.add('POST','vms',data)
+
+    def resize_vm_disk(self,vm_uuid,disk_uuid,new_size):
+        """
+        Queues disk resize, VM spec is read immediately
+        """
+        data=self.api._resize_disk_data(self.api.get_vm(vm_uuid),disk_uuid,new_size)
+        return self.add('PUT',f"vms/{vm_uuid}",data)
+
+    def _vm_set_power_state(self,vm_uuid,power_state):
+        data=self.api._power_state_data(self.api.get_vm(vm_uuid),power_state)
+        return self.add('PUT',f"vms/{vm_uuid}",data)
+
+    def vm_poweron(self,vm_uuid):
+        return self._vm_set_power_state(vm_uuid,'ON')
+
+    def vm_poweroff(self,vm_uuid):
+        return self._vm_set_power_state(vm_uuid,'OFF')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,exc_type,exc_value,traceback):
+        self.flush()
+        return False
@@ -0,0 +1,207 @@
+import copy
+import logging
+import threading
+import time
+
+logger=logging.getLogger(__name__)
+
+class NameIndexCache:
+    """
+    In-memory name->uuid index per entity kind (image, subnet, cluster, project).
+    Index of a kind is built once from all entities of that kind and then
+    lookups are dictionary gets. After ttl seconds index is rebuilt,
+    by default in background thread while lookups are served from old index.
+    """
+    _DUPLICATE=object()   #marker for names used by more than one entity
+
+    def __init__(self,loader,ttl=300,background_refresh=True):
+        """
+        Args:
+            loader (callable): loader(kind) returns iterable of entities of that kind
+            ttl (float, optional): seconds after which index is refreshed. Defaults to 300.
+            background_refresh (bool, optional): refresh expired index in background thread
+                                                 and keep serving stale entries. Defaults to True.
+        """
+        self.loader=loader
+        self.ttl=ttl
+        self.background_refresh=background_refresh
+        self._indexes={}        #kind -> (built_at, {name: uuid})
+        self._lock=threading.Lock()
+        self._refreshing=set()
+        self._generation=0      #changed by invalidate, so builds started before it are not stored
+
+    def _build(self,kind):
+        logger.debug(f"NameIndexCache: building {kind} index")
+        with self._lock:
+            generation=self._generation
+        index={}
+        for entity in self.loader(kind):
+            name=entity['spec']['name']
+            index[name]=self._DUPLICATE if name in index else entity['metadata']['uuid']
+        with self._lock:
+            if generation == self._generation:
+                self._indexes[kind]=(time.monotonic(),index)
+        return index
+
+    def _background_build(self,kind):
+        try:
+            self._build(kind)
+        except Exception as ex:   #keep serving stale index
+            logger.warning(f"NameIndexCache: refresh of {kind} index failed: {repr(ex)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(kind)
+
+    def _get_index(self,kind):
+        with self._lock:
+            entry=self._indexes.get(kind)
+            if entry is None:
+                stale=None
+            elif time.monotonic()-entry[0] < self.ttl:
+                return entry[1]
+            else:
+                stale=entry[1]
+                if self.background_refresh:
+                    if kind not in self._refreshing:
+                        self._refreshing.add(kind)
+                        threading.Thread(target=self._background_build,args=(kind,),daemon=True).start()
+                    return stale
+        return self._build(kind)
+
+    def lookup(self,kind,name):
+        """
+        Returns uuid of entity of kind with name
+        Returns:
+            string: uuid or False if not found or name is not unique
+        """
+        uuid=self._get_index(kind).get(name)
+        if uuid is None or uuid is self._DUPLICATE:
+            return False
+        return uuid
+
+    def invalidate(self,kind=None):
+        """
+        Drops index of kind (or all indexes), next lookup rebuilds it
+        """
+        with self._lock:
+            self._generation+=1
+            if kind is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(kind,None)
+
+class VMCache:
+    """
+    Read cache of VMs (as returned by get_vm) keyed by VM uuid.
+    Entry is dropped when it is older than ttl, when client sends PUT/DELETE for that VM
+    (before request and again after response) or when newer metadata.spec_version of VM
+    is observed (in list responses, accepted PUTs). Observed spec_version is remembered
+    for ttl seconds, so VM fetched by GET which raced with PUT is not cached with older
+    spec_version.
+    Copies are returned, so callers may modify spec without changing cached VM.
+    """
+    def __init__(self,ttl=60,codec=None):
+        """
+        Args:
+            ttl (float, optional): seconds after which cached VM is fetched again. Defaults to 60.
+            codec (optional): JSON codec (see nutanixapi.codec), if set VMs are stored encoded
+                              and copies are made by decoding, which is faster than deepcopy.
+                              Defaults to None (deepcopy).
+        """
+        self.ttl=ttl
+        self.codec=codec
+        self._vms={}     #uuid -> (stored_at, spec_version, vm_json)
+        self._min_spec_versions={}     #uuid -> (observed_at, newest observed spec_version)
+        self._pruned_at=time.monotonic()
+        self._lock=threading.Lock()
+        self.hits=0
+        self.misses=0
+        self.invalidations=0
+
+    @staticmethod
+    def _spec_version(vm_json):
+        return vm_json.get('metadata',{}).get('spec_version')
+
+    def get(self,vm_uuid):
+        """
+        Returns copy of cached VM or None
+        """
+        with self._lock:
+            entry=self._vms.get(vm_uuid)
+            if entry is not None and time.monotonic()-entry[0] >= self.ttl:
+                del self._vms[vm_uuid]
+                entry=None
+            if entry is None:
+                self.misses+=1
+                return None
+            self.hits+=1
+            stored=entry[2]
+        return self.codec.loads(stored) if self.codec is not None else copy.deepcopy(stored)
+
+    def put(self,vm_uuid,vm_json):
+        """
+        Stores copy of VM, older spec_version does not replace newer (cached or observed) one
+        """
+        spec_version=self._spec_version(vm_json)
+        stored=self.codec.dumps(vm_json) if self.codec is not None else copy.deepcopy(vm_json)
+        with self._lock:
+            entry=self._vms.get(vm_uuid)
+            if (entry is not None and entry[1] is not None and spec_version is not None
+                    and spec_version < entry[1]):
+                return
+            now=time.monotonic()
+            observed=self._min_spec_versions.get(vm_uuid)
+            if (observed is not None and now-observed[0] < self.ttl
+                    and (spec_version is None or spec_version < observed[1])):
+                return
+            self._vms[vm_uuid]=(now,spec_version,stored)
+
+    def observe(self,vm_uuid,spec_version):
+        """
+        Drops cached VM if spec_version seen elsewhere is newer than cached one
+        and does not cache VMs older than spec_version later
+        """
+        if spec_version is None:
+            return
+        with self._lock:
+            now=time.monotonic()
+            self._prune(now)
+            observed=self._min_spec_versions.get(vm_uuid)
+            if observed is None or now-observed[0] >= self.ttl or spec_version >= observed[1]:
+                self._min_spec_versions[vm_uuid]=(now,spec_version)
+            entry=self._vms.get(vm_uuid)
+            if entry is not None and (entry[1] is None or spec_version > entry[1]):
+                del self._vms[vm_uuid]
+                self.invalidations+=1
+
+    def _prune(self,now):
+        """
+        Forgets observed spec_versions older than ttl, at most once per ttl (lock is held)
+        """
+        if now-self._pruned_at < self.ttl:
+            return
+        self._pruned_at=now
+        self._min_spec_versions={vm_uuid:observed for vm_uuid,observed in self._min_spec_versions.items()
+                                 if now-observed[0] < self.ttl}
+
+    def invalidate(self,vm_uuid=None):
+        """
+        Drops cached VM (or all VMs) and its observed spec_version
+        """
+        with self._lock:
+            if vm_uuid is None:
+                self.invalidations+=len(self._vms)
+                self._vms.clear()
+                self._min_spec_versions.clear()
+                return
+            self._min_spec_versions.pop(vm_uuid,None)
+            if self._vms.pop(vm_uuid,None) is not None:
+                self.invalidations+=1
+
+    def stats(self):
+        """
+        Returns:
+            dict: hits, misses, invalidations and number of cached VMs
+        """
+        with self._lock:
+            return {"hits":self.hits,"misses":self.misses,"invalidations":self.invalidations,"size":len(self._vms)}
@@ -0,0 +1,176 @@
+import base64
+import gzip
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+#body is stored decoded, so headers describing transfer encoding are not kept
+_DROPPED_HEADERS={'content-encoding','content-length','transfer-encoding','connection','keep-alive'}
+
+def _open(path,mode):
+    if path.endswith('.gz'):
+        return gzip.open(path,mode+'t',encoding='utf-8')
+    return open(path,mode,encoding='utf-8')
+
+def _relative_url(url):
+    parsed=urlparse(url)
+    return f"{parsed.path}?{parsed.query}" if parsed.query else parsed.path
+
+def _body_text(body):
+    if body is None:
+        return None
+    if isinstance(body,bytes):
+        return body.decode('utf-8','replace')
+    return body
+
+def _request_body(request):
+    """
+    Returns request body as text, gzip compressed body is stored decoded,
+    so cassette matches requests sent with and without compression
+    """
+    body=request.body
+    if body is not None and request.headers.get('Content-Encoding') == 'gzip':
+        body=gzip.decompress(body)
+    return _body_text(body)
+
+class Cassette:
+    """
+    Recorded Prism API interactions, one JSON line per request/response pair
+    (gzip compressed if path ends with .gz).
+
+    In record mode every request sent by NutanixAPI is appended to file as soon as
+    response is read. In replay mode responses are served from file without network:
+    requests are matched by method, url (without host) and body, identical requests
+    get recorded responses in original order and the last one is repeated when
+    client sends more of them (for example polls task longer than in recording).
+
+        with NutanixAPI(...,cassette=Cassette("run.jsonl.gz","record")) as api:
+            workload(api)
+        with NutanixAPI(...,cassette=Cassette("run.jsonl.gz","replay",realtime=True)) as api:
+            workload(api)
+    """
+    def __init__(self,path,mode="replay",realtime=False,match_body=True):
+        """
+        Args:
+            path (string): cassette file
+            mode (string, optional): record or replay. Defaults to "replay".
+            realtime (bool, optional): replay waits original response time. Defaults to False.
+            match_body (bool, optional): replay matches request body too; if False,
+                                         requests are matched by method and url only. Defaults to True.
+        """
+        if mode not in {"record","replay"}:
+            raise ValueError(f"Unsupported cassette mode {mode}")
+        self.path=path
+        self.mode=mode
+        self.realtime=realtime
+        self.match_body=match_body
+        self._lock=threading.Lock()
+        self._file=None
+        self._recorded=defaultdict(deque)   #key -> interactions not yet played
+        self._last={}                       #key -> last played interaction
+        if mode == "record":
+            self._file=_open(path,'w')
+        else:
+            with _open(path,'r') as file:
+                for line in file:
+                    if line.strip():
+                        interaction=json.loads(line)
+                        self._recorded[self._key(interaction["method"],interaction["url"],interaction["body"])].append(interaction)
+
+    def _key(self,method,url,body):
+        return (method,url,body if self.match_body else None)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file=None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,exc_type,exc_value,traceback):
+        self.close()
+        return False
+
+    def record(self,request,response,elapsed):
+        """
+        Appends request and its (already read) response to cassette
+        """
+        content=response.content or b''
+        interaction={
+            "method":request.method,
+            "url":_relative_url(request.url),
+            "body":_request_body(request),
+            "status":response.status_code,
+            "reason":response.reason,
+            "headers":{name:value for name,value in response.headers.items() if name.lower() not in _DROPPED_HEADERS},
+            "elapsed":round(elapsed,6),
+            }
+        try:
+            interaction["content"]=content.decode('utf-8')
+        except UnicodeDecodeError:
+            interaction["content_b64"]=base64.b64encode(content).decode('ascii')
+        line=json.dumps(interaction,separators=(',',':'))
+        with self._lock:
+            if self._file is None:
+                raise RuntimeError(f"cassette {self.path} is closed")
+            self._file.write(line+'\n')
+            self._file.flush()
+
+    def play(self,request):
+        """
+        Returns requests.Response recorded for request
+        Raises:
+            LookupError: if request was not recorded
+        """
+        key=self._key(request.method,_relative_url(request.url),_request_body(request))
+        with self._lock:
+            if self._recorded[key]:
+                interaction=self._recorded[key].popleft()
+                self._last[key]=interaction
+            elif key in self._last:
+                interaction=self._last[key]
+            else:
+                raise LookupError(f"cassette {self.path} has no response for {request.method} {request.url}")
+        if self.realtime:
+            time.sleep(interaction["elapsed"])
+        response=requests.Response()
+        response.status_code=interaction["status"]
+        response.reason=interaction.get("reason")
+        response.headers=CaseInsensitiveDict(interaction["headers"])
+        response.encoding=get_encoding_from_headers(response.headers)
+        if "content_b64" in interaction:
+            response._content=base64.b64decode(interaction["content_b64"])
+        else:
+            response._content=interaction["content"].encode('utf-8')
+        response._content_consumed=True
+        response.url=request.url
+        response.request=request
+        response.elapsed=timedelta(seconds=interaction["elapsed"])
+        return response
+
+class CassetteAdapter(HTTPAdapter):
+    """
+    Transport adapter which records responses to cassette or serves them from it
+    """
+    def __init__(self,cassette,**kwargs):
+        super().__init__(**kwargs)
+        self.cassette=cassette
+
+    def send(self,request,**kwargs):
+        if self.cassette.mode == "replay":
+            return self.cassette.play(request)
+        started=time.monotonic()
+        response=super().send(request,**kwargs)
+        response.content   #stream responses are read too, iter_content() then serves stored content
+        self.cassette.record(request,response,time.monotonic()-started)
+        return response
@@ -0,0 +1,61 @@
+import json
+
+class StdlibCodec:
+    """
+    JSON codec based on standard library json module, bodies are compact UTF-8 bytes
+    """
+    name="json"
+
+    def __init__(self):
+        self._encoder=json.JSONEncoder(separators=(',',':'))
+
+    def dumps(self,obj):
+        return self._encoder.encode(obj).encode('utf-8')
+
+    def loads(self,data):
+        return json.loads(data)     #accepts bytes, decodes UTF-8 in C
+
+class OrjsonCodec:
+    """
+    JSON codec based on orjson (https://github.com/ijl/orjson), which
+    serializes directly to bytes and parses bytes without intermediate str
+    """
+    name="orjson"
+
+    def __init__(self):
+        import orjson
+        self._orjson=orjson
+
+    def dumps(self,obj):
+        return self._orjson.dumps(obj)
+
+    def loads(self,data):
+        return self._orjson.loads(data)
+
+CODECS={
+    "json":StdlibCodec,
+    "orjson":OrjsonCodec,
+    }
+_AUTO_ORDER=("orjson","json")
+
+def get_codec(codec=None):
+    """
+    Returns JSON codec object with dumps(obj) -> bytes and loads(bytes or str) -> obj
+    Args:
+        codec (string or object, optional): codec name from CODECS, codec object
+                                            (returned as is) or None for fastest installed codec.
+    Raises:
+        ValueError: unknown codec name
+        ImportError: library of named codec is not installed
+    """
+    if codec is None or codec == "auto":
+        for name in _AUTO_ORDER:
+            try:
+                return CODECS[name]()
+            except ImportError:
+                continue
+    if isinstance(codec,str):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown JSON codec {codec}, available: {', '.join(CODECS)}")
+        return CODECS[codec]()
+    return codec
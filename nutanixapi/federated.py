@@ -0,0 +1,207 @@
+import logging
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+logger=logging.getLogger(__name__)
+
+FederatedItem=namedtuple('FederatedItem',['source','value'])
+
+class FederatedResult(list):
+    """
+    Merged results of all endpoints (list of FederatedItem(source,value)),
+    errors holds exception of every endpoint which failed or timed out
+    """
+    def __init__(self,items=(),errors=None):
+        super().__init__(items)
+        self.errors=errors or {}
+
+class FederatedError(Exception):
+    """
+    Raised when some endpoint failed and partial results are not allowed
+    Attributes:
+        errors (dict): source -> exception
+        result (FederatedResult): results of endpoints which succeeded
+    """
+    def __init__(self,errors,result):
+        super().__init__("failed endpoints: "+", ".join(f"{source}: {repr(ex)}" for source,ex in errors.items()))
+        self.errors=errors
+        self.result=result
+
+class FederatedNutanixAPI:
+    """
+    Runs operations against several Prism Central instances in parallel and merges
+    results tagged with source endpoint name.
+
+        apis={"riga":NutanixAPI("https://pc-riga:9440",...),
+              "tallinn":NutanixAPI("https://pc-tallinn:9440",...)}
+        with FederatedNutanixAPI(apis,timeout=30,partial=True) as fed:
+            for source,vm in fed.list_vms(filter="power_state==on"):
+                print(source,vm['spec']['name'])
+    """
+    def __init__(self,apis,timeout=None,partial=False):
+        """
+        Args:
+            apis (dict or list): source name -> NutanixAPI, list of NutanixAPI is named by url
+            timeout (float, optional): seconds to wait for each endpoint, slower endpoints are
+                                       reported as failed with TimeoutError. Defaults to None (no limit).
+            partial (bool, optional): return results of successful endpoints when some fail,
+                                      instead of raising FederatedError. Defaults to False.
+        """
+        if not isinstance(apis,dict):
+            apis={api.url:api for api in apis}
+        self.apis=apis
+        self.timeout=timeout
+        self.partial=partial
+
+    def close(self):
+        for api in self.apis.values():
+            api.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,exc_type,exc_value,traceback):
+        self.close()
+        return False
+
+    def fan_out(self,operation,sources=None,timeout=None,partial=None):
+        """
+        Calls operation(source,api) for every endpoint in parallel
+        Args:
+            operation (callable): takes source name and NutanixAPI, returns result of endpoint
+            sources (iterable, optional): endpoint names to use. Defaults to all.
+            timeout (float, optional): overrides object timeout
+            partial (bool, optional): overrides object partial
+        Returns:
+            tuple: (dict source -> result, dict source -> exception)
+        Raises:
+            FederatedError: if some endpoint failed and partial results are not allowed
+
+        Running thread can not be stopped, so operation of endpoint which timed out
+        keeps running in background until it returns (HTTP calls are bounded by
+        read_timeout of its NutanixAPI), its result is dropped.
+        """
+        timeout=self.timeout if timeout is None else timeout
+        partial=self.partial if partial is None else partial
+        apis={source:self.apis[source] for source in sources} if sources is not None else self.apis
+        results={}
+        errors={}
+        #executor is not waited on timeout, so slow endpoint does not stall others
+        executor=ThreadPoolExecutor(max_workers=max(1,len(apis)),thread_name_prefix="nutanixapi-federated")
+        try:
+            started=time.monotonic()
+            futures={executor.submit(operation,source,api):source for source,api in apis.items()}
+            done,not_done=wait(futures,timeout=timeout)
+            for future in not_done:
+                future.cancel()
+                errors[futures[future]]=TimeoutError(f"no response in {timeout}s")
+            for future in done:
+                source=futures[future]
+                try:
+                    results[source]=future.result()
+                except Exception as ex:
+                    errors[source]=ex
+            logger.debug(f"fan_out: {len(results)} ok, {len(errors)} failed in {time.monotonic()-started:.2f}s")
+        finally:
+            executor.shutdown(wait=False,cancel_futures=True)
+        if errors and not partial:
+            raise FederatedError(errors,self._merge(results,errors))
+        return results,errors
+
+    @staticmethod
+    def _merge(results,errors):
+        merged=FederatedResult(errors=errors)
+        for source,items in results.items():
+            merged.extend(FederatedItem(source,item) for item in items)
+        return merged
+
+    def _merged(self,operation,**fan_out_args):
+        results,errors=self.fan_out(operation,**fan_out_args)
+        return self._merge(results,errors)
+
+    def list_entities(self,kind,sources=None,timeout=None,partial=None,**iter_args):
+        """
+        Lists entities of kind from all endpoints
+        Args:
+            kind (string): vm, image, subnet, cluster or project
+            iter_args: arguments of NutanixAPI.iter_<kind>s (filter, sort_attribute, summary, fields, ...)
+        Returns:
+            FederatedResult: FederatedItem(source, entity) for all entities
+        """
+        def operation(source,api):
+            return list(getattr(api,f"iter_{kind}s")(**iter_args))
+        return self._merged(operation,sources=sources,timeout=timeout,partial=partial)
+
+    def list_vms(self,**kwargs):
+        return self.list_entities('vm',**kwargs)
+
+    def list_images(self,**kwargs):
+        return self.list_entities('image',**kwargs)
+
+    def list_subnets(self,**kwargs):
+        return self.list_entities('subnet',**kwargs)
+
+    def list_clusters(self,**kwargs):
+        return self.list_entities('cluster',**kwargs)
+
+    def list_projects(self,**kwargs):
+        return self.list_entities('project',**kwargs)
+
+    def lookup_uuid(self,kind,name,sources=None,timeout=None,partial=None):
+        """
+        Looks up entity of kind by name on all endpoints
+        Returns:
+            FederatedResult: FederatedItem(source, uuid) for endpoints where name was found
+        """
+        def operation(source,api):
+            uuid=api._lookup_uuid(kind,name)
+            return [uuid] if uuid else []
+        return self._merged(operation,sources=sources,timeout=timeout,partial=partial)
+
+    def get_image_uuid(self,image_name,**kwargs):
+        return self.lookup_uuid('image',image_name,**kwargs)
+
+    def get_subnet_uuid(self,subnet_name,**kwargs):
+        return self.lookup_uuid('subnet',subnet_name,**kwargs)
+
+    def get_cluster_uuid(self,cluster_name,**kwargs):
+        return self.lookup_uuid('cluster',cluster_name,**kwargs)
+
+    def get_project_uuid(self,project_name,**kwargs):
+        return self.lookup_uuid('project',project_name,**kwargs)
+
+    def get_vm(self,vm_uuid,sources=None,timeout=None,partial=None):
+        """
+        Finds VM on endpoints
+        Returns:
+            FederatedItem(source, vm) or None if VM is not found
+        """
+        def operation(source,api):
+            vm=api.get_vm(vm_uuid)
+            return [vm] if vm is not None else []
+        merged=self._merged(operation,sources=sources,timeout=timeout,partial=partial)
+        return merged[0] if merged else None
+
+    def wait_for_tasks(self,tasks,timeout=None,partial=None,**wait_args):
+        """
+        Waits for tasks of all endpoints in parallel
+        Args:
+            tasks (dict or iterable): source -> task uuids, or iterable of (source, task_uuid)
+            timeout (float, optional): overrides object timeout, also passed to wait_for_tasks
+                                       so unfinished tasks are reported as TIMEOUT
+            wait_args: other arguments of NutanixAPI.wait_for_tasks
+        Returns:
+            FederatedResult: FederatedItem(source, (task_uuid, status)) for all tasks
+        """
+        if not isinstance(tasks,dict):
+            by_source={}
+            for source,task_uuid in tasks:
+                by_source.setdefault(source,[]).append(task_uuid)
+            tasks=by_source
+        timeout=self.timeout if timeout is None else timeout
+        def operation(source,api):
+            return list(api.wait_for_tasks(tasks[source],timeout=timeout,**wait_args))
+        #endpoint gets some extra time to report TIMEOUT statuses itself
+        fan_out_timeout=None if timeout is None else timeout+max(5,timeout*0.1)
+        return self._merged(operation,sources=list(tasks),timeout=fan_out_timeout,partial=partial)
@@ -0,0 +1,199 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger=logging.getLogger(__name__)
+
+SCHEMA='''
+CREATE TABLE IF NOT EXISTS entities (
+    kind TEXT NOT NULL,
+    uuid TEXT NOT NULL,
+    name TEXT,
+    cluster_uuid TEXT,
+    project_uuid TEXT,
+    spec_version INTEGER,
+    last_update_time TEXT,
+    data TEXT NOT NULL,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (kind, uuid)
+);
+CREATE INDEX IF NOT EXISTS entities_name ON entities (kind, name);
+CREATE INDEX IF NOT EXISTS entities_uuid ON entities (uuid);
+CREATE INDEX IF NOT EXISTS entities_cluster ON entities (kind, cluster_uuid);
+CREATE INDEX IF NOT EXISTS entities_project ON entities (kind, project_uuid);
+CREATE TABLE IF NOT EXISTS sync_state (
+    kind TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL,
+    last_update_time TEXT
+);
+'''
+
+class Inventory:
+    """
+    Local SQLite mirror of Prism Central entities (vm, image, subnet, cluster, project).
+    Filled with sync(api), lookups are served from local file with indexes on
+    name, uuid, cluster and project.
+
+        inventory=Inventory("inventory.db")
+        inventory.sync(api)
+        inventory.get_uuid('image','centos8')
+    """
+    KINDS=('vm','image','subnet','cluster','project')
+
+    def __init__(self,path=":memory:"):
+        """
+        Args:
+            path (string, optional): SQLite database file. Defaults to ":memory:".
+        """
+        self.path=path
+        self.conn=sqlite3.connect(path,check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self._lock=threading.Lock()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,exc_type,exc_value,traceback):
+        self.close()
+        return False
+
+    @staticmethod
+    def _row(kind,entity,synced_at):
+        metadata=entity.get('metadata',{})
+        spec=entity.get('spec') or {}
+        status=entity.get('status') or {}
+        cluster_reference=spec.get('cluster_reference') or status.get('cluster_reference') or {}
+        return (kind,
+                metadata.get('uuid'),
+                spec.get('name',status.get('name')),
+                cluster_reference.get('uuid'),
+                (metadata.get('project_reference') or {}).get('uuid'),
+                metadata.get('spec_version'),
+                metadata.get('last_update_time'),
+                json.dumps(entity),
+                synced_at)
+
+    def sync(self,api,kinds=None,full=False):
+        """
+        Copies entities from Prism Central to inventory.
+        Incremental sync (default) requests entities sorted by last_update_time descending
+        and stops at first entity older than previous sync, if server confirms sorting
+        (metadata.sort_attribute/sort_order of list response). Otherwise all entities are read
+        and only changed ones (different spec_version or last_update_time) are written.
+        Incremental sync does not see deleted entities, full sync replaces all entities of kind.
+
+        Args:
+            api (NutanixAPI): API object
+            kinds (iterable, optional): kinds to sync. Defaults to all KINDS.
+            full (bool, optional): read all entities and drop deleted ones. Defaults to False.
+        Returns:
+            dict: kind -> number of inserted or updated entities
+        """
+        changed={}
+        for kind in kinds or self.KINDS:
+            changed[kind]=self._sync_kind(api,kind,full)
+        return changed
+
+    @staticmethod
+    def _iter_for_sync(api,kind,by_update_time):
+        """
+        Yields (entity, sorted) for all entities of kind, sorted is True if server
+        confirmed that entities come sorted by last_update_time descending
+        """
+        sort_args={'sort_attribute':'last_update_time','sort_order':'DESCENDING'} if by_update_time else {}
+        offset=0
+        while True:
+            page=api._list_page(kind,offset,api.page_size,**sort_args)
+            metadata=page.get('metadata',{})
+            confirmed=(by_update_time and metadata.get('sort_attribute') == 'last_update_time'
+                       and str(metadata.get('sort_order','')).upper() == 'DESCENDING')
+            entities=page.get('entities',[])
+            for entity in entities:
+                yield entity,confirmed
+            offset+=len(entities)
+            if not entities or offset >= metadata.get('total_matches',0):
+                return
+
+    def _sync_kind(self,api,kind,full):
+        synced_at=time.time()
+        with self._lock:
+            row=self.conn.execute("SELECT last_update_time FROM sync_state WHERE kind=?",(kind,)).fetchone()
+            known={uuid:(spec_version,update_time) for uuid,spec_version,update_time in self.conn.execute(
+                "SELECT uuid,spec_version,last_update_time FROM entities WHERE kind=?",(kind,))}
+        watermark=None if full or row is None else row[0]
+        rows=[]
+        seen=set()
+        newest=watermark
+        for entity,confirmed_sorted in self._iter_for_sync(api,kind,watermark is not None):
+            metadata=entity.get('metadata',{})
+            uuid=metadata.get('uuid')
+            update_time=metadata.get('last_update_time')
+            seen.add(uuid)
+            if update_time is not None and (newest is None or update_time > newest):
+                newest=update_time
+            if confirmed_sorted and update_time is not None and update_time < watermark:
+                break
+            #status only changes (power state, IPs) keep spec_version but move last_update_time
+            if update_time is None or known.get(uuid) != (metadata.get('spec_version'),update_time):
+                rows.append(self._row(kind,entity,synced_at))
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO entities VALUES (?,?,?,?,?,?,?,?,?)",rows)
+            if full:
+                deleted=[(kind,uuid) for uuid in known if uuid not in seen]
+                self.conn.executemany("DELETE FROM entities WHERE kind=? AND uuid=?",deleted)
+            self.conn.execute("INSERT OR REPLACE INTO sync_state VALUES (?,?,?)",(kind,synced_at,newest))
+        logger.debug(f"Inventory: synced {kind}, {len(rows)} changed")
+        return len(rows)
+
+    def last_sync(self,kind):
+        """
+        Returns time.time() of last sync of kind, None if kind was never synced
+        """
+        with self._lock:
+            row=self.conn.execute("SELECT synced_at FROM sync_state WHERE kind=?",(kind,)).fetchone()
+        return row[0] if row else None
+
+    def is_fresh(self,kind,max_age):
+        """
+        True if kind was synced not more than max_age seconds ago
+        """
+        synced_at=self.last_sync(kind)
+        return synced_at is not None and time.time()-synced_at <= max_age
+
+    def get_uuid(self,kind,name):
+        """
+        Returns uuid of entity of kind by name, False if not found or name is not unique
+        """
+        with self._lock:
+            rows=self.conn.execute("SELECT uuid FROM entities WHERE kind=? AND name=? LIMIT 2",(kind,name)).fetchall()
+        return rows[0][0] if len(rows) == 1 else False
+
+    def get(self,kind,uuid):
+        """
+        Returns entity dictionary as stored at last sync, None if not found
+        """
+        with self._lock:
+            row=self.conn.execute("SELECT data FROM entities WHERE kind=? AND uuid=?",(kind,uuid)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find(self,kind,name=None,cluster_uuid=None,project_uuid=None):
+        """
+        Returns list of entity dictionaries of kind matching all given criteria
+        """
+        query="SELECT data FROM entities WHERE kind=?"
+        args=[kind]
+        for column,value in (('name',name),('cluster_uuid',cluster_uuid),('project_uuid',project_uuid)):
+            if value is not None:
+                query+=f" AND {column}=?"
+                args.append(value)
+        with self._lock:
+            rows=self.conn.execute(query,args).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def find_vms(self,name=None,cluster_uuid=None,project_uuid=None):
+        return self.find('vm',name,cluster_uuid,project_uuid)
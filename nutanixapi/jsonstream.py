@@ -0,0 +1,108 @@
+import codecs
+import json
+
+_decoder=json.JSONDecoder()
+_WHITESPACE=' \t\n\r'
+
+class _ChunkReader:
+    """
+    Text buffer filled from iterable of byte chunks on demand,
+    consumed part of buffer is dropped when next chunk is read
+    """
+    def __init__(self,chunks):
+        self.chunks=iter(chunks)
+        self.utf8=codecs.getincrementaldecoder('utf-8')()
+        self.buf=''
+        self.pos=0
+        self.eof=False
+
+    def more(self):
+        """
+        Appends next chunk to buffer, returns False at end of stream
+        """
+        if self.eof:
+            return False
+        self.buf=self.buf[self.pos:]
+        self.pos=0
+        for chunk in self.chunks:
+            if chunk:
+                self.buf+=self.utf8.decode(chunk)
+                return True
+        self.buf+=self.utf8.decode(b'',final=True)
+        self.eof=True
+        return False
+
+    def peek(self):
+        """
+        Skips whitespace and returns next character
+        """
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos+=1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.more():
+                raise json.JSONDecodeError("Unexpected end of data",self.buf,self.pos)
+
+    def expect(self,chars):
+        """
+        Consumes next non whitespace character, which must be one of chars
+        """
+        char=self.peek()
+        if char not in chars:
+            raise json.JSONDecodeError(f"Expecting one of {chars!r}",self.buf,self.pos)
+        self.pos+=1
+        return char
+
+    def value(self):
+        """
+        Decodes next JSON value, reading more chunks until it is complete
+        """
+        self.peek()
+        while True:
+            try:
+                obj,end=_decoder.raw_decode(self.buf,self.pos)
+                #value ending exactly at buffer end may be truncated number
+                if end < len(self.buf) or self.eof:
+                    self.pos=end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.more()
+
+def iter_array_items(chunks,key,members=None):
+    """
+    Incrementally parses JSON object from byte chunks and yields items of array
+    stored under top level key one by one, so only one item is kept in memory.
+    Example: iter_array_items(response.iter_content(65536),'entities')
+
+    Args:
+        chunks (iterable): bytes chunks of JSON document
+        key (string): top level key of array
+        members (dict, optional): other top level members are stored in this dictionary
+    Raises:
+        json.JSONDecodeError: if document is not valid JSON object
+    """
+    reader=_ChunkReader(chunks)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        name=reader.value()
+        reader.expect(':')
+        if name == key and reader.peek() == '[':
+            reader.pos+=1
+            if reader.peek() == ']':
+                reader.pos+=1
+            else:
+                while True:
+                    yield reader.value()
+                    if reader.expect(',]') == ']':
+                        break
+        else:
+            value=reader.value()
+            if members is not None:
+                members[name]=value
+        if reader.expect(',}') == '}':
+            return
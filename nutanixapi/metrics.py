@@ -0,0 +1,177 @@
+import re
+import threading
+
+UUID_RE=re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}')
+DEFAULT_BUCKETS=(0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30,60,120,300,600)
+
+def endpoint_name(sub_url):
+    """
+    Returns endpoint with uuids replaced, like vms/{uuid}, so metrics are grouped per endpoint
+    """
+    return UUID_RE.sub('{uuid}',sub_url.split('?')[0])
+
+class Histogram:
+    """
+    Cumulative histogram with fixed bucket upper bounds (Prometheus style)
+    """
+    def __init__(self,buckets=DEFAULT_BUCKETS):
+        self.buckets=tuple(buckets)
+        self.counts=[0]*len(self.buckets)
+        self.count=0
+        self.sum=0.0
+
+    def observe(self,value):
+        self.count+=1
+        self.sum+=value
+        for idx,bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[idx]+=1
+
+class Metrics:
+    """
+    Collects per method/endpoint statistics of NutanixAPI calls:
+    request counts by status code, latency histograms, request/response bytes
+    (JSON size and size on wire, which is smaller for gzip compressed bodies),
+    retries and time spent waiting for tasks.
+    Hooks are called around every rest_call:
+        start(method,endpoint) and end(info) where info is dictionary
+        {method, endpoint, status, duration, request_bytes, response_bytes, retries,
+         request_wire_bytes, response_wire_bytes}
+    Body of streamed response is read after end hook, its size (0 in info) is added
+    to byte counters by add_response_bytes.
+
+        metrics=Metrics()
+        api=NutanixAPI(...,metrics=metrics)
+        ...
+        print(metrics.to_prometheus())
+    """
+    def __init__(self,buckets=DEFAULT_BUCKETS,prefix="nutanixapi"):
+        self.buckets=buckets
+        self.prefix=prefix
+        self._lock=threading.Lock()
+        self.requests={}          #(method,endpoint,status) -> count
+        self.latency={}           #(method,endpoint) -> Histogram
+        self.request_bytes={}     #(method,endpoint) -> bytes
+        self.response_bytes={}    #(method,endpoint) -> bytes
+        self.request_wire_bytes={}    #(method,endpoint) -> bytes sent
+        self.response_wire_bytes={}   #(method,endpoint) -> bytes received
+        self.retries={}           #(method,endpoint) -> count
+        self.task_wait={}         #status -> Histogram
+        self.start_hooks=[]
+        self.end_hooks=[]
+
+    def add_hooks(self,start=None,end=None):
+        """
+        Registers callbacks called before and after each request
+        """
+        if start is not None:
+            self.start_hooks.append(start)
+        if end is not None:
+            self.end_hooks.append(end)
+
+    def request_started(self,method,endpoint):
+        for hook in self.start_hooks:
+            hook(method,endpoint)
+
+    def request_finished(self,method,endpoint,status,duration,request_bytes=0,response_bytes=0,retries=0,
+                         request_wire_bytes=None,response_wire_bytes=None):
+        """
+        Records finished request, status is HTTP status code or "error".
+        Wire bytes default to request_bytes/response_bytes (body not compressed).
+        """
+        key=(method,endpoint)
+        if request_wire_bytes is None:
+            request_wire_bytes=request_bytes
+        if response_wire_bytes is None:
+            response_wire_bytes=response_bytes
+        with self._lock:
+            status_key=(method,endpoint,str(status))
+            self.requests[status_key]=self.requests.get(status_key,0)+1
+            if key not in self.latency:
+                self.latency[key]=Histogram(self.buckets)
+            self.latency[key].observe(duration)
+            self.request_bytes[key]=self.request_bytes.get(key,0)+request_bytes
+            self.response_bytes[key]=self.response_bytes.get(key,0)+response_bytes
+            self.request_wire_bytes[key]=self.request_wire_bytes.get(key,0)+request_wire_bytes
+            self.response_wire_bytes[key]=self.response_wire_bytes.get(key,0)+response_wire_bytes
+            self.retries[key]=self.retries.get(key,0)+retries
+        if self.end_hooks:
+            info={"method":method,"endpoint":endpoint,"status":status,"duration":duration,
+                  "request_bytes":request_bytes,"response_bytes":response_bytes,"retries":retries,
+                  "request_wire_bytes":request_wire_bytes,"response_wire_bytes":response_wire_bytes}
+            for hook in self.end_hooks:
+                hook(info)
+
+    def add_response_bytes(self,method,endpoint,response_bytes,response_wire_bytes):
+        """
+        Records size of response body read after request_finished (streamed responses)
+        """
+        key=(method,endpoint)
+        with self._lock:
+            self.response_bytes[key]=self.response_bytes.get(key,0)+response_bytes
+            self.response_wire_bytes[key]=self.response_wire_bytes.get(key,0)+response_wire_bytes
+
+    def task_finished(self,status,duration):
+        """
+        Records time spent waiting for task with final status
+        """
+        with self._lock:
+            if status not in self.task_wait:
+                self.task_wait[status]=Histogram(self.buckets)
+            self.task_wait[status].observe(duration)
+
+    def transfer_stats(self):
+        """
+        Returns:
+            dict: total request/response bytes (JSON), wire bytes and bytes saved by compression
+        """
+        with self._lock:
+            stats={"request_bytes":sum(self.request_bytes.values()),
+                   "request_wire_bytes":sum(self.request_wire_bytes.values()),
+                   "response_bytes":sum(self.response_bytes.values()),
+                   "response_wire_bytes":sum(self.response_wire_bytes.values())}
+        stats["saved_bytes"]=(stats["request_bytes"]-stats["request_wire_bytes"]+
+                              stats["response_bytes"]-stats["response_wire_bytes"])
+        return stats
+
+    @staticmethod
+    def _labels(**labels):
+        return '{'+','.join(f'{name}="{value}"' for name,value in labels.items())+'}'
+
+    def _histogram_lines(self,name,labels,histogram):
+        lines=[]
+        for bound,count in zip(histogram.buckets,histogram.counts):
+            lines.append(f"{name}_bucket{self._labels(**labels,le=bound)} {count}")
+        lines.append(f"{name}_bucket{self._labels(**labels,le='+Inf')} {histogram.count}")
+        lines.append(f"{name}_sum{self._labels(**labels)} {histogram.sum}")
+        lines.append(f"{name}_count{self._labels(**labels)} {histogram.count}")
+        return lines
+
+    def to_prometheus(self):
+        """
+        Returns all metrics in Prometheus text exposition format
+        """
+        p=self.prefix
+        lines=[]
+        with self._lock:
+            lines+=[f"# HELP {p}_requests_total Requests sent to Prism Central",f"# TYPE {p}_requests_total counter"]
+            for (method,endpoint,status),count in sorted(self.requests.items()):
+                lines.append(f"{p}_requests_total{self._labels(method=method,endpoint=endpoint,status=status)} {count}")
+            lines+=[f"# HELP {p}_request_duration_seconds Request latency including retries",
+                    f"# TYPE {p}_request_duration_seconds histogram"]
+            for (method,endpoint),histogram in sorted(self.latency.items()):
+                lines+=self._histogram_lines(f"{p}_request_duration_seconds",{"method":method,"endpoint":endpoint},histogram)
+            for metric,values,help_text in ((f"{p}_request_bytes_total",self.request_bytes,"Request body bytes"),
+                                            (f"{p}_response_bytes_total",self.response_bytes,"Response body bytes"),
+                                            (f"{p}_request_wire_bytes_total",self.request_wire_bytes,
+                                             "Request body bytes sent (after compression)"),
+                                            (f"{p}_response_wire_bytes_total",self.response_wire_bytes,
+                                             "Response body bytes received (before decompression)"),
+                                            (f"{p}_retries_total",self.retries,"Retried requests")):
+                lines+=[f"# HELP {metric} {help_text}",f"# TYPE {metric} counter"]
+                for (method,endpoint),value in sorted(values.items()):
+                    lines.append(f"{metric}{self._labels(method=method,endpoint=endpoint)} {value}")
+            lines+=[f"# HELP {p}_task_wait_seconds Time spent waiting for tasks",f"# TYPE {p}_task_wait_seconds histogram"]
+            for status,histogram in sorted(self.task_wait.items()):
+                lines+=self._histogram_lines(f"{p}_task_wait_seconds",{"status":status},histogram)
+        return '\n'.join(lines)+'\n'
@@ -0,0 +1,149 @@
+def _get(entity,*paths):
+    """
+    Returns value of first existing dotted path in entity, None if no path exists
+    """
+    for path in paths:
+        value=entity
+        for key in path.split('.'):
+            if not isinstance(value,dict) or key not in value:
+                break
+            value=value[key]
+        else:
+            return value
+    return None
+
+def _vm_vcpus(entity):
+    sockets=_get(entity,'status.resources.num_sockets','spec.resources.num_sockets')
+    per_socket=_get(entity,'status.resources.num_vcpus_per_socket','spec.resources.num_vcpus_per_socket')
+    if sockets is None or per_socket is None:
+        return None
+    return sockets*per_socket
+
+def _vm_disk_sizes(entity):
+    disk_list=_get(entity,'status.resources.disk_list','spec.resources.disk_list') or []
+    return tuple(disk.get('disk_size_bytes') for disk in disk_list
+                 if disk.get('device_properties',{}).get('device_type') == 'DISK')
+
+class EntitySummary:
+    """
+    Base of compact records made from v3 entities.
+    Subclass defines FIELDS: field name -> extractor (dotted path or tuple of paths
+    tried in order, or function taking entity). Only fields are stored (in __slots__),
+    so records use small fraction of memory of entity dictionaries.
+    """
+    __slots__=()
+    FIELDS={}
+    _projections={}
+
+    def __init__(self,*values):
+        for name,value in zip(self.__slots__,values):
+            setattr(self,name,value)
+
+    @classmethod
+    def from_entity(cls,entity):
+        values=[]
+        for name in cls.__slots__:
+            extractor=cls.FIELDS[name]
+            if callable(extractor):
+                values.append(extractor(entity))
+            elif isinstance(extractor,tuple):
+                values.append(_get(entity,*extractor))
+            else:
+                values.append(_get(entity,extractor))
+        return cls(*values)
+
+    @classmethod
+    def projection(cls,fields=None):
+        """
+        Returns record class with only given fields (all FIELDS if fields is None),
+        classes are created once per field set. Projected class derives from
+        EntitySummary directly (it is not subclass of cls), so its records store
+        only requested fields, it is named like VMSummary[name,uuid].
+        """
+        if fields is None:
+            return cls
+        fields=tuple(fields)
+        unknown=[name for name in fields if name not in cls.FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown {cls.__name__} fields: {unknown}")
+        key=(cls,fields)
+        projected=EntitySummary._projections.get(key)
+        if projected is None:
+            projected=type(f"{cls.__name__}[{','.join(fields)}]",(EntitySummary,),{'__slots__':fields,'FIELDS':cls.FIELDS})
+            EntitySummary._projections[key]=projected
+        return projected
+
+    def as_dict(self):
+        return {name:getattr(self,name) for name in self.__slots__}
+
+    def __eq__(self,other):
+        return type(self) is type(other) and self.as_dict() == other.as_dict()
+
+    def __hash__(self):
+        return hash((type(self),tuple(self.as_dict().items())))
+
+    def __repr__(self):
+        values=', '.join(f"{name}={getattr(self,name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+class VMSummary(EntitySummary):
+    FIELDS={
+        'name':('spec.name','status.name'),
+        'uuid':'metadata.uuid',
+        'power_state':('status.resources.power_state','spec.resources.power_state'),
+        'num_vcpus':_vm_vcpus,
+        'num_sockets':('status.resources.num_sockets','spec.resources.num_sockets'),
+        'num_vcpus_per_socket':('status.resources.num_vcpus_per_socket','spec.resources.num_vcpus_per_socket'),
+        'memory_size_mib':('status.resources.memory_size_mib','spec.resources.memory_size_mib'),
+        'disk_sizes_bytes':_vm_disk_sizes,
+        'cluster_uuid':('status.cluster_reference.uuid','spec.cluster_reference.uuid'),
+        'project_uuid':'metadata.project_reference.uuid',
+        'spec_version':'metadata.spec_version',
+        }
+    __slots__=tuple(FIELDS)
+
+class ImageSummary(EntitySummary):
+    FIELDS={
+        'name':('spec.name','status.name'),
+        'uuid':'metadata.uuid',
+        'image_type':('status.resources.image_type','spec.resources.image_type'),
+        'size_bytes':('status.resources.size_bytes','spec.resources.size_bytes'),
+        'spec_version':'metadata.spec_version',
+        }
+    __slots__=tuple(FIELDS)
+
+class SubnetSummary(EntitySummary):
+    FIELDS={
+        'name':('spec.name','status.name'),
+        'uuid':'metadata.uuid',
+        'subnet_type':('status.resources.subnet_type','spec.resources.subnet_type'),
+        'vlan_id':('status.resources.vlan_id','spec.resources.vlan_id'),
+        'cluster_uuid':('status.cluster_reference.uuid','spec.cluster_reference.uuid'),
+        'is_managed':lambda entity: _get(entity,'status.resources.ip_config','spec.resources.ip_config') is not None,
+        'spec_version':'metadata.spec_version',
+        }
+    __slots__=tuple(FIELDS)
+
+class ClusterSummary(EntitySummary):
+    FIELDS={
+        'name':('spec.name','status.name'),
+        'uuid':'metadata.uuid',
+        'spec_version':'metadata.spec_version',
+        }
+    __slots__=tuple(FIELDS)
+
+class ProjectSummary(EntitySummary):
+    FIELDS={
+        'name':('spec.name','status.name'),
+        'uuid':'metadata.uuid',
+        'spec_version':'metadata.spec_version',
+        }
+    __slots__=tuple(FIELDS)
+
+SUMMARY_TYPES={
+    'vm':VMSummary,
+    'image':ImageSummary,
+    'subnet':SubnetSummary,
+    'cluster':ClusterSummary,
+    'project':ProjectSummary,
+    }
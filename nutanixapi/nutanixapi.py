@@ -1,89 +1,169 @@
+import gzip
 import json
 import os
-import urllib3
 import time
-urllib3.disable_warnings()  #for now
-import requests     #https://requests.readthedocs.io/en/master/
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from base64 import b64encode
 import logging
-from jinja2 import Template 
-import humanfriendly
+from concurrent.futures import ThreadPoolExecutor
+#requests (https://requests.readthedocs.io/en/master/) is imported when first HTTP session is created,
+#jinja2 when first template is rendered and humanfriendly when first size is parsed
+
+from nutanixapi.cache import NameIndexCache, VMCache
+from nutanixapi.ratelimit import TokenBucket, AdaptiveConcurrency
+from nutanixapi.batch import NutanixBatch
+from nutanixapi.jsonstream import iter_array_items
+from nutanixapi.models import SUMMARY_TYPES
+from nutanixapi.metrics import endpoint_name
+from nutanixapi import vmspec
+from nutanixapi.tasks import TaskPoller, TaskFuture, TASK_IN_PROGRESS
+from nutanixapi.codec import get_codec
+
+STREAM_CHUNK_SIZE=65536
+RETRY_STATUS={429,500,502,503,504}
+OVERLOAD_STATUS={429,503}
+FIQL_RESERVED=set('%,;()=!<>~"\'')
+GZIP_LEVEL=6
 
 from urllib.parse import urlparse
 from urllib.parse import urlencode
 
-class NutanixAPI:
-    def __init__(self,url,username,password,log_file,log_level,ssl_verify=True,max_results=99999):
+logger=logging.getLogger(__name__)
+LOG_FORMAT='%(asctime)s %(message)s'
+
+def debug_enabled():
+    """
+    True if DEBUG messages are logged, used to skip building expensive debug messages
+    """
+    return logger.isEnabledFor(logging.DEBUG)
+
+def configure_logging(log_file=None,log_level=None):
+    """
+    Configures "nutanixapi" package logger only, root logger is not changed.
+    Args:
+        log_file (string, optional): file where package messages are written (once per file).
+                                     Defaults to None (messages propagate to root logger handlers).
+        log_level (int, optional): level of package logger. Defaults to None (not changed).
+    """
+    package_logger=logging.getLogger('nutanixapi')
+    if log_level is not None:
+        package_logger.setLevel(log_level)
+    if log_file:
+        path=os.path.abspath(log_file)
+        if not any(isinstance(handler,logging.FileHandler) and handler.baseFilename == path
+                   for handler in package_logger.handlers):
+            handler=logging.FileHandler(path)
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
+            package_logger.addHandler(handler)
+
+class ApiResponse:
+    """
+    Response returned by NutanixAPI.rest_call.
+    Wraps requests.Response, JSON body is decoded (by codec, from bytes) on first json() call only and
+    same object is returned later (do not modify it if response is used again).
+    Other attributes (text, headers, reason, ...) are taken from requests.Response.
+    """
+    _NOT_DECODED=object()
+
+    def __init__(self,response,codec):
+        self._response=response
+        self.status_code=response.status_code
+        self.codec=codec
+        self._json=self._NOT_DECODED
+
+    @property
+    def content(self):
+        return self._response.content
+
+    def json(self):
+        if self._json is self._NOT_DECODED:
+            self._json=self.codec.loads(self._response.content)
+        return self._json
+
+    def __getattr__(self,name):
+        return getattr(self._response,name)
+
+    def __repr__(self):
+        return f"<ApiResponse [{self.status_code}]>"
+
+class NutanixAPIBase:
+    """
+    Common part of synchronous NutanixAPI and asyncio AsyncNutanixAPI clients:
+    configuration, request headers, cloud-init templates and request data builders.
+    Does not make any network calls.
+    """
+    def __init__(self,url,username,password,log_file,log_level,ssl_verify=True,max_results=99999,
+                 page_size=500,connect_timeout=10,read_timeout=120,template_cache_dir=None,json_codec=None,
+                 accept_gzip=True,gzip_request_min_size=None):
         """
-        Creates Nutanix API object
+        Stores Nutanix API connection options
         Args:
             url ([string]): URL of API en dpoint
             username (string): username
             password ([string]): password
-            log_file ([string]): logfile , where operations is logged
-            log_level ([type]): logging.DEBUG/logging.WARNING/logging.INFO, 
+            log_file ([string]): logfile , where operations is logged (see configure_logging)
+            log_level ([type]): logging.DEBUG/logging.WARNING/logging.INFO, level of "nutanixapi" logger
             ssl_verify (bool, optional): SSL verification. Defaults to True.   #not implemented properly
             max_results (int, optional): maximum number of returned results. Defaults to 99999.
+            page_size (int, optional): number of entities requested per page by iter_* methods. Defaults to 500.
+            connect_timeout (float, optional): TCP/TLS connect timeout in seconds. Defaults to 10.
+            read_timeout (float, optional): timeout waiting for response in seconds. Defaults to 120.
+            template_cache_dir (string, optional): directory for on-disk cache of compiled
+                                                   cloud-init templates. Defaults to None.
+            json_codec (string or object, optional): JSON codec of request and response bodies,
+                                                     "json", "orjson" or codec object, see nutanixapi.codec.
+                                                     Defaults to None (orjson if installed, else json).
+            accept_gzip (bool, optional): ask for gzip compressed responses (Accept-Encoding: gzip),
+                                          they are decoded transparently. Defaults to True.
+            gzip_request_min_size (int, optional): request bodies of at least this many bytes are sent
+                                                   gzip compressed (Content-Encoding: gzip), Prism must
+                                                   accept it. Defaults to None (not compressed).
         """
         # Initialise the options.
         self.url = url
         self.username = username.replace('\n', '')
         self.password = password.replace('\n', '')
         self.ssl_verify=ssl_verify
-        self.max_results=99999
-        logging.basicConfig(filename=log_file,level=log_level,format='%(asctime)s %(message)s')
-        if(self.ssl_verify==True):
-            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)      
-        
-    # Create a REST client session.
-    def rest_call(self,method,sub_url,data=None):
-        req_url = f'{self.url}/api/nutanix/v3/{sub_url}'            
-        #request_url = 'https://10.99.134.250:9440/api/nutanix/v3/vms/list'
-        try:
-            encoded_credentials = b64encode(bytes(f'{self.username}:{self.password}',encoding='ascii')).decode('ascii')
-            headers={}
-            headers["Authorization"]=f'Basic {encoded_credentials}'
-            headers["Content-Type"]="application/json"
-            headers["Accept"]="application/json"
-            headers["cache-control"]="no-cache"
-            if method.upper() in {"POST"}: #need data
-                encoded_data=json.dumps(data).encode('utf-8')
-                logging.debug("rest_call url:")
-                logging.debug(req_url)
-                logging.debug("rest_call headers:")
-                logging.debug(headers)
-                logging.debug("rest_call data:")
-                logging.debug(encoded_data)
-                response = requests.request(method.upper(), req_url, data=encoded_data, headers=headers,verify=self.ssl_verify)
-                logging.debug(f"rest_call response status code {response.status_code}")
-                logging.debug("rest_call response:")
-                logging.debug(response.json())
-            elif method.upper() in {"GET"}: #does not need data
-                logging.debug("rest_call GET url:")
-                logging.debug(req_url)
-                logging.debug("rest_call headers:")
-                logging.debug(headers)
-                response = requests.request(method.upper(),req_url,headers=headers,verify=self.ssl_verify)
-                logging.debug(f"rest_call response status code {response.status_code}")
-                logging.debug("rest_call response:")
-                logging.debug(response.json())
-            elif method.upper() in {"PUT"}: #does not need data
-                encoded_data=json.dumps(data).encode('utf-8')
-                logging.debug("rest_call PUT url:")
-                logging.debug(req_url)
-                logging.debug("rest_call headers:")
-                logging.debug(headers)
-                logging.debug("rest_call data:")
-                logging.debug(encoded_data)
-                response = requests.request(method.upper(), req_url, data=encoded_data, headers=headers,verify=self.ssl_verify)
-                logging.debug(f"rest_call response status code {response.status_code}")
-                logging.debug("rest_call response:")
-                logging.debug(response.json())
-            else:
-                raise ValueError("Unsupported method") #will implement later
-        except BaseException as ex:
-             print(repr(ex))
-        return response
+        self.max_results=max_results
+        self.page_size=page_size
+        configure_logging(log_file,log_level)
+        self.codec=get_codec(json_codec)
+        self.timeout=(connect_timeout,read_timeout)
+        encoded_credentials = b64encode(bytes(f'{self.username}:{self.password}',encoding='ascii')).decode('ascii')
+        self.headers={}
+        self.headers["Authorization"]=f'Basic {encoded_credentials}'
+        self.headers["Content-Type"]="application/json"
+        self.headers["Accept"]="application/json"
+        self.headers["cache-control"]="no-cache"
+        self.headers["Accept-Encoding"]="gzip" if accept_gzip else "identity"
+        self.gzip_request_min_size=gzip_request_min_size
+        self.template_cache_dir=template_cache_dir
+        self._templates={}      #template_dir -> CloudInitTemplates
+
+    def _encode_body(self,data):
+        """
+        Encodes request body, gzip compressed if it has at least gzip_request_min_size bytes
+        Returns:
+            tuple: (JSON bytes, bytes to send, extra request headers or None)
+        """
+        body=self.codec.dumps(data)
+        if self.gzip_request_min_size is None or len(body) < self.gzip_request_min_size:
+            return body,body,None
+        #mtime=0 keeps output deterministic, so equal requests have equal bodies (cassette matching)
+        return body,gzip.compress(body,compresslevel=GZIP_LEVEL,mtime=0),{"Content-Encoding":"gzip"}
+
+    def _get_templates(self,template_dir):
+        """
+        Returns CloudInitTemplates for template_dir, created once per directory
+        """
+        templates=self._templates.get(template_dir)
+        if templates is None:
+            from nutanixapi.templates import CloudInitTemplates
+            templates=self._templates.setdefault(template_dir,CloudInitTemplates(template_dir,self.template_cache_dir))
+        return templates
 
     def _get_templ_path(self,template_dir,template_name):
         full_path=os.path.join(template_dir,template_name)
@@ -120,12 +200,8 @@ class NutanixAPI:
 
         Args:
         """
-        cloud_init_file=self._read_file(self._get_templ_path(template_dir,"cloud-init.yaml.j2"))
-        t_ci=Template(cloud_init_file)
-        rendered_template=t_ci.render()
-        #self._write_file("c:\\temp\\user_data.yaml",rendered_template)
-        user_data=b64encode(rendered_template.encode()).decode('ascii')
-        logging.debug(f"UserData:{user_data}")
+        user_data=self._get_templates(template_dir).user_data_managed()
+        logger.debug(f"UserData:{user_data}")
         return user_data
 
     def _prepare_user_data_unmanaged(self,template_dir,net_cfg): 
@@ -145,155 +221,11 @@ class NutanixAPI:
                 dns_search
                 }
         """
-        cloud_init_file=self._read_file(self._get_templ_path(template_dir,"cloud-init-net.yaml.j2"))
-        net_tmpl_file=self._read_file(self._get_templ_path(template_dir,"static.yaml.j2"))
-        t_net=Template(net_tmpl_file)        #create jinja templates
-        rendered_net_template=t_net.render(
-                        ip_address=net_cfg['ip_address'],
-                        prefix=net_cfg['prefix'],
-                        default_gw=net_cfg['default_gw'],
-                        dns_server1=net_cfg['dns_server1'],
-                        dns_server2=net_cfg['dns_server2'],
-                        dns_search=net_cfg['dns_search']
-                        )
-        #self._write_file("c:\\temp\\network_cfg.yaml",rendered_net_template)
-        rendered_net_template_b64=b64encode(rendered_net_template.encode())
-        t_ci=Template(cloud_init_file)
-        b64_str=rendered_net_template_b64.decode('ascii')
-        rendered_ci_template=t_ci.render(netplan_content=b64_str)
-        #self._write_file("c:\\temp\\user_data.yaml",rendered_ci_template)
-        user_data=b64encode(rendered_ci_template.encode()).decode('ascii')
-        logging.debug(f"UserData:{user_data}")
+        user_data=self._get_templates(template_dir).user_data_unmanaged(net_cfg)
+        logger.debug(f"UserData:{user_data}")
         return user_data
 
-    def list_clusters_screen(self):
-         data={
-             "kind":"cluster",
-             "length":self.max_results
-             }   
-         response=self.rest_call('POST','clusters/list',data)
-         if response.status_code == 200:
-             self._print_entities(response)
-
-    def list_clusters(self):
-         data={
-             "kind":"cluster",
-             "length":self.max_results
-             }   
-         response=self.rest_call('POST','clusters/list',data)
-         if response.status_code == 200:
-             return(response)
-
-    def list_images_screen(self):
-         data={
-             "kind":"image",
-             "length":self.max_results
-             }   
-         response=self.rest_call('POST','images/list',data)
-         if response.status_code == 200:
-             self._print_entities(response)
-
-    def list_images(self):
-         data={
-             "kind":"image",
-             "length":self.max_results
-             }   
-         response=self.rest_call('POST','images/list',data)
-         if response.status_code == 200:
-             return(response)
-    
-
-    def get_image_uuid(self,image_name):
-        data={
-             "kind":"image",
-             "length":self.max_results
-             }   
-        response=self.rest_call('POST','images/list',data)    
-        return self._get_uuid_by_name(response,image_name) if response.status_code == 200 else False
-    
-    def list_subnets(self):
-         data={
-             "kind":"subnet",
-             "length":self.max_results
-             }   
-         response=self.rest_call('POST','subnets/list',data)
-         if response.status_code == 200:
-            return(response)
-
-    def list_subnets_screen(self):
-         data={
-             "kind":"subnet",
-             "length":self.max_results
-             }   
-         response=self.rest_call('POST','subnets/list',data)
-         if response.status_code == 200:
-            self._print_entities(response)
-
-    def get_subnet_uuid(self,subnet_name):
-        data={
-             "kind":"subnet",
-             "length":self.max_results
-             }   
-        response=self.rest_call('POST','subnets/list',data)
-        return self._get_uuid_by_name(response,subnet_name) if response.status_code == 200 else False
-    
-    def list_clusters(self):
-         data={
-             "kind":"cluster",
-             "length":self.max_results
-             }   
-         response=self.rest_call('POST','clusters/list',data)
-         if response.status_code == 200:
-             self._print_entities(response) 
-    
-    def list_vms_screen(self):
-         data={
-             "kind":"vm",
-             "length":self.max_results
-             }   
-         response=self.rest_call('POST','vms/list',data)
-         if response.status_code == 200:
-             self._print_entities(response) 
-
-    def list_vms(self):
-         data={
-             "kind":"vm",
-             "length":self.max_results
-             }   
-         response=self.rest_call('POST','vms/list',data)
-         if response.status_code == 200:
-             result_json = json.loads(response.content)
-             return(result_json) 
-
-    def list_projects(self):
-         data={
-             "kind":"project",
-             "length":self.max_results
-             }   
-         response=self.rest_call('POST','projects/list',data)
-         if response.status_code == 200:
-             return(response) 
-
-    def list_projects_screen(self):
-         data={
-             "kind":"project",
-             "length":self.max_results
-             }   
-         response=self.rest_call('POST','projects/list',data)
-         if response.status_code == 200:
-             self._print_entities(response) 
-    
-    def get_current_user_uuid(self):
-        """
-        return uuid of current user in nutanix API
-        """
-        response=self.rest_call('GET','users/me')
-        if response.status_code == 200 or response.status_code == 202:
-            result_json = json.loads(response.content)
-            return result_json['metadata']['uuid']
-        return False
-
-    def create_vm_simple(self,
+    def _vm_simple_data(self,
                   vm_name,
                   vm_description,
                   cluster_uuid,
@@ -309,46 +241,9 @@ class NutanixAPI:
                   network_cfg=None
                   ):
         """
-        Creates basic VM in nutanix
-        VM is created from Nutanix image
-        Args:
-            vm_name ([string]): desired name of VM (hostname)
-            vm_description ([string]): description of VM
-            cluster_uuid ([string]): uuid of cluster where to deploy VM
-            project_uuid ([string]): uuid of project which wjill own VM
-            owner_uuid ([string]): uuid of VM owner(of creating user)
-            source_image_uuid ([string]): OS image uuid 
-            subnet_uuid ([uuid]): uuid of vm subnet 
-            num_threads_per_core (int, optional): Number of threads per CPU. Defaults to 1.
-            num_vcpus_per_socket (int, optional): Numbers of vcpu per socker. Defaults to 1.
-            num_sockets (int, optional): Number of CPU sockets. Defaults to 1.
-            memory_size_mib (int, optional): How much memory VM will get. Defaults to 1024.
-            template_dir(path where CloudInit templates are stored. No inside version control!)
-            network_cfg(Dictionary,optional)=None: network configuraton
-
-            Thre are three cases in Nutanix:
-                network_cfg = None
-                              Assign ip address automatically DHCP. 
-                              Must be used by only on networks managed by nutanix.
-                network_cfg (String) = ip_address
-                              Assign specified ip_address. 
-                              Sets specified IP address using Nutanix. Netmask and gatway is 
-                              inherited from network definition 
-                              Must be used by networks managed by nutanix,otherwise it will fail.
-                              (with error Cannot assign IP address in unmanaged network)
-                network_cfg (Dictionary) = 
-                                { ip_address  (String)
-                                  prefix (String)
-                                  default_gw (String)
-                                  dns_server1 (String)
-                                  dns_server2 (String)   
-                                  dns_search  (String)
-                                }
-                               Sets network according to dictionary.
-                               Must be used for networks not managed by Nutanix 
-                              
+        Builds request body for create_vm_simple, see it for arguments description
         Returns:
-            None: Response object
+            dict: request data or None if network_cfg is of unsupported type
         """
         if network_cfg is None:  #if no IP address is not specified , using DHCP
             user_data=self._prepare_user_data_managed(template_dir,network_cfg)
@@ -363,7 +258,7 @@ class NutanixAPI:
             user_data=self._prepare_user_data_unmanaged(template_dir,network_cfg)
             ip_endpoint_list=[{ "type": "ASSIGNED"}]
         else:   #error
-            return False
+            return None
 
         data = {
                 "spec": {
@@ -441,15 +336,45 @@ class NutanixAPI:
                 }
         
                 }
-        logging.debug("create_vm_simple data:")
-        logging.debug(data)
-        response=self.rest_call('POST','vms',data)
-        if response.status_code == 200 or response.status_code == 202:
-            logging.debug("create_vm_simple call success")
-            return response
-        logging.debug("create_vm_simple call failed")
-        logging.debug(repr(response))
-        return False 
+        return data
+
+    def _list_data(self,kind,offset=None,length=None,filter=None,sort_attribute=None,sort_order=None):
+        """
+        Builds request body for <kind>s/list endpoint
+        Args:
+            kind (string): entity kind (vm,image,subnet,cluster,project)
+            offset (int, optional): offset of first entity
+            length (int, optional): max number of entities. Defaults to self.max_results
+            filter (string, optional): FIQL filter evaluated by server, like "name==centos8"
+                                       or "power_state==on;num_sockets==2"
+            sort_attribute (string, optional): attribute to sort by on server, like "name"
+            sort_order (string, optional): ASCENDING or DESCENDING
+        """
+        data={
+             "kind":kind,
+             "length":self.max_results if length is None else length
+             }
+        if offset is not None:
+            data["offset"]=offset
+        if filter:
+            data["filter"]=filter
+        if sort_attribute:
+            data["sort_attribute"]=sort_attribute
+        if sort_order:
+            if sort_order.upper() not in {"ASCENDING","DESCENDING"}:
+                raise ValueError(f"Unsupported sort_order {sort_order}")
+            data["sort_order"]=sort_order.upper()
+        return data
+
+    @staticmethod
+    def name_filter(kind,name):
+        """
+        Returns FIQL filter which selects entities of kind by name,
+        FIQL reserved characters in name are percent encoded
+        """
+        attribute='vm_name' if kind == 'vm' else 'name'
+        escaped=''.join(f'%{ord(c):02X}' if c in FIQL_RESERVED else c for c in name)
+        return f'{attribute}=={escaped}'
 
     def _get_uuid_by_name(self,response,search_name):
         """
@@ -464,7 +389,7 @@ class NutanixAPI:
         """
         uuid=False
         try:
-            result_json = json.loads(response.content)  
+            result_json = response.json()  
             search_result=list(filter(lambda x: x['spec']['name'] == search_name,result_json['entities']))
             if len(list(search_result))==1:
                 uuid=search_result[0]['metadata']['uuid']
@@ -487,167 +412,105 @@ class NutanixAPI:
         Args:
             response requests.Response: response received from web server
         """
-        result_json = json.loads(response.content)
+        result_json = response.json()
         for entity in result_json['entities']:
             print(f"spec_name: {entity['spec']['name']} ent_name: {entity['status']['name']} uuid: {entity['metadata']['uuid']}")
             
 
-    def get_vm(self,vm_uuid):
-        #"bebb4394-0073-4864-9c67-29db86e1c77d"
-        
-        data={
-             "kind":"vm",
-             "length":self.max_results,
-             }   
-        logging.debug("get_vm data:{repr(data)}")
-        request_url='vms/%s' % vm_uuid 
-        logging.debug(f"request_url: {request_url}")
-        response=self.rest_call('GET',request_url,data)
-        result_json=None
-        if response.status_code == 200:
-            result_json = json.loads(response.content ,encoding='utf-8')
-        return result_json
-
-    
-
-    def get_disk0(self,vm_uuid):
+    def _find_disk0(self,vm_json):
         """
-        from device list filter out device of type SCSI and device index 0
-        which must be system disk
-        Args:
-            vm_uuid String: UUID of VM
-
-        returns: 
-            dictinary of disk object
-            as Example:
-            {
-            'uuid':  'e194e540-d3b6-4668-a19f-bf98cb0ba140',
-            'disk_size_bytes':  2361393152,
-            'storage_config':  { 'storage_container_reference':  {'kind':  'storage_container','uuid':  '527ce9b6-a154-4f31-85b3-6fc7cfd2db44','name':  'SelfServiceContainer'}},
-            'device_properties':  {'disk_address':  {'device_index':  0,'adapter_type':  'SCSI'},'device_type':  'DISK'},
-            'data_source_reference':  {'kind':  'image','uuid':  'd7024166-9d1e-4e49-a424-864b04f1f836'},
-            'disk_size_mib':  2252
-            }
+        from device list of VM (as returned by get_vm) filter out device of type SCSI
+        and device index 0 which must be system disk
+        Returns:
+            string: disk uuid
         """
         def disk0_filter(x):
             if (x['device_properties']['disk_address']['device_index'] == 0 and 
                 x['device_properties']['disk_address']['adapter_type'] == 'SCSI' and
                 x['device_properties']['device_type'] == 'DISK' ):
                 return x
-                
-        logging.debug(f"get_disk0: vm_uuid:{vm_uuid}")
-        result=self.get_vm(vm_uuid)
-        if result == False:
-            return None
-        disk_list=result['status']['resources']['disk_list']
+
+        disk_list=vm_json['status']['resources']['disk_list']
         disk0=list(filter(disk0_filter,disk_list)).pop()
-        logging.debug(f"disk0: {disk0['uuid']}")
+        logger.debug(f"disk0: {disk0['uuid']}")
         return disk0['uuid']
 
-    def get_disk_address(self,vm_uuid,disk_uuid):
+    def _find_disk_address(self,vm_json,disk_uuid):
+        """
+        Returns disk_address of disk with disk_uuid from VM (as returned by get_vm)
+        """
         def disk_filter(x): #filter func
             if x['uuid']==disk_uuid:
                 return x
-                
-        
-        result=self.get_vm(vm_uuid)
-        if result == False:
-            return None
-        disk_list=result['status']['resources']['disk_list']
+
+        disk_list=vm_json['status']['resources']['disk_list']
         disk=list(filter(disk_filter,disk_list)).pop()
-        logging.debug(f"disk: {disk}")
+        if debug_enabled():
+            logger.debug(f"disk: {disk}")
         disk_address=disk['device_properties']['disk_address']
-        logging.debug(f"disk address: {disk_address}")
+        logger.debug(f"disk address: {disk_address}")
         return disk_address
 
-    # def set_disk_size(self,vm_uuid,disk_uuid,disk_address,new_size_bytes):
-    #     data={ "updateSpec":
-    #             {"vmDiskClone":
-    #                 {
-    #                 "minimumSize":new_size_bytes,
-    #                 "vmDiskUuid":disk_uuid
-    #                 }
-    #             }
-    #     }
-    #     json_data=json.dumps(data)
-    #     urlencoded_diskaddress=urlencode(disk_address)
-    #     url=f"vms/{vm_uuid}/disks/{urlencoded_diskaddress}"
-    #     response=self.rest_call('PUT',url,data)
-    #     return response
-    def resize_vm_disk(self,vm_uuid,disk_uuid,new_size):
-        # https://www.nutanix.dev/2019/12/06/put-that-down-updating-a-vm-with-prism-central-v3-api/
-        logging.debug(f"resize_vm_disk vm_uuid:{vm_uuid} disk_uuid:{disk_uuid} new_size:{new_size}")
-        new_size_in_bytes=humanfriendly.parse_size(new_size)
-        vm_data_json=self.get_vm(vm_uuid)
-        logging.debug(f"vm_data_json:{json.dumps(vm_data_json)}")
+    def _update_vm_data(self,vm_data_json,mutations):
+        """
+        Builds PUT request data which applies mutations (see nutanixapi.vmspec) to VM spec
+        Args:
+            vm_data_json (dict): VM as returned by get_vm, its spec is changed
+            mutations (iterable): callables changing spec dictionary in place
+        """
+        # https://www.nutanix.dev/2019/12/06/put-that-down-updating-a-vm-with-prism-central-v3-api/
+        debug=debug_enabled()
+        if debug:
+            logger.debug(f"vm_data_json:{json.dumps(vm_data_json)}")
         spec=vm_data_json['spec']
-        disk_list=spec['resources']['disk_list']
-        logging.debug(f"spec before update:{json.dumps(spec)}")
-        #find index of disk in spec by uuid
-        idx=-1
-        for temp_idx in range(0,len(disk_list)):
-            if disk_list[temp_idx]['uuid'] == disk_uuid:
-                idx=temp_idx
-        disk_list[idx]['disk_size_bytes']=new_size_in_bytes
-        spec_after=json.dumps(spec)
-        logging.debug(f"spec after update:{json.dumps(spec)}")
+        for mutation in mutations:
+            mutation(spec)
         data={
              "api_version": "3.1",
              "spec": spec,
              "metadata": vm_data_json['metadata']
              }
-        logging.debug(f"request data:{json.dumps(data)}")
-        response=self.rest_call('PUT',f"vms/{vm_uuid}",data)
-        return response
-        
-         
-        
-    def get_task_status(self,task_uuid):
-        response=self.rest_call('GET',f"tasks/{task_uuid}")
-        #result_json = json.loads(response.content)
-        return response
-
-    def _vm_set_power_state(self,vm_uuid,power_state):
-        #from https://www.nutanix.dev/2019/12/06/put-that-down-updating-a-vm-with-prism-central-v3-api/
-        logging.debug(f"_vm_set_power_state vm_uuid:{vm_uuid} power_state:{power_state}")
-        vm_data_json=self.get_vm(vm_uuid)
-        logging.debug(f"vm_data_json:{json.dumps(vm_data_json)}")
-        spec=vm_data_json['spec']
-        spec["resources"]["power_state"]=power_state
-        data={
-                "api_version": "3.1",
-                "spec": spec,
-                "metadata": vm_data_json['metadata']
-                }
-        logging.debug(f"request data:{json.dumps(data)}")
-        response=self.rest_call('PUT',f"vms/{vm_uuid}",data)
-        return response
+        if debug:
+            logger.debug(f"request data:{json.dumps(data)}")
+        return data
 
-    def vm_poweron(self,vm_uuid):
-        logging.debug(f"vm_poweron vm_uuid:{vm_uuid}")
-        return self._vm_set_power_state(vm_uuid,'ON')
+    def _resize_disk_data(self,vm_data_json,disk_uuid,new_size):
+        """
+        Builds PUT request data which changes size of disk_uuid to new_size
+        Args:
+            vm_data_json (dict): VM as returned by get_vm
+            disk_uuid (string): uuid of disk
+            new_size (string): new size, like "20G"
+        """
+        return self._update_vm_data(vm_data_json,[vmspec.resize_disk(disk_uuid,new_size)])
 
-    def vm_poweroff(self,vm_uuid):
-        logging.debug(f"vm_poweroff vm_uuid:{vm_uuid}")
-        return self._vm_set_power_state(vm_uuid,'OFF')
+    def _power_state_data(self,vm_data_json,power_state):
+        """
+        Builds PUT request data which sets VM power state
+        Args:
+            vm_data_json (dict): VM as returned by get_vm
+            power_state (string): ON or OFF
+        """
+        return self._update_vm_data(vm_data_json,[vmspec.set_power_state(power_state)])
 
 #utilities
     @staticmethod
     def get_task_uuid(result):
         try:
             task_uuid=result['status']['execution_context']['task_uuid']
-        except IndexError:
+        except (KeyError,IndexError,TypeError):
             return None
         return task_uuid
 
     @staticmethod
     def process_response(response):
-        logging.debug(f"process_response response:{response}")
+        logger.debug(f"process_response response:{response}")
         status_code=response.status_code
-        logging.debug(f"Status code:{status_code}")    
+        logger.debug(f"Status code:{status_code}")    
         if status_code == 200 or status_code == 202:
-            result=json.loads(response.content)
-            logging.debug(f"result:{result}")    
+            result=response.json()
+            if debug_enabled():
+                logger.debug(f"result:{result}")
         else:
             result =None
         return(status_code,result)
@@ -678,6 +541,1052 @@ class NutanixAPI:
             os._exit(-1) #!!! have to think about cleanup
         return True
 
+class NutanixAPI(NutanixAPIBase):
+    def __init__(self,url,username,password,log_file,log_level,ssl_verify=True,max_results=99999,
+                 page_size=500,pool_size=10,connect_timeout=10,read_timeout=120,
+                 name_cache_ttl=None,name_cache_background_refresh=True,vm_cache_ttl=None,template_cache_dir=None,
+                 inventory=None,inventory_max_age=None,
+                 max_retries=3,retry_backoff=0.5,max_retry_delay=30,rate_limit=None,max_concurrency=None,
+                 metrics=None,cassette=None,json_codec=None,accept_gzip=True,gzip_request_min_size=None):
+        """
+        Creates Nutanix API object
+        Args:
+            pool_size (int, optional): max number of kept-alive connections to Prism. Defaults to 10.
+            name_cache_ttl (float, optional): if set, get_*_uuid lookups are served from in-memory
+                                              name->uuid index rebuilt every name_cache_ttl seconds.
+                                              Defaults to None (every lookup lists entities).
+            name_cache_background_refresh (bool, optional): rebuild expired index in background
+                                              and serve stale entries meanwhile. Defaults to True.
+            vm_cache_ttl (float, optional): if set, get_vm results are cached for vm_cache_ttl seconds,
+                                            see VMCache. Defaults to None (no VM caching).
+            inventory (Inventory, optional): local SQLite inventory used by get_*_uuid lookups
+                                             and filled by sync_inventory(). Defaults to None.
+            inventory_max_age (float, optional): lookups use inventory only if kind was synced
+                                                 within this many seconds. Defaults to None (any age).
+            max_retries (int, optional): retries of idempotent calls (GET, PUT, list) on connection errors
+                                         and 429/5xx, other calls are retried only on 429. Defaults to 3.
+            retry_backoff (float, optional): base of exponential retry delay in seconds. Defaults to 0.5.
+            max_retry_delay (float, optional): max delay between retries in seconds. Defaults to 30.
+            rate_limit (float, optional): max requests per second (token bucket). Defaults to None.
+            max_concurrency (int, optional): if set, requests in flight are limited adaptively
+                                             (AIMD) up to this number, limit is halved on 429/503.
+                                             Defaults to None.
+            metrics (Metrics, optional): collects per endpoint request and task wait statistics,
+                                         see nutanixapi.metrics. Defaults to None (no instrumentation).
+            cassette (Cassette, optional): records all requests and responses to file or replays
+                                           them without network, see nutanixapi.cassette. Defaults to None.
+            other arguments are described in NutanixAPIBase
+
+        Object keeps one HTTP session (connection pool with keep-alive) for all calls
+        and one background thread polling tasks of futures (see track_task),
+        call close() or use it as context manager to release them:
+            with NutanixAPI(...) as api:
+                api.list_vms()
+        """
+        super().__init__(url,username,password,log_file,log_level,ssl_verify,max_results,
+                         page_size,connect_timeout,read_timeout,template_cache_dir,json_codec,
+                         accept_gzip,gzip_request_min_size)
+        self.cassette=cassette
+        self.pool_size=pool_size
+        self._session=None      #created on first request
+        self._session_lock=threading.Lock()
+        self.name_cache=None
+        if name_cache_ttl is not None:
+            self.name_cache=NameIndexCache(self._iter_entities,name_cache_ttl,name_cache_background_refresh)
+        self.vm_cache=VMCache(vm_cache_ttl,self.codec) if vm_cache_ttl is not None else None
+        self.inventory=inventory
+        self.inventory_max_age=inventory_max_age
+        self.max_retries=max_retries
+        self.retry_backoff=retry_backoff
+        self.max_retry_delay=max_retry_delay
+        self.rate_limiter=TokenBucket(rate_limit) if rate_limit else None
+        self.concurrency=AdaptiveConcurrency(max_concurrency) if max_concurrency else None
+        self._retry_not_before=0
+        self.metrics=metrics
+        self.task_poller=TaskPoller(self._get_tasks,metrics=metrics)
+
+    @property
+    def session(self):
+        """
+        requests session, created on first use
+        """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session=self._create_session(self.pool_size)
+        return self._session
+
+    def _create_session(self,pool_size):
+        """
+        Creates requests session with connection pool shared by all rest calls.
+        urllib3 pool is thread safe, so one NutanixAPI object can be used from many threads,
+        pool_size should be at least number of threads using object.
+
+        Args:
+            pool_size (int): max number of connections kept open per host
+        """
+        import requests
+        import urllib3
+        from requests.adapters import HTTPAdapter
+        urllib3.disable_warnings()  #for now
+        session=requests.Session()
+        if self.cassette is not None:
+            from nutanixapi.cassette import CassetteAdapter
+            adapter=CassetteAdapter(self.cassette,pool_connections=1,pool_maxsize=pool_size,pool_block=True)
+        else:
+            adapter=HTTPAdapter(pool_connections=1,pool_maxsize=pool_size,pool_block=True)
+        session.mount('https://',adapter)
+        session.mount('http://',adapter)
+        session.headers.update(self.headers)
+        session.verify=self.ssl_verify
+        return session
+
+    def close(self):
+        """
+        Closes HTTP session and all pooled connections, and cassette if it is used
+        """
+        self.task_poller.close()
+        if self._session is not None:
+            self._session.close()
+        if self.cassette is not None:
+            self.cassette.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,exc_type,exc_value,traceback):
+        self.close()
+        return False
+
+    # Create a REST client session.
+    def rest_call(self,method,sub_url,data=None,stream=False):
+        """
+        Sends request to v3 API
+        Args:
+            method (string): GET, POST or PUT
+            sub_url (string): url relative to /api/nutanix/v3/
+            data (dict, optional): request body
+            stream (bool, optional): do not read response body, caller reads it with
+                                     response.iter_content() and closes response. Defaults to False.
+        Returns:
+            ApiResponse
+        """
+        import requests     #loaded with session, later imports are lookups in sys.modules
+        req_url = f'{self.url}/api/nutanix/v3/{sub_url}'            
+        #request_url = 'https://10.99.134.250:9440/api/nutanix/v3/vms/list'
+        headers=self.headers
+        self._on_vm_request(method,sub_url)
+        method=method.upper()
+        debug=debug_enabled()
+        if method in {"POST","PUT"}: #need data
+            body,encoded_data,extra_headers=self._encode_body(data)
+        elif method in {"GET"}: #does not need data
+            body,encoded_data,extra_headers=None,None,None
+        else:
+            raise ValueError("Unsupported method") #will implement later
+        if debug:
+            logger.debug(f"rest_call {method} url:")
+            logger.debug(req_url)
+            logger.debug("rest_call headers:")
+            logger.debug(headers)
+            if body is not None:
+                logger.debug("rest_call data:")
+                logger.debug(body)
+        idempotent=self._is_idempotent(method,sub_url)
+        metrics=self.metrics
+        if metrics is not None:
+            endpoint=endpoint_name(sub_url)
+            request_bytes=len(body) if body is not None else 0
+            request_wire_bytes=len(encoded_data) if encoded_data is not None else 0
+            metrics.request_started(method,endpoint)
+            started=time.monotonic()
+        attempt=0
+        response=None
+        try:
+            while True:
+                self._wait_before_request()
+                response=None
+                overloaded=False
+                if self.concurrency is not None:
+                    self.concurrency.acquire()
+                try:
+                    response = ApiResponse(self.session.request(method, req_url, data=encoded_data,headers=extra_headers,
+                                                            timeout=self.timeout,stream=stream),self.codec)
+                except requests.RequestException as ex:
+                    #request surely not sent on connect timeout, so it is safe to repeat for any method
+                    retryable=idempotent or isinstance(ex,requests.exceptions.ConnectTimeout)
+                    if not retryable or attempt >= self.max_retries:
+                        raise
+                    delay=self._retry_delay(attempt)
+                    logger.warning(f"rest_call {method} {sub_url} failed: {repr(ex)}, retry in {delay:.1f}s")
+                else:
+                    overloaded=response.status_code in OVERLOAD_STATUS
+                    #429 means request was rejected without processing, others only for idempotent calls
+                    retryable=response.status_code == 429 or (idempotent and response.status_code in RETRY_STATUS)
+                    if not retryable or attempt >= self.max_retries:
+                        break
+                    delay=self._retry_delay(attempt,response.headers.get('Retry-After'))
+                    if overloaded:
+                        self._retry_not_before=max(self._retry_not_before,time.monotonic()+delay)
+                    logger.warning(f"rest_call {method} {sub_url} status {response.status_code}, retry in {delay:.1f}s")
+                    response.close()
+                    response=None
+                finally:
+                    #slot is released on any outcome, also on exceptions not raised by requests
+                    if self.concurrency is not None:
+                        self.concurrency.release(overloaded)
+                attempt+=1
+                time.sleep(delay)
+            self._on_vm_response(method,sub_url,data,response)
+        finally:
+            if metrics is not None:
+                if response is None:
+                    metrics.request_finished(method,endpoint,"error",time.monotonic()-started,
+                                             request_bytes,0,attempt,request_wire_bytes,0)
+                else:
+                    if stream:
+                        #body is not read yet, reader records its size with add_response_bytes
+                        response_bytes=response_wire_bytes=0
+                    else:
+                        response_bytes=len(response.content)
+                        response_wire_bytes=self._wire_bytes(response,response_bytes)
+                    metrics.request_finished(method,endpoint,response.status_code,time.monotonic()-started,
+                                             request_bytes,response_bytes,attempt,request_wire_bytes,response_wire_bytes)
+        if debug:
+            logger.debug(f"rest_call response status code {response.status_code}")
+            if not stream:
+                logger.debug("rest_call response:")
+                logger.debug(response.content)
+        return response
+
+    @staticmethod
+    def _wire_bytes(response,content_bytes):
+        """
+        Returns number of response body bytes received (compressed size of gzip response)
+        """
+        tell=getattr(response.raw,'tell',None)    #urllib3 response, None for cassette replay
+        return tell() if tell is not None else content_bytes
+
+    @staticmethod
+    def _is_idempotent(method,sub_url):
+        """
+        True if request can be repeated without side effects: GET, PUT (guarded by
+        spec_version) and POST to list endpoints
+        """
+        return method in {"GET","PUT","DELETE"} or (method == "POST" and sub_url.endswith('/list'))
+
+    def _retry_delay(self,attempt,retry_after=None):
+        """
+        Returns seconds to wait before retry: exponential backoff with full jitter,
+        but not less than server Retry-After (seconds or HTTP date)
+        """
+        delay=random.uniform(0,min(self.max_retry_delay,self.retry_backoff*2**attempt))
+        if retry_after:
+            try:
+                server_delay=float(retry_after)
+            except ValueError:
+                try:
+                    server_delay=(parsedate_to_datetime(retry_after)-datetime.now(timezone.utc)).total_seconds()
+                except (TypeError,ValueError):
+                    server_delay=0
+            delay=max(delay,min(server_delay,self.max_retry_delay))
+        return delay
+
+    def _wait_before_request(self):
+        """
+        Applies rate limit and waits while server asked to back off (Retry-After)
+        """
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        wait=self._retry_not_before-time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+    def _on_vm_request(self,method,sub_url):
+        """
+        Drops cached VM before request which changes it
+        """
+        if self.vm_cache is not None and method.upper() in {"PUT","DELETE"} and sub_url.startswith('vms/'):
+            self.vm_cache.invalidate(sub_url.split('/')[1])
+
+    def _on_vm_response(self,method,sub_url,data,response):
+        """
+        Drops cached VM again after request which changes it, GET running concurrently
+        may have cached VM as it was before the change. Accepted PUT creates spec_version
+        newer than the one sent, so older VM is not cached later either.
+        """
+        if self.vm_cache is None or method not in {"PUT","DELETE"} or not sub_url.startswith('vms/'):
+            return
+        vm_uuid=sub_url.split('/')[1]
+        self.vm_cache.invalidate(vm_uuid)
+        if method == "PUT" and response.status_code in {200,202}:
+            try:
+                self.vm_cache.observe(vm_uuid,data['metadata']['spec_version']+1)
+            except (KeyError,TypeError):
+                pass
+
+    def batch(self,max_batch_size=60,action_on_failure="CONTINUE"):
+        """
+        Returns NutanixBatch which queues create/update operations and sends them
+        through v3 batch endpoint, see NutanixBatch
+        """
+        return NutanixBatch(self,max_batch_size,action_on_failure)
+
+    def list_clusters_screen(self):
+         data={
+             "kind":"cluster",
+             "length":self.max_results
+             }   
+         response=self.rest_call('POST','clusters/list',data)
+         if response.status_code == 200:
+             self._print_entities(response)
+
+    def list_clusters(self,filter=None,sort_attribute=None,sort_order=None):
+         data=self._list_data('cluster',filter=filter,sort_attribute=sort_attribute,sort_order=sort_order)
+         response=self.rest_call('POST','clusters/list',data)
+         if response.status_code == 200:
+             return(response)
+
+    def list_images_screen(self):
+         data={
+             "kind":"image",
+             "length":self.max_results
+             }   
+         response=self.rest_call('POST','images/list',data)
+         if response.status_code == 200:
+             self._print_entities(response)
+
+    def list_images(self,filter=None,sort_attribute=None,sort_order=None):
+         data=self._list_data('image',filter=filter,sort_attribute=sort_attribute,sort_order=sort_order)
+         response=self.rest_call('POST','images/list',data)
+         if response.status_code == 200:
+             return(response)
+    
+
+    def _lookup_uuid(self,kind,name):
+        """
+        Returns uuid of entity of kind (image,subnet,cluster,project) by name
+        using inventory or name cache if enabled, False if not found or name is not unique.
+        Without cache only entities matching name filter are requested from server,
+        exact name match is still checked locally.
+        """
+        if self._inventory_usable(kind):
+            return self.inventory.get_uuid(kind,name)
+        if self.name_cache is not None:
+            return self.name_cache.lookup(kind,name)
+        data=self._list_data(kind,filter=self.name_filter(kind,name))
+        response=self.rest_call('POST',f'{kind}s/list',data)
+        return self._get_uuid_by_name(response,name) if response.status_code == 200 else False
+
+    def _inventory_usable(self,kind):
+        if self.inventory is None or self.inventory.last_sync(kind) is None:
+            return False
+        return self.inventory_max_age is None or self.inventory.is_fresh(kind,self.inventory_max_age)
+
+    def sync_inventory(self,kinds=None,full=False):
+        """
+        Synchronizes local inventory passed to constructor, see Inventory.sync
+        """
+        if self.inventory is None:
+            raise ValueError("NutanixAPI was created without inventory")
+        return self.inventory.sync(self,kinds,full)
+
+    def invalidate_name_cache(self,kind=None):
+        """
+        Drops cached name->uuid index of kind (image,subnet,cluster,project) or all kinds,
+        use after creating/renaming/deleting entities
+        """
+        if self.name_cache is not None:
+            self.name_cache.invalidate(kind)
+
+    def get_image_uuid(self,image_name):
+        return self._lookup_uuid('image',image_name)
+    
+    def list_subnets(self,filter=None,sort_attribute=None,sort_order=None):
+         data=self._list_data('subnet',filter=filter,sort_attribute=sort_attribute,sort_order=sort_order)
+         response=self.rest_call('POST','subnets/list',data)
+         if response.status_code == 200:
+            return(response)
+
+    def list_subnets_screen(self):
+         data={
+             "kind":"subnet",
+             "length":self.max_results
+             }   
+         response=self.rest_call('POST','subnets/list',data)
+         if response.status_code == 200:
+            self._print_entities(response)
+
+    def get_subnet_uuid(self,subnet_name):
+        return self._lookup_uuid('subnet',subnet_name)
+
+    def get_cluster_uuid(self,cluster_name):
+        return self._lookup_uuid('cluster',cluster_name)
+
+    def get_project_uuid(self,project_name):
+        return self._lookup_uuid('project',project_name)
+    
+    def list_vms_screen(self):
+         data={
+             "kind":"vm",
+             "length":self.max_results
+             }   
+         response=self.rest_call('POST','vms/list',data)
+         if response.status_code == 200:
+             self._print_entities(response) 
+
+    def list_vms(self,filter=None,sort_attribute=None,sort_order=None):
+         data=self._list_data('vm',filter=filter,sort_attribute=sort_attribute,sort_order=sort_order)
+         response=self.rest_call('POST','vms/list',data)
+         if response.status_code == 200:
+             result_json = response.json()
+             if self.vm_cache is not None:
+                 for vm in result_json['entities']:
+                     self.vm_cache.observe(vm['metadata']['uuid'],vm['metadata'].get('spec_version'))
+             return(result_json) 
+
+    def list_projects(self,filter=None,sort_attribute=None,sort_order=None):
+         data=self._list_data('project',filter=filter,sort_attribute=sort_attribute,sort_order=sort_order)
+         response=self.rest_call('POST','projects/list',data)
+         if response.status_code == 200:
+             return(response) 
+
+    def list_projects_screen(self):
+         data={
+             "kind":"project",
+             "length":self.max_results
+             }   
+         response=self.rest_call('POST','projects/list',data)
+         if response.status_code == 200:
+             self._print_entities(response) 
+    
+    def _list_page(self,kind,offset,length,filter=None,sort_attribute=None,sort_order=None):
+        """
+        Gets one page of entities from <kind>s/list endpoint
+        Args:
+            kind (string): entity kind (vm,image,subnet,cluster,project)
+            offset (int): offset of first entity in page
+            length (int): max number of entities in page
+            filter, sort_attribute, sort_order: see _list_data
+        Returns:
+            dict: parsed list response
+        """
+        data=self._list_data(kind,offset,length,filter,sort_attribute,sort_order)
+        response=self.rest_call('POST',f'{kind}s/list',data)
+        response.raise_for_status()
+        return response.json()
+
+    def _stream_page(self,kind,offset,length,filter=None,sort_attribute=None,sort_order=None,members=None):
+        """
+        Gets one page of entities from <kind>s/list endpoint and yields entities while
+        response body is being read, so only one entity is kept in memory.
+        Args:
+            members (dict, optional): gets other top level members of response (metadata)
+            other arguments as in _list_page
+        """
+        data=self._list_data(kind,offset,length,filter,sort_attribute,sort_order)
+        response=self.rest_call('POST',f'{kind}s/list',data,stream=True)
+        body_bytes=0
+        def chunks():
+            nonlocal body_bytes
+            for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                body_bytes+=len(chunk)
+                yield chunk
+        try:
+            response.raise_for_status()
+            yield from iter_array_items(chunks(),'entities',members)
+        finally:
+            if self.metrics is not None:
+                self.metrics.add_response_bytes('POST',endpoint_name(f'{kind}s/list'),
+                                                body_bytes,self._wire_bytes(response,body_bytes))
+            response.close()
+
+    def _iter_entities_streamed(self,kind,page_size,list_args):
+        offset=0
+        while True:
+            members={}
+            count=0
+            for entity in self._stream_page(kind,offset,page_size,*list_args,members=members):
+                count+=1
+                yield entity
+            offset+=count
+            if count == 0 or offset >= members.get('metadata',{}).get('total_matches',0):
+                return
+
+    def _iter_entities(self,kind,page_size=None,prefetch=False,filter=None,sort_attribute=None,sort_order=None,stream=False):
+        """
+        Generator which pages through <kind>s/list endpoint and yields entities one by one,
+        so only one page is kept in memory.
+        With stream=True each page is parsed while it is downloaded and only one entity
+        is kept in memory, use with big page_size (like max_results) for fewest requests.
+
+        Args:
+            kind (string): entity kind (vm,image,subnet,cluster,project)
+            page_size (int, optional): entities per request. Defaults to self.page_size
+            prefetch (bool, optional): fetch next page in background thread
+                                       while caller processes current one. Defaults to False.
+            filter, sort_attribute, sort_order: server side filtering and sorting, see _list_data
+            stream (bool, optional): parse response incrementally, prefetch is ignored. Defaults to False.
+
+        iter_* methods also accept:
+            summary (bool, optional): yield compact records (VMSummary, ImageSummary, ...)
+                                      instead of entity dictionaries. Defaults to False.
+            fields (iterable, optional): yield records with only these fields,
+                                         like ('name','uuid','power_state'). Defaults to None.
+        Raises:
+            requests.HTTPError: if any page request fails
+        """
+        page_size=page_size or self.page_size
+        list_args=(filter,sort_attribute,sort_order)
+        if stream:
+            yield from self._iter_entities_streamed(kind,page_size,list_args)
+            return
+        executor=ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            offset=0
+            page=self._list_page(kind,offset,page_size,*list_args)
+            while True:
+                entities=page.get('entities',[])
+                total=page.get('metadata',{}).get('total_matches',0)
+                offset+=len(entities)
+                has_next=len(entities) > 0 and offset < total
+                next_page=None
+                if has_next and executor is not None:
+                    next_page=executor.submit(self._list_page,kind,offset,page_size,*list_args)
+                for entity in entities:
+                    yield entity
+                if not has_next:
+                    return
+                page=next_page.result() if next_page is not None else self._list_page(kind,offset,page_size,*list_args)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True,cancel_futures=True)
+
+    def iter_vms(self,page_size=None,prefetch=False,filter=None,sort_attribute=None,sort_order=None,stream=False,
+                  summary=False,fields=None):
+        """
+        Yields all VMs page by page. See _iter_entities for arguments.
+        """
+        entities=self._iter_entities('vm',page_size,prefetch,filter,sort_attribute,sort_order,stream)
+        if self.vm_cache is not None:
+            entities=self._observe_vms(entities)
+        return self._summaries('vm',entities,fields) if summary or fields else entities
+
+    def _summaries(self,kind,entities,fields=None):
+        """
+        Converts entities to summary records of kind with only given fields
+        """
+        record_type=SUMMARY_TYPES[kind].projection(fields)
+        for entity in entities:
+            yield record_type.from_entity(entity)
+
+    def _observe_vms(self,entities):
+        """
+        Passes VMs through, dropping cached VMs for which newer spec_version is seen
+        """
+        for vm in entities:
+            metadata=vm.get('metadata',{})
+            self.vm_cache.observe(metadata.get('uuid'),metadata.get('spec_version'))
+            yield vm
+
+    def iter_images(self,page_size=None,prefetch=False,filter=None,sort_attribute=None,sort_order=None,stream=False,
+                  summary=False,fields=None):
+        """
+        Yields all images page by page. See _iter_entities for arguments.
+        """
+        entities=self._iter_entities('image',page_size,prefetch,filter,sort_attribute,sort_order,stream)
+        return self._summaries('image',entities,fields) if summary or fields else entities
+
+    def iter_subnets(self,page_size=None,prefetch=False,filter=None,sort_attribute=None,sort_order=None,stream=False,
+                  summary=False,fields=None):
+        """
+        Yields all subnets page by page. See _iter_entities for arguments.
+        """
+        entities=self._iter_entities('subnet',page_size,prefetch,filter,sort_attribute,sort_order,stream)
+        return self._summaries('subnet',entities,fields) if summary or fields else entities
+
+    def iter_clusters(self,page_size=None,prefetch=False,filter=None,sort_attribute=None,sort_order=None,stream=False,
+                  summary=False,fields=None):
+        """
+        Yields all clusters page by page. See _iter_entities for arguments.
+        """
+        entities=self._iter_entities('cluster',page_size,prefetch,filter,sort_attribute,sort_order,stream)
+        return self._summaries('cluster',entities,fields) if summary or fields else entities
+
+    def iter_projects(self,page_size=None,prefetch=False,filter=None,sort_attribute=None,sort_order=None,stream=False,
+                  summary=False,fields=None):
+        """
+        Yields all projects page by page. See _iter_entities for arguments.
+        """
+        entities=self._iter_entities('project',page_size,prefetch,filter,sort_attribute,sort_order,stream)
+        return self._summaries('project',entities,fields) if summary or fields else entities
+
+    def get_current_user_uuid(self):
+        """
+        return uuid of current user in nutanix API
+        """
+        response=self.rest_call('GET','users/me')
+        if response.status_code == 200 or response.status_code == 202:
+            result_json = response.json()
+            return result_json['metadata']['uuid']
+        return False
+
+    def create_vm_simple(self,
+                  vm_name,
+                  vm_description,
+                  cluster_uuid,
+                  project_uuid,
+                  owner_uuid,
+                  source_image_uuid,
+                  subnet_uuid,
+                  num_threads_per_core=1,
+                  num_vcpus_per_socket=1,
+                  num_sockets=1,
+                  memory_size_mib=1024,
+                  template_dir=".",
+                  network_cfg=None,
+                  as_future=False
+                  ):
+        """
+        Creates basic VM in nutanix
+        VM is created from Nutanix image
+        Args:
+            vm_name ([string]): desired name of VM (hostname)
+            vm_description ([string]): description of VM
+            cluster_uuid ([string]): uuid of cluster where to deploy VM
+            project_uuid ([string]): uuid of project which wjill own VM
+            owner_uuid ([string]): uuid of VM owner(of creating user)
+            source_image_uuid ([string]): OS image uuid 
+            subnet_uuid ([uuid]): uuid of vm subnet 
+            num_threads_per_core (int, optional): Number of threads per CPU. Defaults to 1.
+            num_vcpus_per_socket (int, optional): Numbers of vcpu per socker. Defaults to 1.
+            num_sockets (int, optional): Number of CPU sockets. Defaults to 1.
+            memory_size_mib (int, optional): How much memory VM will get. Defaults to 1024.
+            template_dir(path where CloudInit templates are stored. No inside version control!)
+            network_cfg(Dictionary,optional)=None: network configuraton
+
+            Thre are three cases in Nutanix:
+                network_cfg = None
+                              Assign ip address automatically DHCP. 
+                              Must be used by only on networks managed by nutanix.
+                network_cfg (String) = ip_address
+                              Assign specified ip_address. 
+                              Sets specified IP address using Nutanix. Netmask and gatway is 
+                              inherited from network definition 
+                              Must be used by networks managed by nutanix,otherwise it will fail.
+                              (with error Cannot assign IP address in unmanaged network)
+                network_cfg (Dictionary) = 
+                                { ip_address  (String)
+                                  prefix (String)
+                                  default_gw (String)
+                                  dns_server1 (String)
+                                  dns_server2 (String)   
+                                  dns_search  (String)
+                                }
+                               Sets network according to dictionary.
+                               Must be used for networks not managed by Nutanix 
+            as_future (bool, optional): return TaskFuture of creation task, see track_task. Defaults to False.
+                              
+        Returns:
+            None: Response object
+        """
+        data=self._vm_simple_data(vm_name,vm_description,cluster_uuid,project_uuid,owner_uuid,
+                                  source_image_uuid,subnet_uuid,num_threads_per_core,num_vcpus_per_socket,
+                                  num_sockets,memory_size_mib,template_dir,network_cfg)
+        if data is None:   #error
+            if as_future:
+                return TaskFuture.failed("unsupported network_cfg")
+            return False
+        logger.debug("create_vm_simple data:")
+        logger.debug(data)
+        response=self.rest_call('POST','vms',data)
+        if as_future:
+            return self._task_future(response)
+        if response.status_code == 200 or response.status_code == 202:
+            logger.debug("create_vm_simple call success")
+            return response
+        logger.debug("create_vm_simple call failed")
+        logger.debug(repr(response))
+        return False 
+
+    def _resolve_bulk_specs(self,specs,report):
+        """
+        Replaces image_name,subnet_name,cluster_name,project_name in specs with uuids,
+        each distinct name is looked up once, owner_uuid defaults to current user.
+        Errors are written to report entries.
+        Returns:
+            list: create_vm_simple keyword arguments for each spec, None for failed specs
+        """
+        uuid_args={'image':'source_image_uuid','subnet':'subnet_uuid','cluster':'cluster_uuid','project':'project_uuid'}
+        resolved={}
+        owner_uuid=None
+        kwargs_list=[]
+        for spec,result in zip(specs,report):
+            kwargs=dict(spec)
+            try:
+                for kind,uuid_arg in uuid_args.items():
+                    name=kwargs.pop(f'{kind}_name',None)
+                    if name is None:
+                        continue
+                    if (kind,name) not in resolved:
+                        resolved[(kind,name)]=self._lookup_uuid(kind,name)
+                    if not resolved[(kind,name)]:
+                        raise ValueError(f"{kind} {name} not found or not unique")
+                    kwargs[uuid_arg]=resolved[(kind,name)]
+                if kwargs.get('owner_uuid') is None:
+                    if owner_uuid is None:
+                        owner_uuid=self.get_current_user_uuid()
+                    if not owner_uuid:
+                        raise ValueError("can not get current user uuid")
+                    kwargs['owner_uuid']=owner_uuid
+            except Exception as ex:
+                result["status"]="SUBMIT_FAILED"
+                result["error"]=repr(ex)
+                kwargs=None
+            kwargs_list.append(kwargs)
+        return kwargs_list
+
+    def _submit_vm(self,result,kwargs,rate_limiter):
+        """
+        Renders cloud-init and sends create VM request, stores vm_uuid in report entry
+        Returns:
+            tuple: (task_uuid, error)
+        """
+        try:
+            data=self._vm_simple_data(**kwargs)
+            if data is None:
+                return None,"unsupported network_cfg"
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+            response=self.rest_call('POST','vms',data)
+            if not (response.status_code == 200 or response.status_code == 202):
+                return None,f"HTTP {response.status_code}: {response.content[:500]}"
+            result_json=response.json()
+            result["vm_uuid"]=result_json.get('metadata',{}).get('uuid')
+            return self.get_task_uuid(result_json),None
+        except Exception as ex:
+            return None,repr(ex)
+
+    def _run_bulk(self,operation,report,jobs,concurrency,wait,timeout):
+        """
+        Submits jobs in pool of concurrency threads, then waits for all tasks together
+        and fills report entries with task_uuid, status and error.
+        Args:
+            operation (string): name used in errors and log, like "create"
+            report (list): report entries of all VMs
+            jobs (list): (report entry, submit, args), submit(*args) returns (task_uuid, error)
+        Returns:
+            list: report
+        """
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures={executor.submit(submit,*args):result for result,submit,args in jobs}
+            for future,result in futures.items():
+                task_uuid,error=future.result()
+                result["task_uuid"]=task_uuid
+                if error is not None:
+                    result["status"]="SUBMIT_FAILED"
+                    result["error"]=error
+                elif not task_uuid:
+                    #request was accepted, but outcome can not be tracked
+                    result["status"]="ERROR"
+                    result["error"]=f"{operation} response has no task uuid"
+                else:
+                    result["status"]="SUBMITTED"
+        by_task={result["task_uuid"]:result for result in report if result["task_uuid"]}
+        if wait and by_task:
+            try:
+                for task_uuid,task_status in self.wait_for_tasks(list(by_task),timeout=timeout):
+                    by_task[task_uuid]["status"]=task_status
+            except Exception as ex:
+                #VMs may still change, report tasks which were not seen finished
+                logger.warning(f"bulk {operation}: waiting for tasks failed: {repr(ex)}")
+                for result in by_task.values():
+                    if result["status"] == "SUBMITTED":
+                        result["status"]="ERROR"
+                        result["error"]=repr(ex)
+        counts={}
+        for result in report:
+            counts[result["status"]]=counts.get(result["status"],0)+1
+        logger.info(f"bulk {operation}: {len(report)} VMs, "+", ".join(f"{count} {status}" for status,count in counts.items()))
+        return report
+
+    def create_vms_bulk(self,specs,concurrency=10,rate_limit=None,wait=True,timeout=None):
+        """
+        Creates many VMs with create_vm_simple semantics.
+        Image/subnet/cluster/project names and owner are resolved once for all specs,
+        cloud-init rendering and create requests run in pool of concurrency threads,
+        optionally limited to rate_limit requests per second, then all tasks are waited together.
+        Failure of one VM does not stop others.
+
+        Args:
+            specs (list): dictionaries with create_vm_simple keyword arguments, instead of
+                          source_image_uuid,subnet_uuid,cluster_uuid,project_uuid may contain
+                          image_name,subnet_name,cluster_name,project_name.
+                          owner_uuid defaults to current user.
+            concurrency (int, optional): max parallel create requests. Defaults to 10.
+            rate_limit (float, optional): max create requests per second. Defaults to None (unlimited).
+            wait (bool, optional): wait for creation tasks. Defaults to True.
+            timeout (float, optional): deadline for waiting on tasks, see wait_for_tasks. Defaults to None.
+        Returns:
+            list: report entry for each spec, in order of specs:
+                {
+                vm_name
+                vm_uuid
+                task_uuid
+                status  (SUCCEEDED, FAILED, TIMEOUT, SUBMIT_FAILED,
+                         ERROR if task can not be tracked or waiting for it failed,
+                         SUBMITTED if wait is False)
+                error   (error description or None)
+                }
+        """
+        report=[{"vm_name":spec.get('vm_name'),"vm_uuid":None,"task_uuid":None,"status":None,"error":None}
+                for spec in specs]
+        kwargs_list=self._resolve_bulk_specs(specs,report)
+        rate_limiter=TokenBucket(rate_limit) if rate_limit else None
+        jobs=[(result,self._submit_vm,(result,kwargs,rate_limiter))
+              for kwargs,result in zip(kwargs_list,report) if kwargs is not None]
+        return self._run_bulk("create",report,jobs,concurrency,wait,timeout)
+
+    def _fleet_vm_uuids(self,vm_uuids,filter):
+        """
+        Returns list of VM uuids: given vm_uuids or uuids of VMs matching FIQL filter
+        """
+        if vm_uuids is not None:
+            return list(dict.fromkeys(vm_uuids))
+        if filter is None:
+            raise ValueError("vm_uuids or filter is required")
+        return [vm.uuid for vm in self.iter_vms(filter=filter,fields=('uuid',))]
+
+    def _submit_update(self,vm_uuid,mutations):
+        """
+        Sends update_vm for one VM of fleet operation
+        Returns:
+            tuple: (task_uuid, error)
+        """
+        try:
+            response=self.update_vm(vm_uuid,*mutations)
+            if response is False:
+                return None,"VM can not be read"
+            if not (response.status_code == 200 or response.status_code == 202):
+                return None,f"HTTP {response.status_code}: {response.content[:500]}"
+            return self.get_task_uuid(response.json()),None
+        except Exception as ex:
+            return None,repr(ex)
+
+    def update_vms(self,vm_uuids,*mutations,filter=None,concurrency=10,wait=True,timeout=None):
+        """
+        Applies same mutations (see update_vm) to many VMs.
+        Updates run in pool of concurrency threads, then all tasks are waited together.
+        Failure of one VM does not stop others.
+        Args:
+            vm_uuids (iterable): VM uuids, or None to select VMs by filter
+            mutations: callables changing VM spec, see nutanixapi.vmspec
+            filter (string, optional): FIQL filter selecting VMs if vm_uuids is None, like "power_state==off"
+            concurrency (int, optional): max parallel updates. Defaults to 10.
+            wait (bool, optional): wait for update tasks. Defaults to True.
+            timeout (float, optional): deadline for waiting on tasks, see wait_for_tasks. Defaults to None.
+        Returns:
+            list: report entry for each VM:
+                {
+                vm_uuid
+                task_uuid
+                status  (SUCCEEDED, FAILED, TIMEOUT, SUBMIT_FAILED,
+                         ERROR if task can not be tracked or waiting for it failed,
+                         SUBMITTED if wait is False)
+                error   (error description or None)
+                }
+        """
+        report=[{"vm_uuid":vm_uuid,"task_uuid":None,"status":None,"error":None}
+                for vm_uuid in self._fleet_vm_uuids(vm_uuids,filter)]
+        jobs=[(result,self._submit_update,(result["vm_uuid"],mutations)) for result in report]
+        return self._run_bulk("update",report,jobs,concurrency,wait,timeout)
+
+    def power_on_vms(self,vm_uuids=None,filter=None,concurrency=10,wait=True,timeout=None):
+        """
+        Powers on many VMs, see update_vms for arguments and report
+        """
+        return self.update_vms(vm_uuids,vmspec.set_power_state('ON'),filter=filter,
+                               concurrency=concurrency,wait=wait,timeout=timeout)
+
+    def power_off_vms(self,vm_uuids=None,filter=None,concurrency=10,wait=True,timeout=None):
+        """
+        Powers off many VMs, see update_vms for arguments and report
+        """
+        return self.update_vms(vm_uuids,vmspec.set_power_state('OFF'),filter=filter,
+                               concurrency=concurrency,wait=wait,timeout=timeout)
+
+    def resize_disks(self,vm_uuids,new_size,filter=None,disk_uuid=None,concurrency=10,wait=True,timeout=None):
+        """
+        Resizes disk of many VMs, see update_vms for other arguments and report
+        Args:
+            vm_uuids (iterable): VM uuids, or None to select VMs by filter
+            new_size (string or int): new size like "40G" or size in bytes
+            disk_uuid (string, optional): disk to resize. Defaults to None (system disk, SCSI 0 of every VM).
+        """
+        if disk_uuid is None:
+            mutation=vmspec.resize_system_disk(new_size)
+        else:
+            mutation=vmspec.resize_disk(disk_uuid,new_size)
+        return self.update_vms(vm_uuids,mutation,filter=filter,
+                               concurrency=concurrency,wait=wait,timeout=timeout)
+
+    def get_vm(self,vm_uuid,use_cache=True):
+        """
+        Returns VM as dictionary or None
+        Args:
+            vm_uuid (string): UUID of VM
+            use_cache (bool, optional): serve from VM cache if it is enabled. Defaults to True.
+        """
+        #"bebb4394-0073-4864-9c67-29db86e1c77d"
+        if self.vm_cache is not None and use_cache:
+            result_json=self.vm_cache.get(vm_uuid)
+            if result_json is not None:
+                return result_json
+        data={
+             "kind":"vm",
+             "length":self.max_results,
+             }   
+        logger.debug("get_vm data:{repr(data)}")
+        request_url='vms/%s' % vm_uuid 
+        logger.debug(f"request_url: {request_url}")
+        response=self.rest_call('GET',request_url,data)
+        result_json=None
+        if response.status_code == 200:
+            result_json = response.json()
+            if self.vm_cache is not None:
+                self.vm_cache.put(vm_uuid,result_json)
+        return result_json
+
+    def vm_cache_stats(self):
+        """
+        Returns VM cache hit/miss counters, None if VM cache is not enabled
+        """
+        return self.vm_cache.stats() if self.vm_cache is not None else None
+
+    
+
+    def get_disk0(self,vm_uuid):
+        """
+        from device list filter out device of type SCSI and device index 0
+        which must be system disk
+        Args:
+            vm_uuid String: UUID of VM
+
+        returns: 
+            dictinary of disk object
+            as Example:
+            {
+            'uuid':  'e194e540-d3b6-4668-a19f-bf98cb0ba140',
+            'disk_size_bytes':  2361393152,
+            'storage_config':  { 'storage_container_reference':  {'kind':  'storage_container','uuid':  '527ce9b6-a154-4f31-85b3-6fc7cfd2db44','name':  'SelfServiceContainer'}},
+            'device_properties':  {'disk_address':  {'device_index':  0,'adapter_type':  'SCSI'},'device_type':  'DISK'},
+            'data_source_reference':  {'kind':  'image','uuid':  'd7024166-9d1e-4e49-a424-864b04f1f836'},
+            'disk_size_mib':  2252
+            }
+        """
+        logger.debug(f"get_disk0: vm_uuid:{vm_uuid}")
+        result=self.get_vm(vm_uuid)
+        if result == False:
+            return None
+        return self._find_disk0(result)
+
+    def get_disk_address(self,vm_uuid,disk_uuid):
+        result=self.get_vm(vm_uuid)
+        if result == False:
+            return None
+        return self._find_disk_address(result,disk_uuid)
+
+    # def set_disk_size(self,vm_uuid,disk_uuid,disk_address,new_size_bytes):
+    #     data={ "updateSpec":
+    #             {"vmDiskClone":
+    #                 {
+    #                 "minimumSize":new_size_bytes,
+    #                 "vmDiskUuid":disk_uuid
+    #                 }
+    #             }
+    #     }
+    #     json_data=json.dumps(data)
+    #     urlencoded_diskaddress=urlencode(disk_address)
+    #     url=f"vms/{vm_uuid}/disks/{urlencoded_diskaddress}"
+    #     response=self.rest_call('PUT',url,data)
+    #     return response
+    def update_vm(self,vm_uuid,*mutations,max_conflict_retries=3,as_future=False):
+        """
+        Changes VM with one read-modify-write cycle: reads VM once, applies all mutations
+        (see nutanixapi.vmspec) to its spec and sends one PUT, so all changes are done
+        by one Prism task. If VM was changed by someone else meanwhile (409 spec_version
+        conflict), VM is read again and mutations are applied again.
+        Args:
+            vm_uuid (string): UUID of VM
+            mutations: callables changing spec dictionary in place, like vmspec.resize_disk(disk_uuid,"40G")
+            max_conflict_retries (int, optional): max repeats on 409 conflict. Defaults to 3.
+            as_future (bool, optional): return TaskFuture of update task, see track_task. Defaults to False.
+        Returns:
+            ApiResponse of PUT or False if VM can not be read
+        """
+        logger.debug(f"update_vm vm_uuid:{vm_uuid} mutations:{len(mutations)}")
+        attempt=0
+        while True:
+            #after conflict cached spec is stale
+            vm_data_json=self.get_vm(vm_uuid,use_cache=attempt == 0)
+            if vm_data_json is None:
+                return TaskFuture.failed(f"VM {vm_uuid} can not be read") if as_future else False
+            data=self._update_vm_data(vm_data_json,mutations)
+            response=self.rest_call('PUT',f"vms/{vm_uuid}",data)
+            if response.status_code != 409 or attempt >= max_conflict_retries:
+                return self._task_future(response) if as_future else response
+            attempt+=1
+            logger.warning(f"update_vm {vm_uuid} spec_version conflict, retry {attempt}")
+
+    def resize_vm_disk(self,vm_uuid,disk_uuid,new_size,as_future=False):
+        logger.debug(f"resize_vm_disk vm_uuid:{vm_uuid} disk_uuid:{disk_uuid} new_size:{new_size}")
+        return self.update_vm(vm_uuid,vmspec.resize_disk(disk_uuid,new_size),as_future=as_future)
+        
+         
+        
+    def get_task_status(self,task_uuid):
+        response=self.rest_call('GET',f"tasks/{task_uuid}")
+        #result_json = response.json()
+        return response
+
+    def _vm_set_power_state(self,vm_uuid,power_state,as_future=False):
+        logger.debug(f"_vm_set_power_state vm_uuid:{vm_uuid} power_state:{power_state}")
+        return self.update_vm(vm_uuid,vmspec.set_power_state(power_state),as_future=as_future)
+
+    def vm_poweron(self,vm_uuid,as_future=False):
+        logger.debug(f"vm_poweron vm_uuid:{vm_uuid}")
+        return self._vm_set_power_state(vm_uuid,'ON',as_future)
+
+    def vm_poweroff(self,vm_uuid,as_future=False):
+        logger.debug(f"vm_poweroff vm_uuid:{vm_uuid}")
+        return self._vm_set_power_state(vm_uuid,'OFF',as_future)
+
+    def track_task(self,task_uuid,response=None):
+        """
+        Returns TaskFuture of task, all tracked tasks are polled together by one
+        background thread (task_poller). Future result is task dictionary of
+        SUCCEEDED task, other final statuses raise TaskError from result(),
+        so failure does not stop process:
+            futures=[api.vm_poweron(vm_uuid,as_future=True) for vm_uuid in vm_uuids]
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    future.result()
+                except TaskError as ex:
+                    print(ex.task_uuid,ex.status)
+        """
+        return self.task_poller.track(task_uuid,response)
+
+    def _task_future(self,response):
+        """
+        Returns TaskFuture of task started by response
+        """
+        if not (response.status_code == 200 or response.status_code == 202):
+            return TaskFuture.failed(f"HTTP {response.status_code}: {response.content[:500]}",response)
+        task_uuid=self.get_task_uuid(response.json())
+        if task_uuid is None:
+            return TaskFuture.failed("response has no task uuid",response)
+        return self.track_task(task_uuid,response)
+
     def wait_for_task(self,task_uuid):
         """
         waits for Nutanix task to finish
@@ -688,15 +1597,105 @@ class NutanixAPI:
             task status  (SUCCEEDED or FAILED or smth else)
         """
         task_status="PENDING"
+        started=time.monotonic()
         while True:
             response_task=self.get_task_status(task_uuid)
             status_code_task=response_task.status_code
             if status_code_task==200 or status_code_task==202:
-                result_json_task = json.loads(response_task.content)
+                result_json_task = response_task.json()
                 task_status=result_json_task['status']
-                logging.debug(f"Task {task_uuid} status {task_status}")
+                logger.debug(f"Task {task_uuid} status {task_status}")
             else:
-                return('ERROR')
+                task_status='ERROR'
             if not ( task_status == 'PENDING' or task_status =='RUNNING'):
+                if self.metrics is not None:
+                    self.metrics.task_finished(task_status,time.monotonic()-started)
                 return task_status
-            time.sleep(1)   
\ No newline at end of file
+            time.sleep(1)
+
+    def _get_tasks(self,task_uuids):
+        """
+        Gets many tasks with one tasks/list call filtered by uuid,
+        tasks missing in list response are requested one by one
+        Args:
+            task_uuids (list): task uuids
+        Returns:
+            dict: task_uuid -> task dictionary (None if task can not be read)
+        """
+        tasks={}
+        data=self._list_data('task',length=len(task_uuids),
+                             filter=','.join(f'uuid=={task_uuid}' for task_uuid in task_uuids))
+        response=self.rest_call('POST','tasks/list',data)
+        if response.status_code == 200:
+            for task in response.json().get('entities',[]):
+                if task.get('uuid') in task_uuids:
+                    tasks[task['uuid']]=task
+        for task_uuid in task_uuids:
+            if task_uuid not in tasks:
+                response_task=self.get_task_status(task_uuid)
+                if response_task.status_code==200 or response_task.status_code==202:
+                    tasks[task_uuid]=response_task.json()
+                else:
+                    tasks[task_uuid]=None
+        return tasks
+
+    def _get_tasks_status(self,task_uuids):
+        """
+        Returns dict: task_uuid -> task status (ERROR if status can not be read)
+        """
+        return {task_uuid:task['status'] if task else 'ERROR'
+                for task_uuid,task in self._get_tasks(task_uuids).items()}
+
+    def wait_for_tasks(self,task_uuids,timeout=None,poll_interval=1,max_poll_interval=30,backoff=1.5,chunk_size=100):
+        """
+        waits for many Nutanix tasks at once and yields them as they finish.
+        All unfinished tasks are polled together (chunk_size uuids per tasks/list request),
+        interval between polls grows exponentially with random jitter
+        and is reset when some task finishes.
+        Args:
+            task_uuids (iterable): Nutanix task UUIDs
+            timeout (float, optional): overall deadline in seconds. Defaults to None (wait forever).
+            poll_interval (float, optional): first interval between polls. Defaults to 1.
+            max_poll_interval (float, optional): max interval between polls. Defaults to 30.
+            backoff (float, optional): interval multiplier after poll without finished tasks. Defaults to 1.5.
+            chunk_size (int, optional): max task uuids in one tasks/list request. Defaults to 100.
+        Yields:
+            tuple: (task_uuid, task status) - SUCCEEDED, FAILED, ERROR (status not readable),
+                   TIMEOUT (still running at deadline) or other final status
+        """
+        pending=list(dict.fromkeys(task_uuids))
+        started=time.monotonic()
+        deadline=None if timeout is None else started+timeout
+        interval=poll_interval
+        while pending:
+            statuses={}
+            for idx in range(0,len(pending),chunk_size):
+                statuses.update(self._get_tasks_status(pending[idx:idx+chunk_size]))
+            still_pending=[]
+            for task_uuid in pending:
+                task_status=statuses[task_uuid]
+                if task_status in TASK_IN_PROGRESS:
+                    still_pending.append(task_uuid)
+                else:
+                    logger.debug(f"Task {task_uuid} status {task_status}")
+                    if self.metrics is not None:
+                        self.metrics.task_finished(task_status,time.monotonic()-started)
+                    yield task_uuid,task_status
+            if len(still_pending) < len(pending):
+                interval=poll_interval
+            else:
+                interval=min(interval*backoff,max_poll_interval)
+            pending=still_pending
+            if not pending:
+                return
+            sleep_time=random.uniform(interval/2,interval)
+            if deadline is not None:
+                remaining=deadline-time.monotonic()
+                if remaining <= 0:
+                    for task_uuid in pending:
+                        if self.metrics is not None:
+                            self.metrics.task_finished('TIMEOUT',time.monotonic()-started)
+                        yield task_uuid,'TIMEOUT'
+                    return
+                sleep_time=min(sleep_time,remaining)
+            time.sleep(sleep_time)
@@ -0,0 +1,80 @@
+import threading
+import time
+
+class TokenBucket:
+    """
+    Thread safe token bucket rate limiter.
+    Bucket holds up to burst tokens and is refilled with rate tokens per second,
+    acquire() blocks until token is available.
+    """
+    def __init__(self,rate,burst=None):
+        """
+        Args:
+            rate (float): tokens (requests) per second
+            burst (float, optional): bucket size. Defaults to max(1,rate).
+        """
+        self.rate=float(rate)
+        self.burst=float(burst) if burst is not None else max(1.0,self.rate)
+        self._tokens=self.burst
+        self._updated=time.monotonic()
+        self._lock=threading.Lock()
+
+    def _refill(self,now):
+        self._tokens=min(self.burst,self._tokens+(now-self._updated)*self.rate)
+        self._updated=now
+
+    def acquire(self,tokens=1):
+        """
+        Takes tokens from bucket, waits if there are not enough tokens
+        """
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= tokens:
+                    self._tokens-=tokens
+                    return
+                wait=(tokens-self._tokens)/self.rate
+            time.sleep(wait)
+
+class AdaptiveConcurrency:
+    """
+    AIMD (additive increase, multiplicative decrease) limit of requests in flight.
+    Every successful request raises limit by 1/limit (about +1 per limit requests),
+    every overload response (429/503) multiplies it by decrease.
+    """
+    def __init__(self,max_limit,min_limit=1,decrease=0.5):
+        """
+        Args:
+            max_limit (int): max requests in flight, also starting limit
+            min_limit (int, optional): limit never goes below. Defaults to 1.
+            decrease (float, optional): limit multiplier on overload. Defaults to 0.5.
+        """
+        self.max_limit=float(max_limit)
+        self.min_limit=float(min_limit)
+        self.decrease=decrease
+        self.limit=self.max_limit
+        self.in_flight=0
+        self._cond=threading.Condition()
+
+    def acquire(self):
+        """
+        Waits until number of requests in flight is below current limit
+        """
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight+=1
+
+    def release(self,overloaded=False):
+        """
+        Marks request finished and adjusts limit
+        Args:
+            overloaded (bool, optional): server signalled overload. Defaults to False.
+        """
+        with self._cond:
+            self.in_flight-=1
+            if overloaded:
+                self.limit=max(self.min_limit,self.limit*self.decrease)
+            else:
+                self.limit=min(self.max_limit,self.limit+1/self.limit)
+            self._cond.notify_all()
@@ -0,0 +1,166 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+logger=logging.getLogger(__name__)
+
+TASK_IN_PROGRESS={'PENDING','QUEUED','RUNNING'}
+
+class TaskError(Exception):
+    """
+    Raised by TaskFuture.result() when task did not succeed or was not submitted
+    Attributes:
+        task_uuid (string): task uuid, None if request failed before task was created
+        status (string): final task status (FAILED, ERROR, ...) or SUBMIT_FAILED
+        task (dict): task as returned by API, None if not available
+        response: ApiResponse of submit request, None if not available
+    """
+    def __init__(self,message,task_uuid=None,status=None,task=None,response=None):
+        super().__init__(message)
+        self.task_uuid=task_uuid
+        self.status=status
+        self.task=task
+        self.response=response
+
+class TaskFuture(Future):
+    """
+    concurrent.futures.Future of Nutanix task, resolved by TaskPoller.
+    result() returns task dictionary of SUCCEEDED task and raises TaskError otherwise.
+    Standard tools work with it: add_done_callback, concurrent.futures.wait/as_completed.
+    Attributes:
+        task_uuid (string): task uuid
+        response: ApiResponse of request which started task (for example create_vm_simple)
+    """
+    def __init__(self,task_uuid,response=None):
+        super().__init__()
+        self.task_uuid=task_uuid
+        self.response=response
+
+    @classmethod
+    def failed(cls,message,response=None):
+        """
+        Returns future which already failed with SUBMIT_FAILED TaskError
+        """
+        future=cls(None,response)
+        future.set_exception(TaskError(message,status='SUBMIT_FAILED',response=response))
+        return future
+
+class TaskPoller:
+    """
+    One background thread polling all tracked tasks together (chunk_size uuids per call).
+    Thread is started when first task is tracked and ends when no task is pending.
+    Poll interval grows by backoff up to max_poll_interval while nothing finishes
+    and is reset when task finishes or new task is tracked.
+    """
+    def __init__(self,get_tasks,poll_interval=1,max_poll_interval=10,backoff=1.5,chunk_size=100,metrics=None):
+        """
+        Args:
+            get_tasks (callable): takes list of task uuids, returns dict uuid -> task dictionary or None
+            metrics (Metrics, optional): task wait times are recorded there. Defaults to None.
+        """
+        self.get_tasks=get_tasks
+        self.poll_interval=poll_interval
+        self.max_poll_interval=max_poll_interval
+        self.backoff=backoff
+        self.chunk_size=chunk_size
+        self.metrics=metrics
+        self._pending={}        #task_uuid -> list of (future, tracked at)
+        self._cond=threading.Condition()
+        self._thread=None
+        self._tracked_new=False
+        self._closed=False
+
+    def track(self,task_uuid,response=None):
+        """
+        Returns TaskFuture resolved when task finishes
+        """
+        future=TaskFuture(task_uuid,response)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("TaskPoller is closed")
+            self._pending.setdefault(task_uuid,[]).append((future,time.monotonic()))
+            self._tracked_new=True
+            if self._thread is None:
+                self._thread=threading.Thread(target=self._run,name="nutanixapi-task-poller",daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return future
+
+    def pending(self):
+        """
+        Returns number of tasks not finished yet
+        """
+        with self._cond:
+            return len(self._pending)
+
+    def close(self):
+        """
+        Stops polling and cancels futures of unfinished tasks
+        """
+        with self._cond:
+            self._closed=True
+            pending,self._pending=self._pending,{}
+            self._cond.notify_all()
+        for futures in pending.values():
+            for future,tracked_at in futures:
+                future.cancel()
+
+    def _poll(self,task_uuids):
+        tasks={}
+        for idx in range(0,len(task_uuids),self.chunk_size):
+            chunk=task_uuids[idx:idx+self.chunk_size]
+            try:
+                tasks.update(self.get_tasks(chunk))
+            except Exception as ex:
+                #tasks stay pending and are polled again
+                logger.warning(f"TaskPoller: polling {len(chunk)} tasks failed: {repr(ex)}")
+        return tasks
+
+    def _resolve(self,task_uuid,task,futures):
+        status=task.get('status','ERROR') if task else 'ERROR'
+        now=time.monotonic()
+        for future,tracked_at in futures:
+            if self.metrics is not None:
+                self.metrics.task_finished(status,now-tracked_at)
+            if not future.set_running_or_notify_cancel():
+                continue
+            if status == 'SUCCEEDED':
+                future.set_result(task)
+            else:
+                message=f"task {task_uuid} {status}"
+                if task and task.get('error_detail'):
+                    message+=f": {task['error_detail']}"
+                future.set_exception(TaskError(message,task_uuid,status,task,future.response))
+
+    def _run(self):
+        interval=self.poll_interval
+        while True:
+            with self._cond:
+                if self._closed or not self._pending:
+                    self._thread=None
+                    return
+                self._tracked_new=False
+                task_uuids=list(self._pending)
+            tasks=self._poll(task_uuids)
+            finished=[]
+            with self._cond:
+                for task_uuid,task in tasks.items():
+                    status=task.get('status') if task else 'ERROR'
+                    if status not in TASK_IN_PROGRESS and task_uuid in self._pending:
+                        finished.append((task_uuid,task,self._pending.pop(task_uuid)))
+            for task_uuid,task,futures in finished:
+                logger.debug(f"Task {task_uuid} finished")
+                self._resolve(task_uuid,task,futures)
+            if finished:
+                interval=self.poll_interval
+            else:
+                interval=min(interval*self.backoff,self.max_poll_interval)
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or self._tracked_new,
+                                    timeout=random.uniform(interval/2,interval))
+                if self._tracked_new and not self._closed:
+                    #new task gets first poll after poll_interval, not immediately
+                    interval=self.poll_interval
+                    self._cond.wait_for(lambda: self._closed,timeout=random.uniform(interval/2,interval))
@@ -0,0 +1,76 @@
+import logging
+import os
+import threading
+from base64 import b64encode
+from collections import OrderedDict
+
+logger=logging.getLogger(__name__)
+
+MANAGED_TEMPLATE="cloud-init.yaml.j2"
+UNMANAGED_TEMPLATE="cloud-init-net.yaml.j2"
+NETWORK_TEMPLATE="static.yaml.j2"
+NETWORK_CFG_KEYS=('ip_address','prefix','default_gw','dns_server1','dns_server2','dns_search')
+
+class CloudInitTemplates:
+    """
+    cloud-init templates of one template_dir.
+    Each template is read and compiled once (jinja2 Environment cache) and reloaded
+    when file modification time changes. Base64 user_data is memoized by network
+    configuration, so same configuration is rendered only once.
+    """
+    def __init__(self,template_dir,bytecode_cache_dir=None,max_memoized=1024):
+        """
+        Args:
+            template_dir (string): directory with cloud-init templates
+            bytecode_cache_dir (string, optional): directory where compiled templates are stored
+                                                   between runs. Defaults to None (no on-disk cache).
+            max_memoized (int, optional): max number of memoized user_data values. Defaults to 1024.
+        """
+        from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache   #imported on first use
+        self.template_dir=template_dir
+        bytecode_cache=FileSystemBytecodeCache(bytecode_cache_dir) if bytecode_cache_dir else None
+        self.env=Environment(loader=FileSystemLoader(template_dir),auto_reload=True,bytecode_cache=bytecode_cache)
+        self.max_memoized=max_memoized
+        self._memo=OrderedDict()
+        self._lock=threading.Lock()
+
+    def _mtime(self,template_name):
+        return os.path.getmtime(os.path.join(self.template_dir,template_name))
+
+    def _memoized(self,key,render):
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+        user_data=render()
+        with self._lock:
+            self._memo[key]=user_data
+            if len(self._memo) > self.max_memoized:
+                self._memo.popitem(last=False)
+        return user_data
+
+    def user_data_managed(self):
+        """
+        Returns base64 encoded cloud-init for Nutanix managed networks
+        """
+        def render():
+            rendered_template=self.env.get_template(MANAGED_TEMPLATE).render()
+            return b64encode(rendered_template.encode()).decode('ascii')
+        key=('managed',self._mtime(MANAGED_TEMPLATE))
+        return self._memoized(key,render)
+
+    def user_data_unmanaged(self,net_cfg):
+        """
+        Returns base64 encoded cloud-init with static network configuration
+        Args:
+            net_cfg (Dict): network configuration, see NutanixAPIBase._prepare_user_data_unmanaged
+        """
+        values={key:net_cfg[key] for key in NETWORK_CFG_KEYS}
+        def render():
+            rendered_net_template=self.env.get_template(NETWORK_TEMPLATE).render(**values)
+            b64_str=b64encode(rendered_net_template.encode()).decode('ascii')
+            rendered_ci_template=self.env.get_template(UNMANAGED_TEMPLATE).render(netplan_content=b64_str)
+            logger.debug(f"rendered user data for {values}")
+            return b64encode(rendered_ci_template.encode()).decode('ascii')
+        key=('unmanaged',tuple(values.values()),self._mtime(UNMANAGED_TEMPLATE),self._mtime(NETWORK_TEMPLATE))
+        return self._memoized(key,render)
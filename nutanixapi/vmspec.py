@@ -0,0 +1,119 @@
+"""
+VM spec mutations for NutanixAPI.update_vm.
+Every function returns mutation: callable which changes VM spec dictionary in place,
+so any number of changes is applied to one spec and sent with one PUT:
+
+    api.update_vm(vm_uuid,
+                  resize_disk(disk_uuid,"40G"),
+                  set_cpu(num_sockets=4),
+                  set_memory(8192),
+                  set_power_state("ON"))
+"""
+
+def _parse_size(size):
+    """
+    Returns size in bytes of string like "20G" or number
+    """
+    if isinstance(size,str):
+        import humanfriendly    #imported on first use
+        return humanfriendly.parse_size(size)
+    return int(size)
+
+def _find(items,item_uuid,what):
+    for item in items:
+        if item.get('uuid') == item_uuid:
+            return item
+    raise ValueError(f"{what} {item_uuid} not found in VM spec")
+
+def resize_disk(disk_uuid,new_size):
+    """
+    Sets size of disk
+    Args:
+        disk_uuid (string): uuid of disk
+        new_size (string or int): new size like "20G" or size in bytes
+    """
+    new_size_in_bytes=_parse_size(new_size)
+    def mutation(spec):
+        _find(spec['resources']['disk_list'],disk_uuid,"disk")['disk_size_bytes']=new_size_in_bytes
+    return mutation
+
+def resize_system_disk(new_size):
+    """
+    Sets size of system disk (SCSI disk with device index 0)
+    Args:
+        new_size (string or int): new size like "20G" or size in bytes
+    """
+    new_size_in_bytes=_parse_size(new_size)
+    def mutation(spec):
+        for disk in spec['resources']['disk_list']:
+            device_properties=disk.get('device_properties',{})
+            disk_address=device_properties.get('disk_address',{})
+            if (device_properties.get('device_type') == 'DISK' and
+                disk_address.get('adapter_type') == 'SCSI' and disk_address.get('device_index') == 0):
+                disk['disk_size_bytes']=new_size_in_bytes
+                return
+        raise ValueError("system disk (SCSI 0) not found in VM spec")
+    return mutation
+
+def set_power_state(power_state):
+    """
+    Sets power state, ON or OFF
+    """
+    def mutation(spec):
+        spec['resources']['power_state']=power_state
+    return mutation
+
+def set_cpu(num_sockets=None,num_vcpus_per_socket=None,num_threads_per_core=None):
+    """
+    Sets given CPU topology values, None values are not changed
+    """
+    values={'num_sockets':num_sockets,
+            'num_vcpus_per_socket':num_vcpus_per_socket,
+            'num_threads_per_core':num_threads_per_core}
+    def mutation(spec):
+        for name,value in values.items():
+            if value is not None:
+                spec['resources'][name]=value
+    return mutation
+
+def set_memory(memory_size_mib):
+    """
+    Sets memory size in MiB
+    """
+    def mutation(spec):
+        spec['resources']['memory_size_mib']=memory_size_mib
+    return mutation
+
+def add_nic(subnet_uuid,ip_address=None,is_connected=True):
+    """
+    Adds NIC in subnet, with ip_address or DHCP address if ip_address is None
+    """
+    def mutation(spec):
+        if ip_address is None:
+            ip_endpoint_list=[{"ip_type":"DHCP"}]
+        else:
+            ip_endpoint_list=[{"ip":ip_address,"type":"ASSIGNED"}]
+        spec['resources'].setdefault('nic_list',[]).append({
+            "nic_type":"NORMAL_NIC",
+            "is_connected":is_connected,
+            "ip_endpoint_list":ip_endpoint_list,
+            "subnet_reference":{"kind":"subnet","uuid":subnet_uuid}
+            })
+    return mutation
+
+def remove_nic(nic_uuid):
+    """
+    Removes NIC with nic_uuid
+    """
+    def mutation(spec):
+        nic_list=spec['resources'].get('nic_list',[])
+        nic_list.remove(_find(nic_list,nic_uuid,"nic"))
+    return mutation
+
+def set_nic_connected(nic_uuid,is_connected=True):
+    """
+    Connects or disconnects NIC
+    """
+    def mutation(spec):
+        _find(spec['resources'].get('nic_list',[]),nic_uuid,"nic")['is_connected']=is_connected
+    return mutation
@@ -24,5 +24,7 @@ setup(name='nutanixapi',
       classifiers=classifiers,
       keywords='',
       packages=find_packages(),
-      install_requires=['urllib3','requests','jinja2','pathlib','sphinx','humanfriendly']
+      python_requires='>=3.9',
+      install_requires=['urllib3','requests','jinja2','pathlib','sphinx','humanfriendly'],
+      extras_require={'async':['aiohttp'],'fast':['orjson']}
      )
@@ -0,0 +1,34 @@
+import logging
+
+import pytest
+
+from nutanixapi.nutanixapi import NutanixAPI
+from mockserver import MockPrismCentral
+
+@pytest.fixture
+def mock():
+    with MockPrismCentral(vms=20,images=5,subnets=3) as server:
+        yield server
+
+@pytest.fixture
+def make_api(mock):
+    """
+    Returns factory of NutanixAPI objects connected to mock, all are closed after test
+    """
+    apis=[]
+    def factory(url=None,**kwargs):
+        kwargs.setdefault('retry_backoff',0.01)
+        api=NutanixAPI(url or mock.url,'admin','secret',None,logging.WARNING,**kwargs)
+        apis.append(api)
+        return api
+    yield factory
+    for api in apis:
+        api.close()
+
+@pytest.fixture
+def api(make_api):
+    return make_api()
+
+@pytest.fixture
+def vm_uuid(mock):
+    return next(iter(mock.entities['vm']))
@@ -0,0 +1,444 @@
+import copy
+import gzip
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import unquote
+
+from nutanixapi.metrics import endpoint_name
+
+API_PREFIX='/api/nutanix/v3/'
+KINDS=('vm','image','subnet','cluster','project')
+
+def _now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version='HTTP/1.1'
+    disable_nagle_algorithm=True
+    mock=None   #MockPrismCentral, set in subclass
+
+    def log_message(self,format,*args):
+        pass
+
+    def _body(self):
+        length=int(self.headers.get('Content-Length',0))
+        raw=self.rfile.read(length) if length else b''
+        encoding=self.headers.get('Content-Encoding','identity').lower()
+        if encoding == 'gzip':
+            data=gzip.decompress(raw)
+        elif encoding == 'identity':
+            data=raw
+        else:
+            raise LookupError(encoding)
+        self.mock._transferred('request',len(data),len(raw),encoding == 'gzip')
+        return json.loads(data) if data else None
+
+    def _accepts_gzip(self):
+        for encoding in self.headers.get('Accept-Encoding','').lower().split(','):
+            name,_,params=encoding.partition(';')
+            if name.strip() == 'gzip':
+                return params.replace(' ','') not in {'q=0','q=0.0','q=0.00','q=0.000'}
+        return False
+
+    def _handle(self,method):
+        path=self.path.split('?')[0]
+        if not path.startswith(API_PREFIX):
+            return self._send(404,{"message":f"unknown path {path}"})
+        try:
+            body=self._body()
+        except LookupError as ex:
+            return self._send(415,{"message":f"unsupported Content-Encoding {ex}"})
+        except (ValueError,OSError,EOFError):   #invalid JSON or gzip data
+            return self._send(400,{"message":"invalid request body"})
+        self.mock._delay()
+        error=self.mock._injected_error(method,path[len(API_PREFIX):])
+        if error is not None:
+            status,retry_after=error
+            return self._send(status,{"message":"injected error"},
+                              {'Retry-After':str(retry_after)} if retry_after is not None else None)
+        status,result=self.mock.dispatch(method,path[len(API_PREFIX):],body)
+        self._send(status,result)
+
+    def _send(self,status,result,headers=None):
+        data=json.dumps(result).encode('utf-8')
+        gzip_min_size=self.mock.gzip_min_size
+        compressed=gzip_min_size is not None and len(data) >= gzip_min_size and self._accepts_gzip()
+        out=gzip.compress(data,compresslevel=6) if compressed else data
+        self.mock._transferred('response',len(data),len(out),compressed)
+        self.send_response(status)
+        self.send_header('Content-Type','application/json')
+        if compressed:
+            self.send_header('Content-Encoding','gzip')
+        for name,value in (headers or {}).items():
+            self.send_header(name,value)
+        self.send_header('Content-Length',str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+class MockPrismCentral:
+    """
+    Fake Prism Central v3 API server used by tests and benchmarks.
+    Implements <kind>s/list (offset, length, simple FIQL filter, sorting) for
+    vm, image, subnet, cluster and project, vms POST/GET/PUT (with spec_version
+    conflict check), tasks/{uuid}, tasks/list, users/me and batch.
+    Tasks stay RUNNING for task_duration seconds, then SUCCEEDED.
+    inject_error makes next requests fail with given status (429, 503, ...).
+    Responses are gzip compressed when client accepts it, gzip request bodies
+    (Content-Encoding: gzip) are decoded, transferred bytes are counted in transfer.
+
+        with MockPrismCentral(vms=1000,latency=0.02) as mock:
+            api=NutanixAPI(mock.url,'admin','secret',None,logging.WARNING)
+            api.list_vms()
+            print(mock.requests)
+    """
+    def __init__(self,vms=100,images=10,subnets=5,clusters=2,projects=3,
+                 latency=0,max_page_size=500,task_duration=0,task_failure_rate=0,
+                 gzip_min_size=1024,bandwidth=None,sorting=True,seed=0,host='127.0.0.1',port=0):
+        """
+        Args:
+            vms,images,subnets,clusters,projects (int, optional): inventory sizes
+            latency (float or tuple, optional): delay of every response in seconds,
+                                                or (min,max) for random delay. Defaults to 0.
+            max_page_size (int, optional): max entities returned by one list call. Defaults to 500.
+            task_duration (float, optional): seconds until task finishes. Defaults to 0.
+            task_failure_rate (float, optional): fraction of tasks which end FAILED. Defaults to 0.
+            gzip_min_size (int, optional): responses of at least this many bytes are gzip compressed
+                                           if client sends Accept-Encoding: gzip, None disables
+                                           compression. Defaults to 1024.
+            bandwidth (float, optional): simulated link speed in bytes per second, request and
+                                         response are delayed by their size on wire. Defaults to None.
+            sorting (bool, optional): sort list results by sort_attribute (and echo it in metadata),
+                                      False ignores sorting like servers without support. Defaults to True.
+            seed (int, optional): seed of generated uuids and random choices. Defaults to 0.
+            host (string, optional): listen address. Defaults to '127.0.0.1'.
+            port (int, optional): listen port. Defaults to 0 (any free port).
+        """
+        self.latency=latency
+        self.max_page_size=max_page_size
+        self.task_duration=task_duration
+        self.task_failure_rate=task_failure_rate
+        self.gzip_min_size=gzip_min_size
+        self.bandwidth=bandwidth
+        self.sorting=sorting
+        self.random=random.Random(seed)
+        self.entities={kind:{} for kind in KINDS}
+        self.tasks={}
+        self.user_uuid=self._uuid()
+        self.requests=Counter()     #(method,endpoint) -> count
+        self.transfer=Counter()     #request/response _bytes (JSON), _wire_bytes (sent) and _gzip (count)
+        self._lock=threading.Lock()
+        self._errors=deque()        #(status, retry_after) returned instead of next responses
+        self._populate(clusters=clusters,projects=projects,images=images,subnets=subnets,vms=vms)
+        handler=type('Handler',(_Handler,),{'mock':self})
+        self.server=ThreadingHTTPServer((host,port),handler)
+        self.server.daemon_threads=True
+        self._thread=None
+
+    @property
+    def url(self):
+        host,port=self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread=threading.Thread(target=self.server.serve_forever,kwargs={'poll_interval':0.05},daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self,exc_type,exc_value,traceback):
+        self.stop()
+        return False
+
+    def _uuid(self):
+        return str(uuid.UUID(int=self.random.getrandbits(128),version=4))
+
+    def _delay(self):
+        latency=self.latency
+        if isinstance(latency,tuple):
+            with self._lock:
+                latency=self.random.uniform(*latency)
+        if latency:
+            time.sleep(latency)
+
+    def inject_error(self,status,count=1,retry_after=None):
+        """
+        Next count requests (any endpoint) get status instead of normal response
+        Args:
+            status (int): HTTP status, like 429 or 503
+            count (int, optional): number of failed requests. Defaults to 1.
+            retry_after (float or string, optional): Retry-After header value. Defaults to None.
+        """
+        with self._lock:
+            self._errors.extend([(status,retry_after)]*count)
+
+    def _injected_error(self,method,sub_url):
+        with self._lock:
+            if not self._errors:
+                return None
+            self.requests[(method,endpoint_name(sub_url))]+=1
+            return self._errors.popleft()
+
+    def _transferred(self,direction,size,wire_size,compressed):
+        with self._lock:
+            self.transfer[f"{direction}_bytes"]+=size
+            self.transfer[f"{direction}_wire_bytes"]+=wire_size
+            self.transfer[f"{direction}_gzip"]+=int(compressed)
+        if self.bandwidth:
+            time.sleep(wire_size/self.bandwidth)
+
+    #inventory
+    def add_entity(self,kind,name,resources=None,cluster_uuid=None,project_uuid=None):
+        """
+        Adds entity to inventory
+        Returns:
+            dict: entity as returned by API
+        """
+        entity_uuid=self._uuid()
+        spec={"name":name,"resources":resources or {}}
+        if cluster_uuid is not None:
+            spec["cluster_reference"]={"kind":"cluster","uuid":cluster_uuid}
+        metadata={"kind":kind,"uuid":entity_uuid,"spec_version":0,
+                  "creation_time":_now(),"last_update_time":_now()}
+        if project_uuid is not None:
+            metadata["project_reference"]={"kind":"project","uuid":project_uuid}
+        entity={"spec":spec,"metadata":metadata}
+        self._update_status(entity)
+        self.entities[kind][entity_uuid]=entity
+        return entity
+
+    def _populate(self,clusters,projects,images,subnets,vms):
+        cluster_uuids=[self.add_entity('cluster',f"cluster-{idx}")['metadata']['uuid'] for idx in range(clusters)]
+        project_uuids=[self.add_entity('project',f"project-{idx}")['metadata']['uuid'] for idx in range(projects)]
+        image_uuids=[self.add_entity('image',f"image-{idx}",{"image_type":"DISK_IMAGE","size_bytes":10*2**30})['metadata']['uuid']
+                     for idx in range(images)]
+        subnet_uuids=[]
+        for idx in range(subnets):
+            subnet=self.add_entity('subnet',f"subnet-{idx}",{"subnet_type":"VLAN","vlan_id":100+idx},
+                                   self.random.choice(cluster_uuids) if cluster_uuids else None)
+            subnet_uuids.append(subnet['metadata']['uuid'])
+        for idx in range(vms):
+            disk={"device_properties":{"device_type":"DISK","disk_address":{"device_index":0,"adapter_type":"SCSI"}},
+                  "disk_size_bytes":20*2**30}
+            if image_uuids:
+                disk["data_source_reference"]={"kind":"image","uuid":self.random.choice(image_uuids)}
+            nic={"nic_type":"NORMAL_NIC","is_connected":True,"ip_endpoint_list":[{"ip_type":"DHCP"}]}
+            if subnet_uuids:
+                nic["subnet_reference"]={"kind":"subnet","uuid":self.random.choice(subnet_uuids)}
+            resources={
+                "num_sockets":self.random.choice((1,2,4)),
+                "num_vcpus_per_socket":1,
+                "num_threads_per_core":1,
+                "memory_size_mib":self.random.choice((1024,2048,4096,8192)),
+                "power_state":self.random.choice(("ON","OFF")),
+                "disk_list":[disk,{"device_properties":{"device_type":"CDROM",
+                                                        "disk_address":{"device_index":1,"adapter_type":"IDE"}}}],
+                "nic_list":[nic],
+                }
+            self.add_entity('vm',f"vm-{idx}",resources,
+                            self.random.choice(cluster_uuids) if cluster_uuids else None,
+                            self.random.choice(project_uuids) if project_uuids else None)
+
+    def _update_status(self,entity):
+        """
+        Sets entity status from spec, assigns uuids to new disks and nics
+        """
+        spec=entity['spec']
+        resources=spec.get('resources',{})
+        for disk in resources.get('disk_list',[]):
+            disk.setdefault('uuid',self._uuid())
+            if disk.get('device_properties',{}).get('device_type') == 'DISK':
+                disk.setdefault('disk_size_bytes',20*2**30)
+                disk['disk_size_mib']=disk['disk_size_bytes']//2**20
+        for nic in resources.get('nic_list',[]):
+            nic.setdefault('uuid',self._uuid())
+        if entity['metadata']['kind'] == 'vm':
+            resources.setdefault('power_state','OFF')
+        status=copy.deepcopy(spec)
+        status['state']='COMPLETE'
+        entity['status']=status
+
+    #tasks
+    def _task(self,kind,entity_uuid,operation):
+        task_uuid=self._uuid()
+        failed=self.task_failure_rate and self.random.random() < self.task_failure_rate
+        self.tasks[task_uuid]={
+            "uuid":task_uuid,
+            "operation_type":operation,
+            "entity_reference_list":[{"kind":kind,"uuid":entity_uuid}],
+            "creation_time":_now(),
+            "_created":time.monotonic(),
+            "_final":"FAILED" if failed else "SUCCEEDED",
+            }
+        return task_uuid
+
+    def _task_view(self,task):
+        elapsed=time.monotonic()-task['_created']
+        view={key:value for key,value in task.items() if not key.startswith('_')}
+        if elapsed < self.task_duration:
+            view['status']='RUNNING'
+            view['percentage_complete']=int(100*elapsed/self.task_duration)
+        else:
+            view['status']=task['_final']
+            view['percentage_complete']=100
+        return view
+
+    #request handling
+    def dispatch(self,method,sub_url,body):
+        """
+        Handles request to sub_url (relative to /api/nutanix/v3/)
+        Returns:
+            tuple: (HTTP status, result dictionary)
+        """
+        with self._lock:
+            self.requests[(method,endpoint_name(sub_url))]+=1
+            parts=sub_url.strip('/').split('/')
+            if method == 'POST' and len(parts) == 2 and parts[1] == 'list':
+                return self._list(parts[0],body or {})
+            if method == 'POST' and parts == ['vms']:
+                return self._create_vm(body or {})
+            if parts[0] == 'vms' and len(parts) == 2:
+                if method == 'GET':
+                    return self._get_vm(parts[1])
+                if method == 'PUT':
+                    return self._update_vm(parts[1],body or {})
+                if method == 'DELETE':
+                    return self._delete_vm(parts[1])
+            if method == 'GET' and parts[0] == 'tasks' and len(parts) == 2:
+                task=self.tasks.get(parts[1])
+                if task is None:
+                    return self._error(404,f"task {parts[1]} not found")
+                return 200,self._task_view(task)
+            if method == 'GET' and parts == ['users','me']:
+                return 200,{"metadata":{"kind":"user","uuid":self.user_uuid},"spec":{},"status":{"name":"admin"}}
+        if method == 'POST' and parts == ['batch']:
+            return self._batch(body or {})
+        return self._error(404,f"unsupported {method} {sub_url}")
+
+    @staticmethod
+    def _error(status,message):
+        return status,{"state":"ERROR","code":status,"message_list":[{"message":message}]}
+
+    @staticmethod
+    def _attribute(entity,attribute):
+        if attribute in {'name','vm_name'}:
+            return entity['spec'].get('name')
+        if attribute in entity['metadata']:
+            return entity['metadata'][attribute]
+        return entity.get('status',{}).get('resources',{}).get(attribute)
+
+    def _matches(self,entity,fiql):
+        """
+        Evaluates simple FIQL filter: ; (and) and , (or) of attribute==value terms
+        """
+        for conjunction in fiql.split(';'):
+            for term in conjunction.split(','):
+                attribute,_,value=term.partition('==')
+                actual=self._attribute(entity,attribute)
+                if actual is not None and str(actual).lower() == unquote(value).lower():
+                    break
+            else:
+                return False
+        return True
+
+    def _list(self,collection,body):
+        if collection == 'tasks':
+            entities=[self._task_view(task) for task in self.tasks.values()
+                      if not body.get('filter') or any(term.partition('==')[2] == task['uuid']
+                                                         for term in body['filter'].split(','))]
+            return 200,{"entities":entities,"metadata":{"kind":"task","total_matches":len(entities),"length":len(entities)}}
+        kind=collection[:-1]
+        if kind not in self.entities:
+            return self._error(404,f"unknown collection {collection}")
+        entities=list(self.entities[kind].values())
+        if body.get('filter'):
+            entities=[entity for entity in entities if self._matches(entity,body['filter'])]
+        metadata={"kind":kind,"total_matches":len(entities)}
+        if body.get('sort_attribute') and self.sorting:
+            attribute=body['sort_attribute']
+            sort_order=body.get('sort_order','ASCENDING')
+            entities.sort(key=lambda entity: str(self._attribute(entity,attribute) or ''),
+                          reverse=sort_order == 'DESCENDING')
+            metadata.update(sort_attribute=attribute,sort_order=sort_order)
+        offset=body.get('offset',0)
+        length=min(body.get('length',20),self.max_page_size)
+        page=entities[offset:offset+length]
+        metadata.update(offset=offset,length=len(page))
+        return 200,{"api_version":"3.1","metadata":metadata,"entities":page}
+
+    def _create_vm(self,body):
+        spec=body.get('spec')
+        if not spec or not spec.get('name'):
+            return self._error(422,"spec.name is required")
+        vm_uuid=self._uuid()
+        metadata=dict(body.get('metadata',{}),kind='vm',uuid=vm_uuid,spec_version=0,
+                      creation_time=_now(),last_update_time=_now())
+        metadata.pop('name',None)
+        vm={"spec":copy.deepcopy(spec),"metadata":metadata}
+        self._update_status(vm)
+        self.entities['vm'][vm_uuid]=vm
+        task_uuid=self._task('vm',vm_uuid,'VM.CREATE')
+        return 202,{"spec":vm['spec'],"metadata":metadata,
+                    "status":{"state":"PENDING","execution_context":{"task_uuid":task_uuid}}}
+
+    def _get_vm(self,vm_uuid):
+        vm=self.entities['vm'].get(vm_uuid)
+        if vm is None:
+            return self._error(404,f"vm {vm_uuid} not found")
+        return 200,dict(vm,api_version="3.1")
+
+    def _update_vm(self,vm_uuid,body):
+        vm=self.entities['vm'].get(vm_uuid)
+        if vm is None:
+            return self._error(404,f"vm {vm_uuid} not found")
+        if 'spec' not in body:
+            return self._error(422,"spec is required")
+        spec_version=body.get('metadata',{}).get('spec_version')
+        if spec_version != vm['metadata']['spec_version']:
+            return self._error(409,f"spec_version {spec_version} does not match {vm['metadata']['spec_version']}")
+        vm['spec']=copy.deepcopy(body['spec'])
+        vm['metadata']['spec_version']+=1
+        vm['metadata']['last_update_time']=_now()
+        self._update_status(vm)
+        task_uuid=self._task('vm',vm_uuid,'VM.UPDATE')
+        return 202,{"spec":vm['spec'],"metadata":vm['metadata'],
+                    "status":{"state":"PENDING","execution_context":{"task_uuid":task_uuid}}}
+
+    def _delete_vm(self,vm_uuid):
+        if self.entities['vm'].pop(vm_uuid,None) is None:
+            return self._error(404,f"vm {vm_uuid} not found")
+        task_uuid=self._task('vm',vm_uuid,'VM.DELETE')
+        return 202,{"status":{"state":"DELETE_PENDING","execution_context":{"task_uuid":task_uuid}}}
+
+    def _batch(self,body):
+        responses=[]
+        for api_request in body.get('api_request_list',[]):
+            path=api_request.get('path_and_params','')
+            if path.startswith(API_PREFIX):
+                path=path[len(API_PREFIX):]
+            status,result=self.dispatch(api_request.get('operation','GET'),path,api_request.get('body'))
+            responses.append({"status":str(status),"api_response":result,"path_and_params":api_request.get('path_and_params')})
+        return 200,{"api_response_list":responses}
@@ -0,0 +1,103 @@
+import threading
+import time
+
+from nutanixapi.cache import NameIndexCache,VMCache
+
+def entity(name,uuid):
+    return {"spec":{"name":name},"metadata":{"uuid":uuid}}
+
+class Loader:
+    def __init__(self,*entities):
+        self.entities=list(entities)
+        self.calls=0
+        self.release=threading.Event()
+        self.release.set()
+        self.error=None
+
+    def __call__(self,kind):
+        self.calls+=1
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return list(self.entities)
+
+def wait_until(condition,timeout=5):
+    deadline=time.monotonic()+timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_index_is_built_once_and_detects_duplicates():
+    loader=Loader(entity("a","uuid-a"),entity("dup","uuid-1"),entity("dup","uuid-2"))
+    cache=NameIndexCache(loader,ttl=60)
+    assert cache.lookup("image","a") == "uuid-a"
+    assert cache.lookup("image","dup") is False
+    assert cache.lookup("image","missing") is False
+    assert loader.calls == 1
+    cache.invalidate("image")
+    assert cache.lookup("image","a") == "uuid-a"
+    assert loader.calls == 2
+
+def test_expired_index_is_served_stale_while_refreshing():
+    loader=Loader(entity("a","uuid-a"))
+    cache=NameIndexCache(loader,ttl=0.05)
+    assert cache.lookup("image","a") == "uuid-a"
+    time.sleep(0.06)
+    loader.entities=[entity("a","uuid-new")]
+    loader.release.clear()
+    assert cache.lookup("image","a") == "uuid-a"    #refresh is blocked, stale entry is returned
+    wait_until(lambda: loader.calls == 2)
+    assert cache.lookup("image","a") == "uuid-a"
+    assert loader.calls == 2                        #one refresh at a time
+    loader.release.set()
+    wait_until(lambda: cache.lookup("image","a") == "uuid-new")
+
+def test_failed_refresh_keeps_stale_index():
+    loader=Loader(entity("a","uuid-a"))
+    cache=NameIndexCache(loader,ttl=0.05)
+    assert cache.lookup("image","a") == "uuid-a"
+    time.sleep(0.06)
+    loader.error=ConnectionError("down")
+    assert cache.lookup("image","a") == "uuid-a"
+    wait_until(lambda: loader.calls == 2 and not cache._refreshing)
+    assert cache.lookup("image","a") == "uuid-a"
+
+def test_synchronous_refresh_rebuilds_expired_index():
+    loader=Loader(entity("a","uuid-a"))
+    cache=NameIndexCache(loader,ttl=0.05,background_refresh=False)
+    cache.lookup("image","a")
+    time.sleep(0.06)
+    loader.entities=[entity("a","uuid-new")]
+    assert cache.lookup("image","a") == "uuid-new"
+
+def test_api_lookups_use_name_index(make_api,mock):
+    api=make_api(name_cache_ttl=60)
+    images=list(mock.entities['image'].items())
+    for image_uuid,image in images:
+        assert api.get_image_uuid(image['spec']['name']) == image_uuid
+    assert mock.requests[('POST','images/list')] == 1
+
+def vm(uuid,spec_version):
+    return {"metadata":{"uuid":uuid,"spec_version":spec_version}}
+
+def test_vm_cache_rejects_vm_older_than_observed():
+    cache=VMCache(ttl=60)
+    cache.observe("a",3)
+    cache.put("a",vm("a",2))
+    assert cache.get("a") is None
+    cache.put("a",vm("a",3))
+    assert cache.get("a") == vm("a",3)
+
+def test_vm_cache_forgets_observed_versions():
+    cache=VMCache(ttl=0.05)
+    for idx in range(100):
+        cache.observe(f"vm-{idx}",1)
+    cache.invalidate("vm-0")
+    assert "vm-0" not in cache._min_spec_versions
+    time.sleep(0.06)
+    cache.put("vm-1",vm("vm-1",0))      #observed version expired with ttl
+    assert cache.get("vm-1") == vm("vm-1",0)
+    cache.observe("other",1)
+    assert list(cache._min_spec_versions) == ["other"]
+    cache.invalidate()
+    assert not cache._min_spec_versions
@@ -0,0 +1,51 @@
+import pytest
+
+from nutanixapi.cassette import Cassette
+
+REPLAY_URL="http://nowhere.invalid"
+
+def workload(api,vm_uuid):
+    return {
+        "user":api.get_current_user_uuid(),
+        "image":api.get_image_uuid("image-1"),
+        "vms":[vm['metadata']['uuid'] for vm in api.iter_vms(page_size=6)],
+        "streamed":[vm['metadata']['uuid'] for vm in api.iter_vms(page_size=6,stream=True)],
+        "power":api.vm_poweroff(vm_uuid).status_code,
+        "vm":api.get_vm(vm_uuid)['spec']['resources']['power_state'],
+        }
+
+@pytest.mark.parametrize("name",["run.jsonl","run.jsonl.gz"])
+def test_replay_returns_recorded_responses_without_network(make_api,mock,vm_uuid,tmp_path,name):
+    path=str(tmp_path/name)
+    with Cassette(path,"record") as cassette:
+        recorded=workload(make_api(cassette=cassette),vm_uuid)
+    mock.requests.clear()
+    replayed=workload(make_api(url=REPLAY_URL,cassette=Cassette(path,"replay")),vm_uuid)
+    assert replayed == recorded
+    assert not mock.requests
+
+def test_replay_matches_gzip_requests_with_plain_ones(make_api,vm_uuid,tmp_path):
+    path=str(tmp_path/"run.jsonl")
+    with Cassette(path,"record") as cassette:
+        assert make_api(cassette=cassette,gzip_request_min_size=64).vm_poweroff(vm_uuid).status_code == 202
+    api=make_api(url=REPLAY_URL,cassette=Cassette(path,"replay"))
+    assert api.vm_poweroff(vm_uuid).status_code == 202
+
+def test_replay_repeats_last_response_of_identical_requests(make_api,mock,tmp_path):
+    path=str(tmp_path/"run.jsonl")
+    with Cassette(path,"record") as cassette:
+        make_api(cassette=cassette).get_current_user_uuid()
+    api=make_api(url=REPLAY_URL,cassette=Cassette(path,"replay"))
+    assert [api.get_current_user_uuid() for _ in range(3)] == [mock.user_uuid]*3
+
+def test_unrecorded_request_raises(make_api,tmp_path):
+    path=str(tmp_path/"run.jsonl")
+    with Cassette(path,"record") as cassette:
+        make_api(cassette=cassette).get_current_user_uuid()
+    api=make_api(url=REPLAY_URL,cassette=Cassette(path,"replay"))
+    with pytest.raises(LookupError):
+        api.list_vms()
+
+def test_unknown_mode_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        Cassette(str(tmp_path/"run.jsonl"),"rewind")
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+
+import pytest
+
+from nutanixapi.batch import NutanixBatch
+from nutanixapi import vmspec
+
+def test_name_lookup_requests_only_matching_entities(api,mock):
+    image_uuid,image=next(iter(mock.entities['image'].items()))
+    assert api.get_image_uuid(image['spec']['name']) == image_uuid
+    assert api.get_image_uuid("missing") is False
+    assert mock.requests[('POST','images/list')] == 2
+
+def test_filter_and_sort_are_pushed_down(api,mock):
+    names=[vm['spec']['name'] for vm in api.iter_vms(page_size=4,sort_attribute='name',sort_order='DESCENDING')]
+    assert names == sorted(names,reverse=True)
+    assert [vm['spec']['name'] for vm in api.list_vms(filter='vm_name==vm-3')['entities']] == ['vm-3']
+
+def test_update_vm_retries_on_conflict(api,mock,vm_uuid):
+    def conflicting(vm):
+        if not conflicting.done:    #somebody else changes VM between GET and PUT
+            mock.entities['vm'][vm_uuid]['metadata']['spec_version']+=1
+            conflicting.done=True
+        return vmspec.set_cpu(4)(vm)
+    conflicting.done=False
+    assert api.update_vm(vm_uuid,conflicting).status_code == 202
+    assert mock.requests[('PUT','vms/{uuid}')] == 2
+
+def test_vm_cache_does_not_keep_vm_read_before_put(make_api,mock,vm_uuid):
+    api=make_api(vm_cache_ttl=600)
+    before=api.get_vm(vm_uuid,use_cache=False)
+    assert api.vm_poweroff(vm_uuid).status_code == 202
+    api.vm_cache.put(vm_uuid,before)   #GET which was in flight during PUT
+    assert api.get_vm(vm_uuid)['metadata']['spec_version'] == mock.entities['vm'][vm_uuid]['metadata']['spec_version']
+
+def test_bulk_create_reports_every_vm(api,mock,tmp_path):
+    for name in ("cloud-init.yaml.j2","cloud-init-net.yaml.j2","static.yaml.j2"):
+        (tmp_path/name).write_text("hostname: test\n")
+    spec=dict(vm_description="test",image_name="image-0",subnet_name="subnet-0",cluster_name="cluster-0",
+              project_name="project-0",template_dir=str(tmp_path))
+    specs=[dict(spec,vm_name="ok"),dict(spec,vm_name="bad",image_name="missing")]
+    report=api.create_vms_bulk(specs)
+    assert [result['status'] for result in report] == ['SUCCEEDED','SUBMIT_FAILED']
+    assert report[0]['vm_uuid'] in mock.entities['vm']
+
+def test_bulk_create_without_task_uuid_is_error(api,tmp_path,monkeypatch):
+    for name in ("cloud-init.yaml.j2","cloud-init-net.yaml.j2","static.yaml.j2"):
+        (tmp_path/name).write_text("hostname: test\n")
+    monkeypatch.setattr(api,'get_task_uuid',lambda result: None)
+    report=api.create_vms_bulk([dict(vm_name="x",vm_description="test",image_name="image-0",subnet_name="subnet-0",
+                                     cluster_name="cluster-0",project_name="project-0",template_dir=str(tmp_path))])
+    assert report[0]['status'] == 'ERROR'
+
+def test_bulk_create_keeps_report_when_waiting_fails(api,tmp_path,monkeypatch):
+    for name in ("cloud-init.yaml.j2","cloud-init-net.yaml.j2","static.yaml.j2"):
+        (tmp_path/name).write_text("hostname: test\n")
+    def wait_for_tasks(task_uuids,timeout=None):
+        yield task_uuids[0],'SUCCEEDED'
+        raise ConnectionError("connection reset")
+    monkeypatch.setattr(api,'wait_for_tasks',wait_for_tasks)
+    spec=dict(vm_description="test",image_name="image-0",subnet_name="subnet-0",cluster_name="cluster-0",
+              project_name="project-0",template_dir=str(tmp_path))
+    report=api.create_vms_bulk([dict(spec,vm_name="a"),dict(spec,vm_name="b")],concurrency=1)
+    assert [result['status'] for result in report] == ['SUCCEEDED','ERROR']
+    assert 'connection reset' in report[1]['error']
+    assert report[1]['task_uuid']
+
+def test_fleet_power_off(api,mock):
+    vm_uuids=list(mock.entities['vm'])[:5]
+    report=api.power_off_vms(vm_uuids)
+    assert {result['status'] for result in report} == {'SUCCEEDED'}
+    assert {mock.entities['vm'][vm_uuid]['spec']['resources']['power_state'] for vm_uuid in vm_uuids} == {'OFF'}
+
+def test_fleet_resize_system_disks(api,mock):
+    vm_uuids=list(mock.entities['vm'])[:3]
+    report=api.resize_disks(vm_uuids,"60G")
+    assert [result['status'] for result in report] == ['SUCCEEDED']*3
+    for vm_uuid in vm_uuids:
+        disks=mock.entities['vm'][vm_uuid]['spec']['resources']['disk_list']
+        system_disk=next(disk for disk in disks if disk['device_properties'].get('disk_address',{}).get('device_index') == 0)
+        assert system_disk['disk_size_bytes'] == 60*1000**3
+
+def test_fleet_resize_reports_vm_without_disk(api,mock):
+    vm_uuid=next(iter(mock.entities['vm']))
+    mock.entities['vm'][vm_uuid]['spec']['resources']['disk_list']=[]
+    report=api.resize_disks([vm_uuid,"missing"],"60G")
+    assert [result['status'] for result in report] == ['SUBMIT_FAILED','SUBMIT_FAILED']
+    assert 'system disk' in report[0]['error']
+
+def test_batch_sets_result_of_every_operation(api,mock):
+    vm_uuids=list(mock.entities['vm'])[:3]
+    with api.batch(max_batch_size=2) as batch:
+        futures=[batch.vm_poweroff(vm_uuid) for vm_uuid in vm_uuids]
+    assert [future.result().status_code for future in futures] == [202,202,202]
+    assert mock.requests[('POST','batch')] == 2
+
+def test_batch_put_does_not_let_older_vm_into_cache(make_api,mock,vm_uuid):
+    api=make_api(vm_cache_ttl=600)
+    before=api.get_vm(vm_uuid,use_cache=False)
+    with api.batch() as batch:
+        future=batch.vm_poweroff(vm_uuid)
+    assert future.result().content == api.codec.dumps(future.result().json())
+    api.vm_cache.put(vm_uuid,before)   #GET which was in flight during batch
+    assert api.get_vm(vm_uuid)['spec']['resources']['power_state'] == 'OFF'
+
+class _MalformedBatchApi:
+    class _Response:
+        status_code=200
+        def json(self):
+            return {"api_response_list":[{"status":"not a number"},"not a dict",{"status":"202","api_response":{}}]}
+
+    codec=None
+
+    def _on_vm_request(self,method,sub_url):
+        pass
+
+    def _on_vm_response(self,method,sub_url,data,response):
+        pass
+
+    def rest_call(self,method,sub_url,data=None):
+        return self._Response()
+
+def test_malformed_batch_entry_fails_only_its_future():
+    batch=NutanixBatch(_MalformedBatchApi())
+    futures=[batch.add('POST','vms',{}) for _ in range(3)]
+    batch.flush()
+    assert isinstance(futures[0].exception(),RuntimeError)
+    assert isinstance(futures[1].exception(),RuntimeError)
+    assert futures[2].result().status_code == 202
+
+def test_async_lookups_use_name_filter(mock):
+    pytest.importorskip("aiohttp")
+    from nutanixapi.async_nutanixapi import AsyncNutanixAPI
+    image_uuid,image=next(iter(mock.entities['image'].items()))
+    async def lookup():
+        async with AsyncNutanixAPI(mock.url,'admin','secret',None,logging.WARNING) as api:
+            return await api.get_image_uuid(image['spec']['name'])
+    mock.transfer.clear()
+    assert asyncio.run(lookup()) == image_uuid
+    assert mock.transfer['response_bytes'] < 2000
+
+def test_async_early_break_leaves_no_prefetch_running(mock):
+    pytest.importorskip("aiohttp")
+    from nutanixapi.async_nutanixapi import AsyncNutanixAPI
+    api=AsyncNutanixAPI(mock.url,'admin','secret',None,logging.WARNING,max_concurrency=2)
+    async def run():
+        entities=api.iter_vms(page_size=5,prefetch=True)
+        async for _ in entities:
+            break
+        assert api._tasks
+        await entities.aclose()
+        assert not api._tasks
+        async for _ in api.iter_vms(page_size=5,prefetch=True):
+            break
+        await api.close()
+        assert not api._tasks and api.session is None
+        with pytest.raises(RuntimeError):
+            await api.list_vms()
+    asyncio.run(run())
@@ -0,0 +1,56 @@
+import builtins
+import json
+
+import pytest
+
+from nutanixapi.codec import CODECS,StdlibCodec,get_codec
+
+DOCUMENT={"name":"vm-ä€","num":12345678901234567890,"ratio":-1.5e-3,"flags":[True,False,None],"nested":{}}
+
+def available_codecs():
+    codecs=[]
+    for name in CODECS:
+        try:
+            codecs.append(get_codec(name))
+        except ImportError:
+            pass
+    return codecs
+
+@pytest.fixture
+def no_orjson(monkeypatch):
+    real_import=builtins.__import__
+    def fake_import(name,*args,**kwargs):
+        if name == "orjson":
+            raise ImportError("No module named 'orjson'")
+        return real_import(name,*args,**kwargs)
+    monkeypatch.setattr(builtins,"__import__",fake_import)
+
+@pytest.mark.parametrize("codec",available_codecs(),ids=lambda codec: codec.name)
+def test_codec_round_trip(codec):
+    data=codec.dumps(DOCUMENT)
+    assert isinstance(data,bytes)
+    assert json.loads(data) == DOCUMENT
+    assert codec.loads(data) == DOCUMENT
+    assert codec.loads(data.decode('utf-8')) == DOCUMENT
+
+def test_auto_selects_fastest_installed(no_orjson):
+    assert isinstance(get_codec(),StdlibCodec)
+    assert isinstance(get_codec("auto"),StdlibCodec)
+    with pytest.raises(ImportError):
+        get_codec("orjson")
+
+def test_auto_prefers_orjson_when_installed():
+    pytest.importorskip("orjson")
+    assert get_codec().name == "orjson"
+
+def test_codec_by_name_and_object():
+    codec=StdlibCodec()
+    assert get_codec(codec) is codec
+    assert get_codec("json").name == "json"
+    with pytest.raises(ValueError):
+        get_codec("yaml")
+
+def test_api_uses_configured_codec(make_api,vm_uuid):
+    api=make_api(json_codec="json")
+    assert api.codec.name == "json"
+    assert api.get_vm(vm_uuid)['metadata']['uuid'] == vm_uuid
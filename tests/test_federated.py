@@ -0,0 +1,43 @@
+import threading
+import time
+
+import pytest
+
+from nutanixapi.federated import FederatedError,FederatedNutanixAPI
+
+def test_list_vms_merges_all_endpoints(make_api,mock):
+    fed=FederatedNutanixAPI({"a":make_api(),"b":make_api()})
+    merged=fed.list_vms(fields=('uuid',))
+    assert len(merged) == 2*len(mock.entities['vm'])
+    assert {source for source,vm in merged} == {"a","b"}
+    assert {vm.uuid for source,vm in merged if source == "a"} == set(mock.entities['vm'])
+    assert merged.errors == {}
+
+def test_failed_endpoint_raises_or_is_reported(make_api,mock):
+    fed=FederatedNutanixAPI({"ok":make_api(),"bad":make_api()})
+    def operation(source,api):
+        if source == "bad":
+            raise ConnectionError("down")
+        return [api.get_current_user_uuid()]
+    with pytest.raises(FederatedError) as info:
+        fed.fan_out(operation)
+    assert set(info.value.errors) == {"bad"}
+    results,errors=fed.fan_out(operation,partial=True)
+    assert results == {"ok":[mock.user_uuid]}
+    assert isinstance(errors["bad"],ConnectionError)
+
+def test_slow_endpoint_times_out_without_stalling_others(make_api):
+    fed=FederatedNutanixAPI({"fast":make_api(),"slow":make_api()},timeout=0.2,partial=True)
+    release=threading.Event()
+    def operation(source,api):
+        if source == "slow":
+            release.wait(5)
+        return [source]
+    started=time.monotonic()
+    try:
+        results,errors=fed.fan_out(operation)
+    finally:
+        release.set()
+    assert time.monotonic()-started < 2
+    assert results == {"fast":["fast"]}
+    assert isinstance(errors["slow"],TimeoutError)
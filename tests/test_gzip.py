@@ -0,0 +1,40 @@
+from nutanixapi.metrics import Metrics
+
+def test_list_response_is_gzip_compressed(make_api,mock):
+    api=make_api(metrics=Metrics())
+    vms=api.list_vms()
+    assert len(vms['entities']) == len(mock.entities['vm'])
+    assert mock.transfer['response_gzip'] == 1
+    assert mock.transfer['response_wire_bytes'] < mock.transfer['response_bytes']
+    stats=api.metrics.transfer_stats()
+    assert stats['response_bytes'] == mock.transfer['response_bytes']
+    assert stats['response_wire_bytes'] == mock.transfer['response_wire_bytes']
+    assert stats['saved_bytes'] > 0
+
+def test_streamed_response_counts_json_and_wire_bytes(make_api,mock):
+    api=make_api(metrics=Metrics())
+    assert sum(1 for vm in api.iter_vms(page_size=8,stream=True)) == len(mock.entities['vm'])
+    stats=api.metrics.transfer_stats()
+    assert stats['response_bytes'] == mock.transfer['response_bytes']
+    assert stats['response_wire_bytes'] == mock.transfer['response_wire_bytes']
+    assert stats['response_wire_bytes'] < stats['response_bytes']
+
+def test_response_not_compressed_when_not_accepted(make_api,mock):
+    api=make_api(accept_gzip=False)
+    api.list_vms()
+    assert mock.transfer['response_gzip'] == 0
+    assert mock.transfer['response_wire_bytes'] == mock.transfer['response_bytes']
+
+def test_large_request_body_is_gzip_compressed(make_api,mock,vm_uuid):
+    api=make_api(gzip_request_min_size=256,metrics=Metrics())
+    response=api.vm_poweroff(vm_uuid)
+    assert response.status_code == 202
+    assert mock.entities['vm'][vm_uuid]['spec']['resources']['power_state'] == 'OFF'
+    assert mock.transfer['request_gzip'] == 1
+    stats=api.metrics.transfer_stats()
+    assert stats['request_wire_bytes'] < stats['request_bytes']
+
+def test_small_request_body_is_not_compressed(make_api,mock):
+    api=make_api(gzip_request_min_size=1<<20)
+    api.list_images()
+    assert mock.transfer['request_gzip'] == 0
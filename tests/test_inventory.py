@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+from nutanixapi.inventory import Inventory
+from mockserver import MockPrismCentral,_now
+
+@pytest.fixture
+def inventory(tmp_path):
+    with Inventory(str(tmp_path/"inventory.db")) as inventory:
+        yield inventory
+
+def touch(entity):
+    time.sleep(0.002)   #last_update_time has microsecond resolution
+    entity['metadata']['last_update_time']=_now()
+
+def test_full_sync_copies_all_entities(inventory,api,mock):
+    changed=inventory.sync(api)
+    assert changed == {kind:len(entities) for kind,entities in mock.entities.items()}
+    image_uuid,image=next(iter(mock.entities['image'].items()))
+    assert inventory.get_uuid('image',image['spec']['name']) == image_uuid
+    assert inventory.get('image',image_uuid) == image
+    assert len(inventory.find_vms()) == len(mock.entities['vm'])
+
+def test_incremental_sync_writes_only_changed_entities(inventory,api,mock,vm_uuid):
+    inventory.sync(api,kinds=['vm'])
+    assert inventory.sync(api,kinds=['vm']) == {'vm':0}
+    vm=mock.entities['vm'][vm_uuid]
+    vm['spec']['name']='renamed'
+    vm['metadata']['spec_version']+=1
+    touch(vm)
+    assert inventory.sync(api,kinds=['vm']) == {'vm':1}
+    assert inventory.get_uuid('vm','renamed') == vm_uuid
+
+def test_incremental_sync_keeps_status_only_changes(inventory,api,mock,vm_uuid):
+    inventory.sync(api,kinds=['vm'])
+    vm=mock.entities['vm'][vm_uuid]
+    vm['status']['resources']['power_state']='PAUSED'
+    touch(vm)
+    assert inventory.sync(api,kinds=['vm']) == {'vm':1}
+    stored=inventory.get('vm',vm_uuid)
+    assert stored['status']['resources']['power_state'] == 'PAUSED'
+    assert stored['metadata']['last_update_time'] == vm['metadata']['last_update_time']
+    assert inventory.sync(api,kinds=['vm']) == {'vm':0}
+
+def test_incremental_sync_reads_all_pages_when_server_ignores_sort(inventory,make_api):
+    with MockPrismCentral(vms=20,sorting=False) as mock:
+        api=make_api(url=mock.url)
+        inventory.sync(api,kinds=['vm'])
+        changed=list(mock.entities['vm'].values())[::19]
+        for idx,vm in enumerate(changed):
+            vm['spec']['name']=f'changed-{idx}'
+            vm['metadata']['spec_version']+=1
+            touch(vm)
+        assert inventory.sync(api,kinds=['vm']) == {'vm':2}
+        assert [inventory.get_uuid('vm',vm['spec']['name']) for vm in changed] == \
+               [vm['metadata']['uuid'] for vm in changed]
+
+def test_full_sync_drops_deleted_entities(inventory,api,mock,vm_uuid):
+    inventory.sync(api,kinds=['vm'])
+    del mock.entities['vm'][vm_uuid]
+    inventory.sync(api,kinds=['vm'])
+    assert inventory.get('vm',vm_uuid) is not None     #incremental sync does not see deletions
+    inventory.sync(api,kinds=['vm'],full=True)
+    assert inventory.get('vm',vm_uuid) is None
+
+def test_api_lookups_are_served_from_inventory(make_api,mock,inventory):
+    api=make_api(inventory=inventory)
+    api.sync_inventory(kinds=['image'])
+    mock.requests.clear()
+    image_uuid,image=next(iter(mock.entities['image'].items()))
+    assert api.get_image_uuid(image['spec']['name']) == image_uuid
+    assert not mock.requests
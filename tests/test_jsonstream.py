@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from nutanixapi.jsonstream import iter_array_items
+
+DOCUMENT={
+    "api_version":"3.1",
+    "metadata":{"total_matches":3,"kind":"vm","length":3,"offset":0},
+    "entities":[
+        {"spec":{"name":"vm-ä€","description":"quote \" backslash \\ newline \n"},"metadata":{"uuid":"a"}},
+        {"spec":{"name":"vm-2","num_sockets":12345678901234567890,"ratio":-1.5e-3},"metadata":{"uuid":"b"}},
+        {"spec":{"name":"vm-3","flags":[True,False,None],"nested":{"empty":{},"list":[]}},"metadata":{"uuid":"c"}},
+        ],
+    "status":"done",
+    }
+
+def split(data,size):
+    return [data[idx:idx+size] for idx in range(0,len(data),size)]
+
+@pytest.mark.parametrize("size",[1,2,3,7,64,65536])
+def test_items_and_members_for_any_chunk_size(size):
+    data=json.dumps(DOCUMENT,ensure_ascii=False).encode('utf-8')
+    members={}
+    items=list(iter_array_items(split(data,size),'entities',members))
+    assert items == DOCUMENT['entities']
+    assert members == {"api_version":"3.1","metadata":DOCUMENT['metadata'],"status":"done"}
+
+def test_every_split_position():
+    data=json.dumps(DOCUMENT,ensure_ascii=False,indent=1).encode('utf-8')
+    for pos in range(1,len(data)):
+        assert list(iter_array_items([data[:pos],b'',data[pos:]],'entities')) == DOCUMENT['entities']
+
+def test_number_at_chunk_boundary_is_not_truncated():
+    chunks=[b'{"entities":[1234',b'5678,9',b'0]}']
+    assert list(iter_array_items(chunks,'entities')) == [12345678,90]
+
+@pytest.mark.parametrize("document,expected",[
+    (b'{}',[]),
+    (b'{"entities":[]}',[]),
+    (b' { "entities" : [ 1 , 2 ] } ',[1,2]),
+    (b'{"entities":{"not":"array"}}',[]),
+    ])
+def test_empty_and_unusual_documents(document,expected):
+    assert list(iter_array_items(split(document,1),'entities')) == expected
+
+@pytest.mark.parametrize("document",[b'{"entities":[1,2',b'{"entities":[1 2]}',b'[1,2]'])
+def test_invalid_document_raises(document):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_array_items(split(document,3),'entities'))
+
+def test_streamed_iteration_matches_paged(api,mock):
+    streamed=[vm['metadata']['uuid'] for vm in api.iter_vms(page_size=7,stream=True)]
+    paged=[vm['metadata']['uuid'] for vm in api.iter_vms(page_size=7)]
+    assert streamed == paged
+    assert sorted(streamed) == sorted(mock.entities['vm'])
@@ -0,0 +1,42 @@
+from nutanixapi.metrics import Metrics,endpoint_name
+
+def test_endpoint_name_groups_uuids():
+    assert endpoint_name("vms/0d1e9c2a-4c3b-4f6e-9a8b-1c2d3e4f5a6b?x=1") == "vms/{uuid}"
+    assert endpoint_name("vms/list") == "vms/list"
+
+def test_hooks_are_called_around_every_request(make_api,vm_uuid):
+    metrics=Metrics()
+    started=[]
+    finished=[]
+    metrics.add_hooks(start=lambda method,endpoint: started.append((method,endpoint)),end=finished.append)
+    api=make_api(metrics=metrics)
+    api.get_vm(vm_uuid)
+    api.rest_call('GET','vms/not-a-uuid')
+    assert started == [('GET','vms/{uuid}'),('GET','vms/not-a-uuid')]
+    assert [(info['endpoint'],info['status']) for info in finished] == [('vms/{uuid}',200),('vms/not-a-uuid',404)]
+    assert finished[0]['response_bytes'] > 0 and finished[0]['duration'] > 0
+
+def test_retries_and_errors_are_counted(make_api,mock):
+    metrics=Metrics()
+    api=make_api(metrics=metrics)
+    mock.inject_error(503,count=1,retry_after=0)
+    api.get_current_user_uuid()
+    assert metrics.requests[('GET','users/me','200')] == 1
+    assert metrics.retries[('GET','users/me')] == 1
+
+def test_prometheus_exposition():
+    metrics=Metrics(buckets=(0.1,1),prefix="pc")
+    metrics.request_finished('GET','vms/{uuid}',200,0.05,0,100)
+    metrics.request_finished('GET','vms/{uuid}',200,0.5,0,100)
+    metrics.task_finished('SUCCEEDED',2)
+    lines=metrics.to_prometheus().splitlines()
+    assert '# TYPE pc_requests_total counter' in lines
+    assert 'pc_requests_total{method="GET",endpoint="vms/{uuid}",status="200"} 2' in lines
+    assert 'pc_request_duration_seconds_bucket{method="GET",endpoint="vms/{uuid}",le="0.1"} 1' in lines
+    assert 'pc_request_duration_seconds_bucket{method="GET",endpoint="vms/{uuid}",le="1"} 2' in lines
+    assert 'pc_request_duration_seconds_bucket{method="GET",endpoint="vms/{uuid}",le="+Inf"} 2' in lines
+    assert 'pc_request_duration_seconds_count{method="GET",endpoint="vms/{uuid}"} 2' in lines
+    assert 'pc_response_bytes_total{method="GET",endpoint="vms/{uuid}"} 200' in lines
+    assert 'pc_task_wait_seconds_bucket{status="SUCCEEDED",le="+Inf"} 1' in lines
+    for line in lines:
+        assert line.startswith('# ') or line.rsplit(' ',1)[1].replace('.','',1).isdigit()
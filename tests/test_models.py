@@ -0,0 +1,48 @@
+import pytest
+
+from nutanixapi.models import SUMMARY_TYPES,EntitySummary,VMSummary
+
+def test_every_kind_has_summary_matching_entities(api,mock):
+    for kind,record_type in SUMMARY_TYPES.items():
+        for entity in mock.entities[kind].values():
+            record=record_type.from_entity(entity)
+            assert record.uuid == entity['metadata']['uuid']
+            assert record.name == entity['spec']['name']
+            assert set(record.as_dict()) == set(record_type.FIELDS)
+
+def test_vm_summary_derives_fields(mock,vm_uuid):
+    vm=mock.entities['vm'][vm_uuid]
+    record=VMSummary.from_entity(vm)
+    resources=vm['status']['resources']
+    assert record.num_vcpus == resources['num_sockets']*resources['num_vcpus_per_socket']
+    assert record.power_state == resources['power_state']
+    assert record.spec_version == vm['metadata']['spec_version']
+    assert not hasattr(record,'__dict__')
+
+def test_projection_stores_only_requested_fields(mock,vm_uuid):
+    projected=VMSummary.projection(['name','uuid'])
+    assert projected is VMSummary.projection(('name','uuid'))
+    assert VMSummary.projection() is VMSummary
+    assert projected.__name__ == 'VMSummary[name,uuid]'
+    assert issubclass(projected,EntitySummary) and not issubclass(projected,VMSummary)
+    record=projected.from_entity(mock.entities['vm'][vm_uuid])
+    assert record.as_dict() == {'name':mock.entities['vm'][vm_uuid]['spec']['name'],'uuid':vm_uuid}
+    with pytest.raises(AttributeError):
+        record.power_state
+    with pytest.raises(ValueError):
+        VMSummary.projection(['name','no_such_field'])
+
+def test_records_are_comparable_and_hashable(mock):
+    vms=list(mock.entities['vm'].values())
+    records=[VMSummary.from_entity(vm) for vm in vms]
+    again=[VMSummary.from_entity(vm) for vm in vms]
+    assert records == again
+    assert len(set(records+again)) == len(vms)
+    projected=VMSummary.projection(['uuid']).from_entity(vms[0])
+    assert projected != VMSummary.from_entity(vms[0])
+
+def test_iter_with_fields_yields_projected_records(api,mock):
+    records=list(api.iter_vms(page_size=7,fields=('uuid','power_state')))
+    assert {record.uuid for record in records} == set(mock.entities['vm'])
+    assert type(records[0]).__name__ == 'VMSummary[uuid,power_state]'
+    assert all(isinstance(record,VMSummary) for record in api.iter_vms(summary=True))
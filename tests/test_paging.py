@@ -0,0 +1,43 @@
+import threading
+import time
+
+import pytest
+import requests
+
+def wait_until(condition,timeout=5):
+    deadline=time.monotonic()+timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_prefetch_yields_same_entities(api,mock):
+    plain=[vm['metadata']['uuid'] for vm in api.iter_vms(page_size=6)]
+    prefetched=[vm['metadata']['uuid'] for vm in api.iter_vms(page_size=6,prefetch=True)]
+    assert prefetched == plain
+    assert sorted(plain) == sorted(mock.entities['vm'])
+
+def test_next_page_is_fetched_while_current_is_processed(api,mock):
+    entities=api.iter_vms(page_size=6,prefetch=True)
+    next(entities)
+    wait_until(lambda: mock.requests[('POST','vms/list')] == 2)
+    entities.close()
+
+def pool_threads():
+    return {thread for thread in threading.enumerate() if thread.name.startswith('ThreadPoolExecutor')}
+
+def test_early_close_stops_prefetch_thread(api,mock):
+    before=pool_threads()
+    for _ in api.iter_vms(page_size=6,prefetch=True):
+        break
+    wait_until(lambda: pool_threads() <= before)
+    assert mock.requests[('POST','vms/list')] <= 2
+
+def test_failed_prefetched_page_raises(api,mock):
+    entities=api.iter_vms(page_size=6,prefetch=True)
+    seen=[next(entities)]
+    wait_until(lambda: mock.requests[('POST','vms/list')] == 2)
+    mock.inject_error(400)      #third page, prefetched while second is processed
+    with pytest.raises(requests.HTTPError):
+        for vm in entities:
+            seen.append(vm)
+    assert len(seen) == 12
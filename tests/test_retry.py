@@ -0,0 +1,50 @@
+import time
+
+import pytest
+
+from nutanixapi.cassette import Cassette
+
+def test_429_is_retried_after_retry_after(api,mock):
+    api.get_current_user_uuid()     #session warm-up
+    mock.requests.clear()
+    mock.inject_error(429,count=2,retry_after=0.2)
+    started=time.monotonic()
+    assert api.get_current_user_uuid() == mock.user_uuid
+    assert time.monotonic()-started >= 0.4
+    assert mock.requests[('GET','users/me')] == 3
+
+def test_429_is_retried_for_non_idempotent_post(api,mock):
+    mock.inject_error(429,retry_after=0)
+    response=api.rest_call('POST','vms',{"spec":{"name":"x","resources":{}},"metadata":{"kind":"vm"}})
+    assert response.status_code == 202
+    assert mock.requests[('POST','vms')] == 2
+
+def test_503_is_not_retried_for_non_idempotent_post(api,mock):
+    mock.inject_error(503)
+    response=api.rest_call('POST','vms',{"spec":{"name":"x","resources":{}},"metadata":{"kind":"vm"}})
+    assert response.status_code == 503
+    assert mock.requests[('POST','vms')] == 1
+
+def test_retries_stop_after_max_retries(make_api,mock):
+    api=make_api(max_retries=2)
+    mock.inject_error(503,count=5,retry_after=0)
+    assert api.rest_call('GET','users/me').status_code == 503
+    assert mock.requests[('GET','users/me')] == 3
+
+def test_overload_lowers_concurrency_limit(make_api,mock):
+    api=make_api(max_concurrency=8)
+    mock.inject_error(503,count=2,retry_after=0)
+    assert api.get_current_user_uuid() == mock.user_uuid
+    assert api.concurrency.limit < 8
+    assert api.concurrency.in_flight == 0
+
+def test_concurrency_slot_is_released_on_other_exceptions(make_api,mock,tmp_path):
+    path=str(tmp_path/"cassette.jsonl")
+    with Cassette(path,"record") as cassette:
+        make_api(cassette=cassette).get_current_user_uuid()
+    api=make_api(url="http://nowhere.invalid",max_concurrency=2,cassette=Cassette(path,"replay"))
+    for _ in range(3):
+        with pytest.raises(LookupError):
+            api.get_vm("not-recorded")
+    assert api.concurrency.in_flight == 0
+    assert api.get_current_user_uuid() == mock.user_uuid
@@ -0,0 +1,55 @@
+import logging
+from concurrent.futures import wait
+
+import pytest
+
+from nutanixapi.nutanixapi import NutanixAPI
+from mockserver import MockPrismCentral
+from nutanixapi.tasks import TaskError, TaskFuture
+
+@pytest.fixture
+def failing_api():
+    with MockPrismCentral(vms=5,task_failure_rate=1) as mock, \
+         NutanixAPI(mock.url,'admin','secret',None,logging.WARNING) as api:
+        api.task_poller.poll_interval=0.05
+        yield api,mock
+
+def test_succeeded_task_resolves_future(api,vm_uuid):
+    api.task_poller.poll_interval=0.05
+    future=api.vm_poweron(vm_uuid,as_future=True)
+    assert isinstance(future,TaskFuture)
+    task=future.result(timeout=10)
+    assert task['status'] == 'SUCCEEDED'
+    assert task['uuid'] == future.task_uuid
+
+def test_failed_task_raises_task_error(failing_api):
+    api,mock=failing_api
+    futures=[api.vm_poweroff(vm_uuid,as_future=True) for vm_uuid in list(mock.entities['vm'])[:3]]
+    done,not_done=wait(futures,timeout=10)
+    assert not not_done
+    for future in futures:
+        with pytest.raises(TaskError) as info:
+            future.result()
+        assert info.value.status == 'FAILED'
+        assert info.value.task_uuid == future.task_uuid
+        assert info.value.response is future.response
+    assert api.task_poller.pending() == 0
+
+def test_submit_failure_gives_failed_future(api):
+    future=api.vm_poweron("00000000-0000-4000-8000-000000000000",as_future=True)
+    with pytest.raises(TaskError) as info:
+        future.result(timeout=1)
+    assert info.value.status == 'SUBMIT_FAILED'
+    assert info.value.task_uuid is None
+
+def test_close_cancels_pending_futures(make_api,mock,vm_uuid):
+    mock.task_duration=60
+    api=make_api()
+    future=api.vm_poweron(vm_uuid,as_future=True)
+    api.close()
+    assert future.cancelled()
+
+def test_wait_for_tasks_reports_failures(failing_api):
+    api,mock=failing_api
+    task_uuids=[api.get_task_uuid(api.vm_poweron(vm_uuid).json()) for vm_uuid in mock.entities['vm']]
+    assert dict(api.wait_for_tasks(task_uuids,timeout=10,poll_interval=0.05)) == {task_uuid:'FAILED' for task_uuid in task_uuids}
@@ -0,0 +1,61 @@
+import os
+from base64 import b64decode
+
+import pytest
+
+pytest.importorskip("jinja2")
+
+from nutanixapi.templates import CloudInitTemplates
+
+NET_CFG={"ip_address":"10.0.0.5","prefix":24,"default_gw":"10.0.0.1",
+         "dns_server1":"10.0.0.2","dns_server2":"10.0.0.3","dns_search":"example.com"}
+
+@pytest.fixture
+def template_dir(tmp_path):
+    (tmp_path/"cloud-init.yaml.j2").write_text("hostname: managed\n")
+    (tmp_path/"cloud-init-net.yaml.j2").write_text("netplan: {{ netplan_content }}\n")
+    (tmp_path/"static.yaml.j2").write_text("address: {{ ip_address }}/{{ prefix }}\n")
+    return tmp_path
+
+def decode(user_data):
+    return b64decode(user_data).decode()
+
+def touch(path,text):
+    stat=os.stat(path)
+    path.write_text(text)
+    os.utime(path,(stat.st_atime,stat.st_mtime+10))     #mtime resolution of some filesystems is coarse
+
+def test_unmanaged_user_data_renders_network_config(template_dir):
+    templates=CloudInitTemplates(str(template_dir))
+    netplan=decode(templates.user_data_unmanaged(NET_CFG)).split(": ",1)[1].strip()
+    assert decode(netplan) == "address: 10.0.0.5/24"
+
+def test_user_data_is_memoized_per_network_config(template_dir,monkeypatch):
+    templates=CloudInitTemplates(str(template_dir),max_memoized=2)
+    renders=[]
+    get_template=templates.env.get_template
+    monkeypatch.setattr(templates.env,"get_template",lambda name: renders.append(name) or get_template(name))
+    first=templates.user_data_unmanaged(NET_CFG)
+    assert templates.user_data_unmanaged(dict(NET_CFG)) == first
+    assert len(renders) == 2                #network and cloud-init template, once
+    templates.user_data_unmanaged(dict(NET_CFG,ip_address="10.0.0.6"))
+    templates.user_data_unmanaged(NET_CFG)     #most recently used now
+    templates.user_data_unmanaged(dict(NET_CFG,ip_address="10.0.0.7"))
+    assert len(templates._memo) == 2
+    renders.clear()
+    templates.user_data_unmanaged(NET_CFG)
+    assert not renders
+    templates.user_data_unmanaged(dict(NET_CFG,ip_address="10.0.0.6"))     #least recently used was evicted
+    assert renders
+
+def test_changed_template_is_rendered_again(template_dir):
+    templates=CloudInitTemplates(str(template_dir))
+    assert decode(templates.user_data_managed()) == "hostname: managed"
+    touch(template_dir/"cloud-init.yaml.j2","hostname: changed\n")
+    assert decode(templates.user_data_managed()) == "hostname: changed"
+    touch(template_dir/"static.yaml.j2","address: {{ ip_address }}\n")
+    netplan=decode(templates.user_data_unmanaged(NET_CFG)).split(": ",1)[1].strip()
+    assert decode(netplan) == "address: 10.0.0.5"
+
+def test_api_reuses_templates_of_directory(api,template_dir):
+    assert api._get_templates(str(template_dir)) is api._get_templates(str(template_dir))